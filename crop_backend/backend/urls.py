@@ -19,15 +19,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
-# ✅ Added for serving media files during development
 from django.conf import settings
-from django.conf.urls.static import static
+
+from crops.media import public_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/crops/", include("crops.urls")),  # ← mount your crops app here
-]
-
-# ✅ Serve media files (like /media/tomato.png) during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # ✅ Media (like /media/tomato.png), with Range/ETag or X-Accel-Redirect; see crops.media
+    path(settings.MEDIA_URL.lstrip("/") + "<path:path>", public_media),
+]
\ No newline at end of file
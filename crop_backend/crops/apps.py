@@ -1,6 +1,17 @@
+import logging
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class CropsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crops'
+
+    def ready(self):
+        from .response_cache import check_shared_cache
+
+        # system checks don't run under gunicorn/uvicorn, so say it at startup too
+        for warning in check_shared_cache(None):
+            logger.warning("%s (%s)", warning.msg, warning.id)
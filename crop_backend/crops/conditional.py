@@ -0,0 +1,64 @@
+# crop_backend/crops/conditional.py
+"""
+Conditional requests (ETag / Last-Modified) for API views.
+
+Validators come from cheap queries rather than from the response body: one
+aggregate (latest updated_at plus row count) for a collection, updated_at
+for a single row. Views check them before fetching or serializing anything,
+so an unchanged resource costs one small query and a 304. On PUT/PATCH the
+same validators make If-Match / If-Unmodified-Since answer 412 instead of
+overwriting someone else's change.
+
+Collections send only an ETag: a deleted row changes the count but not the
+latest updated_at, so Last-Modified alone would miss it.
+"""
+import hashlib
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+Validators = Tuple[str, Optional[datetime]]
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def collection_validators(qs, *extra, field: str = "updated_at") -> Validators:
+    """ETag for every row of `qs`; `extra` adds whatever else the response depends on."""
+    agg = qs.order_by().aggregate(last=Max(field), n=Count("pk"))
+    last = agg["last"]
+    return make_etag(last.isoformat() if isinstance(last, datetime) else last, agg["n"], *extra), None
+
+
+def object_validators(pk, updated_at: datetime, *extra) -> Validators:
+    return make_etag(pk, updated_at.isoformat(), *extra), updated_at
+
+
+def precondition(request, validators: Validators):
+    """A 304 or 412 response if the request's conditional headers call for one, else None."""
+    etag, last_modified = validators
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, validators)
+    return response
+
+
+def set_validators(response, validators: Validators, public: bool = False):
+    etag, last_modified = validators
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # stored by clients, but always revalidated
+    patch_cache_control(response, max_age=0, must_revalidate=True, **({"public": True} if public else {"private": True}))
+    if not public:
+        patch_vary_headers(response, ["Authorization"])
+    return response
@@ -0,0 +1,151 @@
+# crop_backend/crops/media.py
+"""
+Media file responses that keep Python workers out of the byte copying.
+
+With MEDIA_ACCEL_REDIRECT = "nginx" the response is an empty X-Accel-Redirect
+to MEDIA_ACCEL_PREFIX + name (an nginx `internal` location aliased to
+MEDIA_ROOT). With "sendfile" it is an X-Sendfile header for Apache
+mod_xsendfile / lighttpd. Otherwise the file is served directly: a
+FileResponse that WSGI servers such as gunicorn send with os.sendfile, with
+strong ETags, conditional GET and single-range Range requests.
+
+Shared by both projects; django_auth_api's protected plot images check
+ownership first (plots.views.protected_media) and then call serve_file.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _Slice:
+    """Read-only view of bytes [start, start + length) of an open file."""
+
+    def __init__(self, f, start, length):
+        self._f = f
+        self._left = length
+        f.seek(start)
+
+    def read(self, size=-1):
+        if self._left <= 0:
+            return b""
+        size = self._left if size is None or size < 0 else min(size, self._left)
+        data = self._f.read(size)
+        self._left -= len(data)
+        return data
+
+    def close(self):
+        self._f.close()
+
+
+def _etag(st) -> str:
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def _parse_range(header: str, size: int):
+    """(start, end) inclusive for a single satisfiable range, None to ignore, or False if unsatisfiable."""
+    m = _RANGE.match(header.replace(" ", ""))
+    if not m or (not m.group(1) and not m.group(2)):
+        return None  # malformed or multi-range: serve the whole file
+    first, last = m.group(1), m.group(2)
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _not_modified(request, etag: str, mtime: float) -> bool:
+    inm = request.headers.get("If-None-Match")
+    if inm is not None:
+        return inm.strip() == "*" or etag in [t.strip() for t in inm.split(",")]
+    ims = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return ims is not None and int(mtime) <= ims
+
+
+def serve_file(request, name: str, root: str = None, cache_control: str = "public, max-age=86400", accel: bool = True):
+    """
+    Respond with MEDIA_ROOT/<name> (or root/<name>); 404 if missing or outside
+    root. accel=False serves from Django even with MEDIA_ACCEL_REDIRECT, for
+    files the proxy's media location doesn't cover.
+    """
+    root = root or settings.MEDIA_ROOT
+    try:
+        path = safe_join(root, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        st = os.stat(path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+
+    etag = _etag(st)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+    if _not_modified(request, etag, st.st_mtime):
+        resp = HttpResponseNotModified()
+        for k, v in headers.items():
+            resp[k] = v
+        return resp
+
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    accel = getattr(settings, "MEDIA_ACCEL_REDIRECT", "") if accel else ""
+    if accel:
+        # The proxy handles Range and the body; we only decide access.
+        resp = HttpResponse(content_type=content_type)
+        if accel == "nginx":
+            resp["X-Accel-Redirect"] = getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/") + quote(name)
+        else:
+            resp["X-Sendfile"] = path
+        for k, v in headers.items():
+            resp[k] = v
+        return resp
+
+    f = open(path, "rb")
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and request.headers.get("If-Range", etag) == etag:
+        byte_range = _parse_range(range_header, st.st_size)
+    if byte_range is False:
+        f.close()
+        resp = HttpResponse(status=416)
+        resp["Content-Range"] = f"bytes */{st.st_size}"
+        return resp
+
+    if byte_range is None:
+        resp = FileResponse(f, content_type=content_type)
+    else:
+        start, end = byte_range
+        resp = FileResponse(_Slice(f, start, end - start + 1), status=206, content_type=content_type)
+        resp["Content-Length"] = str(end - start + 1)
+        resp["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+    for k, v in headers.items():
+        resp[k] = v
+    return resp
+
+
+@require_safe
+def public_media(request, path):
+    """GET /media/<path> for files anyone may read (e.g. catalog images)."""
+    return serve_file(request, path)
@@ -1,4 +1,9 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .response_cache import invalidate, tag
+from .units import parse_days_range, parse_spacing_m, parse_stages
 
 class Crop(models.Model):
     name = models.CharField(max_length=100)
@@ -13,6 +18,29 @@ class Crop(models.Model):
     fertiliser_tips = models.TextField(blank=True)
     pest_notes = models.TextField(blank=True)
     image = models.ImageField(upload_to='crop_images/', blank=True, null=True)
+    # ETags (crops.conditional) come from this, so every process sees a write
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
+
+    @property
+    def spacing_m(self):
+        """Plant spacing in metres, or None if `spacing` can't be read."""
+        return parse_spacing_m(self.spacing)
+
+    @property
+    def harvest_days(self):
+        """(min, max) days from planting to harvest, or None."""
+        return parse_days_range(self.harvest_time)
+
+    @property
+    def stage_list(self):
+        """growth_stages split into an ordered list of stage names."""
+        return parse_stages(self.growth_stages)
+
+
+@receiver(post_save, sender=Crop)
+@receiver(post_delete, sender=Crop)
+def invalidate_crop_responses(sender, instance, **kwargs):
+    invalidate(tag("crops.crop"), tag("crops.crop", instance.pk))
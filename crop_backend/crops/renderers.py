@@ -0,0 +1,54 @@
+# crop_backend/crops/renderers.py
+"""
+orjson-backed DRF renderer and parser, used as the REST_FRAMEWORK default
+by both projects (this package is the code they share).
+
+Values orjson can't encode natively (lazy translation strings, Decimals,
+querysets, ...) and all datetimes go through DRF's own JSONEncoder.default,
+so output matches the stock JSONRenderer. Without orjson installed, or when
+the browsable API asks for indented output, both classes defer to DRF.
+"""
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+_default = JSONEncoder().default
+
+if orjson is not None:
+    # Datetimes are passed to _default so they get DRF's formatting
+    # (millisecond precision, "Z" for UTC) rather than orjson's.
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        ret = orjson.dumps(data, default=_default, option=OPTIONS)
+        # Same as JSONRenderer: U+2028/2029 are valid JSON but not valid JavaScript.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
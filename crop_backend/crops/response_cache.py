@@ -0,0 +1,126 @@
+# crop_backend/crops/response_cache.py
+"""
+Per-user, per-URL cache of API responses, invalidated by tags.
+
+    @cached_response(lambda view, request, *args, **kwargs: [tag("plots.plot", kwargs["pk"])])
+    def retrieve(self, request, *args, **kwargs): ...
+
+Each tag ("crops.crop", "plots.plot:12", "accounts.event:user:3") has a
+version in the cache. An entry records the versions of its tags as they
+were *before* the view ran, and is only served while they are all
+unchanged. Model receivers call invalidate(), which gives the tags new
+versions twice: immediately, and again once the transaction commits. A
+read that overlaps an open write therefore stores an entry that is
+already stale.
+
+What is cached is response.data, not rendered bytes. A hit skips the
+queries and serializers but still content-negotiates. The ETag etc. are
+kept with it, so If-None-Match is answered from the entry (crops.conditional).
+
+Entries and versions live in the default cache. With several processes it
+has to be a shared backend (Redis/Memcached) so that every worker sees a
+write; the local-memory backend is only correct within one process. So the
+cache is off unless RESPONSE_CACHE_ENABLED is set, and check_shared_cache
+warns when it is enabled on a local-memory backend.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+ENTRY_KEY = "respcache:entry:{view}:{user}:{path}"
+TAG_KEY = "respcache:tag:{tag}"
+# Headers replayed on a hit
+KEPT_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "Vary")
+
+
+def tag(label: str, pk=None, **scope) -> str:
+    """tag("plots.plot", 3) -> "plots.plot:3"; tag("accounts.event", user=5) -> "accounts.event:user:5"."""
+    parts = [label]
+    if pk is not None:
+        parts.append(str(pk))
+    for name, value in sorted(scope.items()):
+        parts += [name, str(value)]
+    return ":".join(parts)
+
+
+def invalidate(*tags: str) -> None:
+    keys = [TAG_KEY.format(tag=t) for t in tags]
+
+    def bump():
+        version = time.time_ns()
+        cache.set_many({k: version for k in keys}, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def _versions(tags):
+    keys = [TAG_KEY.format(tag=t) for t in tags]
+    versions = cache.get_many(keys)
+    missing = [k for k in keys if k not in versions]
+    if missing:
+        # evicted or never written: start a version so later writes can change it
+        now = time.time_ns()
+        for k in missing:
+            cache.add(k, now, None)
+        versions.update(cache.get_many(missing))
+    return tuple(versions.get(k) for k in keys)
+
+
+def _entry_key(view, request) -> str:
+    path = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+    user = request.user.pk if request.user.is_authenticated else "anon"
+    return ENTRY_KEY.format(view=f"{type(view).__module__}.{type(view).__qualname__}", user=user, path=path)
+
+
+def cached_response(get_tags):
+    """Cache a DRF view method's 200 responses under get_tags(view, request, *args, **kwargs)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            if not getattr(settings, "RESPONSE_CACHE_ENABLED", False) or request.method not in ("GET", "HEAD"):
+                return func(view, request, *args, **kwargs)
+
+            key = _entry_key(view, request)
+            versions = _versions(get_tags(view, request, *args, **kwargs))
+            entry = cache.get(key)
+            if entry is not None and entry["versions"] == versions:
+                headers = entry["headers"]
+                not_modified = get_conditional_response(request, etag=headers.get("ETag"))
+                if not_modified is not None:
+                    for name, value in headers.items():
+                        not_modified[name] = value
+                    return not_modified
+                return Response(entry["data"], status=entry["status"], headers=headers)
+
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response):
+                cache.set(key, {
+                    "versions": versions,
+                    "data": response.data,
+                    "status": response.status_code,
+                    "headers": {h: response[h] for h in KEPT_HEADERS if response.has_header(h)},
+                }, getattr(settings, "RESPONSE_CACHE_TTL", 300))
+            return response
+        return wrapper
+    return decorator
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if getattr(settings, "RESPONSE_CACHE_ENABLED", False) and backend.endswith("LocMemCache"):
+        return [checks.Warning(
+            "RESPONSE_CACHE_ENABLED is on but the default cache is local memory; "
+            "other processes will serve responses that are stale after a write.",
+            hint="Configure a shared cache backend (Redis/Memcached) or set RESPONSE_CACHE_ENABLED=0.",
+            id="crops.W001",
+        )]
+    return []
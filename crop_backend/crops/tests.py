@@ -1,3 +1,176 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .models import Crop
+from .renderers import FastJSONParser, FastJSONRenderer
+from .response_cache import check_shared_cache
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)  # measures the uncached path
+class CropListQueryCountTests(TestCase):
+    def test_list_query_count_is_flat(self):
+        client = APIClient()
+        counts = []
+        for n in (2, 20):
+            Crop.objects.bulk_create(
+                Crop(name=f"Crop {n}-{i}", spacing="30 cm", harvest_time="60 days", growth_stages="Seedling|Vegetative")
+                for i in range(n)
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(client.get("/api/crops/").status_code, 200)
+            counts.append(len(ctx))
+        # the ETag aggregate, then the page itself
+        self.assertEqual(counts, [2, 2])
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)  # measures the uncached path
+class ConditionalCropTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.crop = Crop.objects.create(name="Kale", spacing="40 cm", harvest_time="55 days")
+
+    def test_list_revalidates_until_a_crop_changes(self):
+        etag = self.client.get("/api/crops/")["ETag"]
+        with self.assertNumQueries(1):
+            r = self.client.get("/api/crops/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        self.crop.spacing = "45 cm"
+        self.crop.save()
+        self.assertEqual(self.client.get("/api/crops/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_sees_writes_from_other_processes(self):
+        etag = self.client.get("/api/crops/")["ETag"]
+        # as if another worker saved: no signal reaches this process
+        Crop.objects.filter(pk=self.crop.pk).update(spacing="45 cm", updated_at=datetime.now(timezone.utc))
+        self.assertEqual(self.client.get("/api/crops/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_match_prevents_lost_update(self):
+        url = f"/api/crops/{self.crop.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        r = self.client.patch(url, {"spacing": "50 cm"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+        r = self.client.patch(url, {"spacing": "60 cm"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(r.status_code, 412)
+        self.crop.refresh_from_db()
+        self.assertEqual(self.crop.spacing, "50 cm")
+
+    def test_malformed_pk_is_not_found(self):
+        self.assertEqual(self.client.get("/api/crops/abc/").status_code, 404)
+        self.assertEqual(self.client.patch("/api/crops/abc/", {"spacing": "1 m"}, format="json").status_code, 404)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)  # off by default without a shared cache
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.crop = Crop.objects.create(name="Kale", spacing="40 cm", harvest_time="55 days")
+
+    def test_hits_until_a_crop_changes(self):
+        first = self.client.get("/api/crops/")
+        with self.assertNumQueries(0):
+            r = self.client.get("/api/crops/")
+        self.assertEqual(r.json(), first.json())
+        self.assertEqual(r["ETag"], first["ETag"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/crops/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self.crop.name = "Curly kale"
+        self.crop.save()
+        r = self.client.get("/api/crops/")
+        self.assertEqual(r.json()[0]["name"], "Curly kale")
+        self.assertNotEqual(r["ETag"], first["ETag"])
+
+    def test_detail_is_tagged_per_crop(self):
+        other = Crop.objects.create(name="Leek", spacing="15 cm", harvest_time="120 days")
+        self.client.get(f"/api/crops/{self.crop.id}/")
+        other.delete()
+        with self.assertNumQueries(0):
+            self.client.get(f"/api/crops/{self.crop.id}/")
+        pk = self.crop.pk
+        self.crop.delete()
+        self.assertEqual(self.client.get(f"/api/crops/{pk}/").status_code, 404)
+
+    def test_warns_about_a_local_memory_cache(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        shared = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([w.id for w in check_shared_cache(None)], ["crops.W001"])
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(CACHES=locmem, RESPONSE_CACHE_ENABLED=False):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class FastJSONTests(TestCase):
+    def test_output_matches_drf_renderer(self):
+        data = {
+            "when": datetime(2025, 3, 1, 8, 30, 15, 123456, tzinfo=timezone.utc),
+            "amount": Decimal("1.50"),
+            "label": gettext_lazy("Crop"),
+            "nested": [{"coords": [[153.0, -27.5]] * 3}, None, True],
+            1: "non-string key",
+            "sep": "a\u2028b",
+        }
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertIn(b"\\u2028", FastJSONRenderer().render(data))
+
+    def test_parser(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO(b'{"a": [1, 2.5]}')), {"a": [1, 2.5]})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b"{not json"))
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.root.name, "crop_images"))
+        with open(os.path.join(self.root.name, "crop_images", "kale.png"), "wb") as f:
+            f.write(bytes(range(256)) * 4)
+
+    def test_full_range_and_conditional(self):
+        r = self.client.get("/media/crop_images/kale.png")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(b"".join(r.streaming_content), bytes(range(256)) * 4)
+        etag = r["ETag"]
+
+        r = self.client.get("/media/crop_images/kale.png", HTTP_RANGE="bytes=10-19")
+        self.assertEqual(r.status_code, 206)
+        self.assertEqual(r["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(b"".join(r.streaming_content), bytes(range(10, 20)))
+
+        r = self.client.get("/media/crop_images/kale.png", HTTP_RANGE="bytes=-4")
+        self.assertEqual(b"".join(r.streaming_content), bytes(range(252, 256)))
+        self.assertEqual(self.client.get("/media/crop_images/kale.png", HTTP_RANGE="bytes=2000-").status_code, 416)
+        self.assertEqual(self.client.get("/media/crop_images/kale.png", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_missing_and_traversal(self):
+        self.assertEqual(self.client.get("/media/crop_images/nope.png").status_code, 404)
+        self.assertEqual(self.client.get("/media/../settings.py").status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT="nginx", MEDIA_ACCEL_PREFIX="/protected-media/")
+    def test_accel_redirect(self):
+        r = self.client.get("/media/crop_images/kale.png")
+        self.assertEqual(r["X-Accel-Redirect"], "/protected-media/crop_images/kale.png")
+        self.assertEqual(r.content, b"")
 
-# Create your tests here.
@@ -0,0 +1,80 @@
+# crop_backend/crops/units.py
+"""
+Parsing helpers for the free-text measurement columns on Crop,
+e.g. spacing="45 cm" or harvest_time="60–85 days".
+"""
+import re
+from typing import List, Optional, Tuple
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_RANGE = re.compile(_NUMBER + r"\s*(?:[-–—]|to)\s*" + _NUMBER)
+_SINGLE = re.compile(_NUMBER)
+
+_LENGTH_UNITS = {
+    "mm": 0.001,
+    "cm": 0.01,
+    "m": 1.0,
+    "in": 0.0254,
+    "ft": 0.3048,
+}
+
+_DAY_UNITS = {
+    "day": 1,
+    "week": 7,
+    "month": 30,
+    "year": 365,
+}
+
+
+def _numbers(text: str) -> Optional[Tuple[float, float]]:
+    m = _RANGE.search(text)
+    if m:
+        return float(m.group(1)), float(m.group(2))
+    m = _SINGLE.search(text)
+    if m:
+        return float(m.group(1)), float(m.group(1))
+    return None
+
+
+def parse_spacing_m(value) -> Optional[float]:
+    """
+    "45 cm" -> 0.45, "1.5 m" -> 1.5, "30-45 cm" -> 0.375 (midpoint).
+    Bare numbers are read as centimetres, which is what the catalog uses.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = str(value)
+    text = value.strip().lower()
+    nums = _numbers(text)
+    if not nums:
+        return None
+    unit = re.search(r"(mm|cm|in|ft|m)\b", text)
+    factor = _LENGTH_UNITS[unit.group(1)] if unit else _LENGTH_UNITS["cm"]
+    spacing = (nums[0] + nums[1]) / 2 * factor
+    return spacing if spacing > 0 else None
+
+
+def parse_days_range(value) -> Optional[Tuple[int, int]]:
+    """
+    "60–85 days" -> (60, 85), "90 days" -> (90, 90), "2–3 years" -> (730, 1095).
+    Seasonal values such as "Winter" have no duration and return None.
+    """
+    if not value:
+        return None
+    text = str(value).strip().lower()
+    nums = _numbers(text)
+    if not nums:
+        return None
+    unit = re.search(r"(day|week|month|year)", text)
+    factor = _DAY_UNITS[unit.group(1)] if unit else 1
+    return int(round(nums[0] * factor)), int(round(nums[1] * factor))
+
+
+def parse_stages(value) -> List[str]:
+    """["A", "B"] or "A, B" / "A|B" -> ["A", "B"]."""
+    if isinstance(value, list):
+        return [str(s).strip() for s in value if str(s).strip()]
+    if isinstance(value, str):
+        return [s.strip() for s in re.split(r"[,\|]", value) if s.strip()]
+    return []
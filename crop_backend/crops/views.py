@@ -1,7 +1,56 @@
+from django.db import transaction
 from rest_framework import viewsets
+
+from .conditional import collection_validators, object_validators, precondition, set_validators
 from .models import Crop
+from .response_cache import cached_response, tag
 from .serializers import CropSerializer
 
+
 class CropViewSet(viewsets.ModelViewSet):
+    """
+    Reads answer If-None-Match with 304; PUT/PATCH honour If-Match. ETags
+    come from updated_at (plus the row count for the list), read from the
+    database, so a write made through any process changes them.
+    """
     queryset = Crop.objects.all()
     serializer_class = CropSerializer
+
+    def object_validators(self, pk, lock=False):
+        try:
+            qs = Crop.objects.filter(pk=pk)
+            if lock:
+                qs = qs.select_for_update()  # until the caller's transaction ends
+            updated_at = qs.values_list("updated_at", flat=True).first()
+        except (TypeError, ValueError):
+            return None  # malformed pk: the caller's get_object() answers 404
+        return object_validators(pk, updated_at) if updated_at else None
+
+    @cached_response(lambda view, request, *args, **kwargs: [tag("crops.crop")])
+    def list(self, request, *args, **kwargs):
+        validators = collection_validators(Crop.objects.all())
+        return precondition(request, validators) or set_validators(
+            super().list(request, *args, **kwargs), validators, public=True
+        )
+
+    @cached_response(lambda view, request, *args, **kwargs: [tag("crops.crop", kwargs["pk"])])
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.object_validators(kwargs["pk"])
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)  # 404
+        return precondition(request, validators) or set_validators(
+            super().retrieve(request, *args, **kwargs), validators, public=True
+        )
+
+    def update(self, request, *args, **kwargs):
+        # locked from the If-Match check to the save
+        with transaction.atomic():
+            validators = self.object_validators(kwargs["pk"], lock=True)
+            if validators is not None:
+                failed = precondition(request, validators)
+                if failed is not None:
+                    return failed
+            response = super().update(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, self.object_validators(kwargs["pk"]), public=True)
+        return response
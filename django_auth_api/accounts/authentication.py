@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .blacklist import blacklist_filter
+from .models import blacklist_cache_key, user_cache_key
+from .tokens import REFRESH_JTI_CLAIM
+
+
+def cache_ttl() -> int:
+    return getattr(settings, "AUTH_USER_CACHE_TTL", 60)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps resolved users in the cache for a short TTL
+    instead of loading the user row on every request.
+
+    Entries are dropped when the user is saved or deleted (password change,
+    deactivation, profile edits), so with a shared cache there is no
+    staleness; with a per-process cache other workers catch up within the TTL.
+    Access tokens minted by accounts.tokens.RefreshToken are rejected once
+    their refresh token is blacklisted, with the same caching.
+    """
+
+    def get_user(self, validated_token):
+        self.check_refresh_not_blacklisted(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, cache_ttl())
+            return user
+
+        # Same checks the parent applies to a freshly loaded user.
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
+
+    def check_refresh_not_blacklisted(self, validated_token):
+        jti = validated_token.get(REFRESH_JTI_CLAIM)
+        if not jti or not blacklist_filter.might_contain(jti):
+            return
+        key = blacklist_cache_key(jti)
+        blacklisted = cache.get(key)
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            cache.set(key, blacklisted, cache_ttl())
+        if blacklisted:
+            raise AuthenticationFailed(_("Token is blacklisted"), code="token_not_valid")
@@ -0,0 +1,129 @@
+"""
+In-process Bloom filter over blacklisted refresh-token JTIs.
+
+Most tokens presented to the refresh endpoint (and, through the rjti claim,
+to every authenticated request) are not blacklisted. A Bloom filter answers
+"definitely not blacklisted" without touching the database; only a possible
+hit falls through to the usual BlacklistedToken lookup, so a false positive
+costs one query and there are no false negatives.
+
+Each process keeps its own filter and tops it up with any BlacklistedToken
+rows newer than the last one it has seen. It does so when the shared version
+key changes (immediately, with a shared cache backend) or at least every
+JWT_BLACKLIST_FILTER_MAX_AGE seconds. `prune_tokens` bumps the generation key
+so filters are rebuilt without the pruned JTIs.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+VERSION_KEY = "accounts:blacklist:version"
+GENERATION_KEY = "accounts:blacklist:generation"
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 100_000
+ID_OVERLAP = 100
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float = FALSE_POSITIVE_RATE):
+        self.size = max(8, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.capacity = capacity
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._generation = None
+        self._version = None
+        self._max_id = 0
+        self._synced_at = 0.0
+
+    def _rebuild(self):
+        # Seed the version so other processes don't also treat it as missing.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        live = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        capacity = max(MIN_CAPACITY, 2 * live.count())
+        self._filter = BloomFilter(capacity)
+        self._max_id = 0
+        self._load(live)
+
+    def _load(self, qs):
+        # Re-read a few ids below the high-water mark: ids can commit out of
+        # order, and adding a JTI twice is harmless.
+        since = self._max_id - ID_OVERLAP
+        for pk, jti in qs.filter(id__gt=since).order_by("id").values_list("id", "token__jti").iterator():
+            self._filter.add(jti)
+            self._max_id = max(self._max_id, pk)
+
+    def _sync(self):
+        max_age = getattr(settings, "JWT_BLACKLIST_FILTER_MAX_AGE", 5)
+        keys = cache.get_many([GENERATION_KEY, VERSION_KEY])
+        generation, version = keys.get(GENERATION_KEY), keys.get(VERSION_KEY)
+        fresh = (
+            self._filter is not None
+            and generation == self._generation
+            and version == self._version
+            and time.monotonic() - self._synced_at < max_age
+        )
+        if fresh:
+            return
+        with self._lock:
+            # A missing version means the cache was cleared or evicted; we can't
+            # tell what was missed, so start over.
+            if self._filter is None or version is None or generation != self._generation:
+                self._rebuild()
+            else:
+                self._load(BlacklistedToken.objects.all())
+                if self._filter.count > self._filter.capacity:
+                    self._rebuild()
+            self._generation, self._version = generation, cache.get(VERSION_KEY)
+            self._synced_at = time.monotonic()
+
+    def add(self, jti: str) -> None:
+        """Record a JTI blacklisted by this process without waiting for a sync."""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def might_contain(self, jti: str) -> bool:
+        if not getattr(settings, "JWT_BLACKLIST_FILTER", True):
+            return True
+        self._sync()
+        return jti in self._filter
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def bump_version() -> None:
+    """Tell every process's filter that new JTIs were blacklisted."""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def bump_generation() -> None:
+    """Tell every process's filter to rebuild from scratch (after pruning)."""
+    cache.set(GENERATION_KEY, time.time_ns(), None)
@@ -0,0 +1,79 @@
+"""
+Aggregated dashboard payload: everything the home screen needs in one
+response, built from a handful of aggregate queries and cached per user.
+
+Writes to Event, Plot and DashboardPreference drop the cached entry (see the
+receivers in accounts.models and plots.signals). The entry also expires when
+the first upcoming event it lists ends, so "upcoming" never goes stale.
+"""
+import json
+from datetime import datetime
+from typing import Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from crops.conditional import make_etag
+from crops.models import Crop
+from plots.models import Plot
+
+from .models import DashboardPreference, Event, dashboard_summary_cache_key
+from .serializers import DashboardPreferenceSerializer, EventSerializer
+
+# Upcoming events are cached up to this many; the view slices to ?events=.
+MAX_EVENTS = 20
+
+
+def _counts(qs, field) -> dict:
+    return {row[field]: row["n"] for row in qs.values(field).annotate(n=Count("id")).order_by(field)}
+
+
+def build_dashboard_summary(user) -> dict:
+    now = timezone.now()
+    pref = DashboardPreference.objects.filter(user=user).first() or DashboardPreference(user=user)
+    upcoming = Event.objects.filter(user=user, end_dt__gt=now).order_by("start_dt")[:MAX_EVENTS]
+    plots = Plot.objects.filter(owner=user)
+    by_stage = _counts(plots, "growth_stage")
+    crops = (
+        Crop.objects.filter(plots__owner=user)
+        .annotate(plot_count=Count("plots"))
+        .values("id", "name", "image", "plot_count")
+        .order_by("name")
+    )
+    return {
+        "preferences": DashboardPreferenceSerializer(pref).data,
+        "upcoming_events": EventSerializer(upcoming, many=True).data,
+        "plots": {"total": sum(by_stage.values()), "by_growth_stage": by_stage},
+        "tasks": _counts(Event.objects.filter(user=user), "status"),
+        "crops": [
+            {
+                "id": c["id"],
+                "name": c["name"],
+                "image": settings.MEDIA_URL + c["image"] if c["image"] else None,
+                "plots": c["plot_count"],
+            }
+            for c in crops
+        ],
+    }
+
+
+def _timeout(summary: dict) -> int:
+    ttl = getattr(settings, "DASHBOARD_SUMMARY_TTL", 300)
+    events = summary["upcoming_events"]
+    if events:
+        first_end = min(datetime.fromisoformat(e["end_dt"].replace("Z", "+00:00")) for e in events)
+        ttl = min(ttl, max(1, int((first_end - timezone.now()).total_seconds()) + 1))
+    return ttl
+
+
+def get_dashboard_summary(user) -> Tuple[dict, str]:
+    """(summary, ETag). The ETag hashes the payload once, when it is built."""
+    key = dashboard_summary_cache_key(user.pk)
+    cached = cache.get(key)
+    if cached is None:
+        summary = build_dashboard_summary(user)
+        cached = (summary, make_etag(user.pk, json.dumps(summary, sort_keys=True, default=str)))
+        cache.set(key, cached, _timeout(summary))
+    return cached
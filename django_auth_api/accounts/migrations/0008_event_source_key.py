@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_event_completed_event_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='source_key',
+            field=models.CharField(blank=True, default='', max_length=80),
+        ),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(condition=models.Q(('source_key', ''), _negated=True), fields=('user', 'source_key'), name='unique_event_source_key'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index token_blacklist_outstandingtoken(expires_at) for prune_tokens and
+    the blacklist filter's rebuild query. The table belongs to simplejwt, so
+    the index is added with raw SQL rather than a model Meta.
+    """
+
+    dependencies = [
+        ("accounts", "0008_event_source_key"),
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS token_outstanding_expires_idx "
+            "ON token_blacklist_outstandingtoken (expires_at);",
+            reverse_sql="DROP INDEX IF EXISTS token_outstanding_expires_idx;",
+        ),
+    ]
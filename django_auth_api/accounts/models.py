@@ -1,9 +1,12 @@
 from django.contrib.auth.models import AbstractUser, UserManager
-from django.db import models
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 
+from crops.response_cache import invalidate, tag
+
 
 class CustomUserManager(UserManager):
     """Authenticate with email; username is optional."""
@@ -66,6 +69,55 @@ def create_dashboard_pref(sender, instance, created, **kwargs):
         DashboardPreference.objects.get_or_create(user=instance, defaults={"widgets": []})
 
 
+# ----------------------
+# Dashboard summary cache (see accounts.dashboard)
+# ----------------------
+def dashboard_summary_cache_key(user_id) -> str:
+    return f"accounts:dashboard:{user_id}"
+
+
+def invalidate_dashboard_summary(user_id) -> None:
+    # Drop now and again after commit, so a read racing the open transaction
+    # can't re-cache the old rows for the full TTL.
+    key = dashboard_summary_cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+@receiver(post_save, sender=DashboardPreference)
+@receiver(post_delete, sender=DashboardPreference)
+def dashboard_pref_changed(sender, instance, **kwargs):
+    invalidate_dashboard_summary(instance.user_id)
+    invalidate(tag("accounts.dashboardpreference", user=instance.user_id))
+
+
+# ----------------------
+# Auth cache (see accounts.authentication)
+# ----------------------
+def user_cache_key(user_id) -> str:
+    return f"accounts:user:{user_id}"
+
+
+def blacklist_cache_key(jti) -> str:
+    return f"accounts:blacklisted:{jti}"
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def drop_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(post_save, sender="token_blacklist.BlacklistedToken")
+def cache_blacklisted_token(sender, instance, created, **kwargs):
+    from .blacklist import blacklist_filter, bump_version
+
+    if created:
+        cache.set(blacklist_cache_key(instance.token.jti), True, getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+        blacklist_filter.add(instance.token.jti)
+        transaction.on_commit(bump_version)
+
+
 # ----------------------
 # Calendar / Events
 # ----------------------
@@ -92,6 +144,10 @@ class Event(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="not_started")
     completed = models.BooleanField(default=False)
 
+    # Set on events generated from other records (e.g. "plot:12:harvest"),
+    # so regeneration can find and update them instead of duplicating.
+    source_key = models.CharField(max_length=80, blank=True, default="")
+
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -100,6 +156,20 @@ class Event(models.Model):
             models.Index(fields=["user", "start_dt"]),
             models.Index(fields=["user", "end_dt"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "source_key"],
+                condition=~models.Q(source_key=""),
+                name="unique_event_source_key",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Event<{self.title} @ {self.start_dt.isoformat()}>"
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed(sender, instance, **kwargs):
+    invalidate_dashboard_summary(instance.user_id)
+    invalidate(tag("accounts.event", user=instance.user_id))
@@ -1,7 +1,12 @@
 from djoser.serializers import UserCreateSerializer as DjoserUserCreateSerializer
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
 
 from .models import CustomUser, DashboardPreference, Event
+from .tokens import RefreshToken
 
 
 # -----------------
@@ -20,6 +25,17 @@ class CustomUserSerializer(serializers.ModelSerializer):
         fields = ("id", "email", "username")
 
 
+# -----------------
+# JWT
+# -----------------
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    token_class = RefreshToken
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = RefreshToken
+
+
 # -----------------
 # Dashboard
 # -----------------
@@ -1,8 +1,9 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import CustomUser
+from .models import CustomUser, Event
 
 
 class AccountsFlowTests(TestCase):
@@ -25,3 +26,259 @@ class AccountsFlowTests(TestCase):
         }, format="json")
         self.assertEqual(r.status_code, status.HTTP_200_OK)
         self.assertIn("access", r.data)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(email="cached@example.com", password="Str0ng-pass!")
+        r = self.client.post("/api/auth/jwt/create/", {
+            "email": "cached@example.com",
+            "password": "Str0ng-pass!",
+        }, format="json")
+        self.refresh = r.data["refresh"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {r.data['access']}")
+
+    def test_user_is_served_from_cache(self):
+        self.assertEqual(self.client.get("/api/profile/").status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/profile/").status_code, 200)
+
+    def test_deactivation_invalidates_cache(self):
+        self.client.get("/api/profile/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/profile/").status_code, 401)
+
+    def test_blacklisted_refresh_revokes_access_token(self):
+        self.client.get("/api/profile/")
+        r = self.client.post("/api/auth/jwt/blacklist/", {"refresh": self.refresh}, format="json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self.client.get("/api/profile/").status_code, 401)
+
+
+class TokenBlacklistFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        CustomUser.objects.create_user(email="bloom@example.com", password="Str0ng-pass!")
+
+    def obtain(self):
+        r = self.client.post("/api/auth/jwt/create/", {
+            "email": "bloom@example.com",
+            "password": "Str0ng-pass!",
+        }, format="json")
+        return r.data["refresh"]
+
+    def test_unknown_jti_skips_blacklist_query(self):
+        from .blacklist import blacklist_filter
+
+        blacklist_filter.might_contain("warm-up")
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist_filter.might_contain("not-a-blacklisted-jti"))
+
+    def test_blacklisted_refresh_is_rejected(self):
+        refresh = self.obtain()
+        r = self.client.post("/api/auth/jwt/blacklist/", {"refresh": refresh}, format="json")
+        self.assertEqual(r.status_code, 200)
+        r = self.client.post("/api/auth/jwt/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(r.status_code, 401)
+
+    def test_prune_tokens_deletes_expired_rows(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from django.utils import timezone
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+        expired, live = self.obtain(), self.obtain()
+        self.client.post("/api/auth/jwt/blacklist/", {"refresh": expired}, format="json")
+        OutstandingToken.objects.filter(token=expired).update(expires_at=timezone.now())
+        call_command("prune_tokens", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(list(OutstandingToken.objects.values_list("token", flat=True)), [live])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        from plots.models import Plot
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(email="dash@example.com", password="Str0ng-pass!")
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        for i, status_ in enumerate(["not_started", "not_started", "completed"]):
+            Event.objects.create(
+                user=self.user, title=f"E{i}", status=status_,
+                start_dt=now + timedelta(days=i), end_dt=now + timedelta(days=i, hours=1),
+            )
+        for stage in ["seedling", "seedling", "flowering"]:
+            Plot.objects.create(owner=self.user, type="point", name=stage, growth_stage=stage,
+                                geometry={"type": "Point", "coordinates": [0, 0]})
+
+    def test_summary_aggregates(self):
+        r = self.client.get("/api/dashboard/summary/?events=2")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([e["title"] for e in r.data["upcoming_events"]], ["E0", "E1"])
+        self.assertEqual(r.data["tasks"], {"completed": 1, "not_started": 2})
+        self.assertEqual(r.data["plots"], {"total": 3, "by_growth_stage": {"flowering": 1, "seedling": 2}})
+        self.assertIn("widgets", r.data["preferences"])
+
+    def test_summary_is_cached_until_a_write(self):
+        self.client.get("/api/dashboard/summary/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/dashboard/summary/")
+        Event.objects.filter(title="E0").first().delete()
+        r = self.client.get("/api/dashboard/summary/")
+        self.assertEqual(r.data["tasks"]["not_started"], 1)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)  # measures the uncached path
+class EventAndDashboardQueryCountTests(TestCase):
+    """Query counts must not grow with the number of events or plots."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email="queries@example.com", password="Str0ng-pass!")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def seed(self, n):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        from crops.models import Crop
+        from plots.models import Plot
+
+        now = timezone.now()
+        Event.objects.bulk_create(
+            Event(user=self.user, title=f"E{i}", start_dt=now + timedelta(hours=i),
+                  end_dt=now + timedelta(hours=i + 1))
+            for i in range(n)
+        )
+        crop = Crop.objects.create(name=f"Crop {n}", spacing="30 cm", harvest_time="60 days")
+        for i in range(n):
+            Plot.objects.create(owner=self.user, type="point", name=f"P{i}", crop=crop,
+                                growth_stage="seedling", geometry={"type": "Point", "coordinates": [0, 0]})
+        cache.clear()
+        return Event.objects.filter(user=self.user).first()
+
+    def count(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        return len(ctx)
+
+    def assertFlat(self, url, budget):
+        self.seed(2)
+        small = self.count(url)
+        self.seed(20)
+        large = self.count(url)
+        self.assertEqual(small, large, f"{url} grows with fixture size ({small} -> {large})")
+        self.assertLessEqual(large, budget)
+
+    def test_event_list(self):
+        # the ETag aggregate, then the events
+        self.assertFlat("/api/events/", 2)
+
+    def test_event_detail(self):
+        event = self.seed(5)
+        self.assertEqual(self.count(f"/api/events/{event.id}/"), 1)
+
+    def test_dashboard(self):
+        self.assertFlat("/api/dashboard/", 1)
+
+    def test_dashboard_summary(self):
+        self.assertFlat("/api/dashboard/summary/", 5)
+        self.assertEqual(self.count("/api/dashboard/summary/"), 0)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)  # measures the uncached path
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(email="etag@example.com", password="Str0ng-pass!")
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        self.event = Event.objects.create(user=self.user, title="Sow", start_dt=now, end_dt=now + timedelta(hours=1))
+
+    def test_event_list_revalidates(self):
+        etag = self.client.get("/api/events/")["ETag"]
+        with self.assertNumQueries(1):
+            r = self.client.get("/api/events/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        self.event.delete()
+        self.assertEqual(self.client.get("/api/events/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_event_if_match(self):
+        url = f"/api/events/{self.event.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        r = self.client.patch(url, {"title": "Sow peas"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        r = self.client.patch(url, {"title": "Sow beans"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(r.status_code, 412)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.title, "Sow peas")
+
+    def test_dashboard_summary_revalidates(self):
+        etag = self.client.get("/api/dashboard/summary/")["ETag"]
+        with self.assertNumQueries(0):
+            r = self.client.get("/api/dashboard/summary/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        # a different limit is a different body
+        self.assertEqual(self.client.get("/api/dashboard/summary/?events=0", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.event.delete()
+        self.assertEqual(self.client.get("/api/dashboard/summary/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)  # off by default without a shared cache
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(email="rc@example.com", password="Str0ng-pass!")
+        self.client.force_authenticate(self.user)
+
+    def test_event_list(self):
+        self.assertEqual(self.client.get("/api/events/").data, [])
+        with self.assertNumQueries(0):
+            self.client.get("/api/events/")
+        r = self.client.post("/api/events/", {"title": "Prune", "start_dt": "2030-01-01T09:00:00Z",
+                                               "end_dt": "2030-01-01T10:00:00Z"}, format="json")
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual([e["title"] for e in self.client.get("/api/events/").data], ["Prune"])
+
+    def test_generated_tasks_invalidate(self):
+        from datetime import date
+
+        from crops.models import Crop
+        from plots.models import Plot
+
+        self.client.get("/api/events/")
+        crop = Crop.objects.create(name="Pea", spacing="5 cm", harvest_time="60 days", growth_stages="Seedling|Harvest")
+        Plot.objects.create(owner=self.user, type="point", name="P", crop=crop, planted_at=date(2030, 1, 1),
+                            geometry={"type": "Point", "coordinates": [0, 0]})
+        self.assertTrue(self.client.get("/api/events/").data)
+
+    def test_dashboard_preferences(self):
+        self.client.get("/api/dashboard/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/dashboard/")
+        widgets = [{"name": "weather", "visible": True}]
+        self.assertEqual(self.client.patch("/api/dashboard/", {"widgets": widgets}, format="json").status_code, 200)
+        self.assertEqual(self.client.get("/api/dashboard/").data["widgets"], widgets)
@@ -0,0 +1,25 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from .blacklist import blacklist_filter
+
+# Claim on access tokens naming the refresh token they were minted from.
+REFRESH_JTI_CLAIM = "rjti"
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Access tokens minted from this refresh token carry its jti, so
+    blacklisting the refresh token (logout) also revokes them. Blacklist
+    checks skip the database when the Bloom filter rules the jti out.
+    """
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        access[REFRESH_JTI_CLAIM] = self.payload[api_settings.JTI_CLAIM]
+        return access
@@ -1,9 +1,14 @@
+from django.db import transaction
 from django.utils.dateparse import parse_datetime
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 
+from crops.conditional import collection_validators, make_etag, object_validators, precondition, set_validators
+from crops.response_cache import cached_response, tag
+
+from .dashboard import MAX_EVENTS, get_dashboard_summary
 from .models import DashboardPreference, CustomUser, Event
 from .serializers import (
     CustomUserSerializer,
@@ -42,9 +47,11 @@ class DashboardPreferenceView(APIView):
         obj, _ = DashboardPreference.objects.get_or_create(user=user)
         return obj
 
+    @cached_response(lambda view, request: [tag("accounts.dashboardpreference", user=request.user.pk)])
     def get(self, request):
-        pref = self.get_object(request.user)
-        return Response(DashboardPreferenceSerializer(pref).data)
+        # Reads don't write: an unsaved default serializes the same as a new row.
+        pref = DashboardPreference.objects.filter(user=request.user).first()
+        return Response(DashboardPreferenceSerializer(pref or DashboardPreference(user=request.user)).data)
 
     def post(self, request):
         pref = self.get_object(request.user)
@@ -66,6 +73,26 @@ class DashboardPreferenceView(APIView):
         return Response(ser.errors, status=400)
 
 
+class DashboardSummaryView(APIView):
+    """
+    GET /api/dashboard/summary/?events=5
+    Preferences, upcoming events, plot/task counts and crops in use.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("events", 5)), 0), MAX_EVENTS)
+        except ValueError:
+            return Response({"detail": "events must be an integer."}, status=400)
+        summary, etag = get_dashboard_summary(request.user)
+        # the body is cut to `limit` events, so the ETag depends on it too
+        validators = (make_etag(etag, limit), None)
+        return precondition(request, validators) or set_validators(
+            Response(dict(summary, upcoming_events=summary["upcoming_events"][:limit])), validators
+        )
+
+
 # -------- Events --------
 class EventListCreateView(APIView):
     """
@@ -74,6 +101,7 @@ class EventListCreateView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @cached_response(lambda view, request: [tag("accounts.event", user=request.user.pk)])
     def get(self, request):
         qs = Event.objects.filter(user=request.user)
 
@@ -89,7 +117,10 @@ class EventListCreateView(APIView):
         elif end_dt:
             qs = qs.filter(start_dt__lt=end_dt)
 
-        return Response(EventSerializer(qs.order_by("start_dt"), many=True).data)
+        validators = collection_validators(qs, request.user.pk)
+        return precondition(request, validators) or set_validators(
+            Response(EventSerializer(qs.order_by("start_dt"), many=True).data), validators
+        )
 
     def post(self, request):
         ser = EventCreateUpdateSerializer(data=request.data, context={"request": request})
@@ -105,34 +136,37 @@ class EventDetailView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
-    def get_object(self, request, pk):
-        return Event.objects.filter(user=request.user, pk=pk).first()
+    def get_object(self, request, pk, lock=False):
+        qs = Event.objects.filter(user=request.user, pk=pk)
+        return (qs.select_for_update() if lock else qs).first()
 
     def get(self, request, pk):
         obj = self.get_object(request, pk)
         if not obj:
             return Response({"detail": "Not found."}, status=404)
-        return Response(EventSerializer(obj).data)
-
-    def put(self, request, pk):
-        obj = self.get_object(request, pk)
+        validators = object_validators(obj.pk, obj.updated_at)
+        return precondition(request, validators) or set_validators(
+            Response(EventSerializer(obj).data), validators
+        )
+
+    @transaction.atomic
+    def put(self, request, pk, partial=False):
+        # locked until the save, so the If-Match check below can't go stale
+        obj = self.get_object(request, pk, lock=True)
         if not obj:
             return Response({"detail": "Not found."}, status=404)
-        ser = EventCreateUpdateSerializer(obj, data=request.data, context={"request": request})
+        # If-Match / If-Unmodified-Since: 412 rather than a lost update
+        failed = precondition(request, object_validators(obj.pk, obj.updated_at))
+        if failed is not None:
+            return failed
+        ser = EventCreateUpdateSerializer(obj, data=request.data, partial=partial, context={"request": request})
         if ser.is_valid():
             ser.save()
-            return Response(EventSerializer(obj).data)
+            return set_validators(Response(EventSerializer(obj).data), object_validators(obj.pk, obj.updated_at))
         return Response(ser.errors, status=400)
 
     def patch(self, request, pk):
-        obj = self.get_object(request, pk)
-        if not obj:
-            return Response({"detail": "Not found."}, status=404)
-        ser = EventCreateUpdateSerializer(obj, data=request.data, partial=True, context={"request": request})
-        if ser.is_valid():
-            ser.save()
-            return Response(EventSerializer(obj).data)
-        return Response(ser.errors, status=400)
+        return self.put(request, pk, partial=True)
 
     def delete(self, request, pk):
         obj = self.get_object(request, pk)
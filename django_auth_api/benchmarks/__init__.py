@@ -0,0 +1,19 @@
+"""
+CPU microbenchmarks for serializer/validator/normalization hot paths.
+
+    python -m benchmarks                       # run and print timings
+    python -m benchmarks --compare             # ... and report change against benchmarks/baseline.json
+    python -m benchmarks --save mybranch       # ... and store as benchmarks/results/mybranch.json
+    python -m benchmarks --compare mybranch    # ... against that stored run instead
+    python -m benchmarks -k plot               # only benchmarks whose name contains "plot"
+
+Benchmarks use unsaved model instances and never touch the database. Results
+are machine-specific, so compare runs from the same machine (e.g. main vs. a
+branch in the same CI job).
+
+benchmarks/baseline.json is committed as the reference for --compare; its
+"python"/"machine" fields say where it was measured. Refresh it on main with
+`python -m benchmarks --save` (which writes it) after an intended speed change
+or on a new reference machine, and commit it with that change. Other labels
+go to benchmarks/results/, which is not tracked.
+"""
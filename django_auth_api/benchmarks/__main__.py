@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+
+import django
+
+from benchmarks import __doc__ as USAGE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-k", dest="pattern", default="", help="Only run benchmarks whose name contains this.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per repeat (sets the loop count).")
+    parser.add_argument("--save", nargs="?", const="baseline", metavar="LABEL",
+                        help="Store results as benchmarks/results/LABEL.json; with no LABEL, "
+                             "refresh the committed benchmarks/baseline.json.")
+    parser.add_argument("--compare", nargs="?", const="baseline", metavar="LABEL",
+                        help="Compare against a stored run (default: the committed benchmarks/baseline.json).")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent slowdown reported as a regression (default 10).")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if anything regressed.")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+    from . import cases  # noqa: F401  (registers the benchmarks)
+    from .runner import REGISTRY, compare, load, run, save
+
+    names = [n for n in REGISTRY if args.pattern in n]
+    if not names:
+        parser.error(f"no benchmark matches {args.pattern!r}")
+    results = run(names, repeat=args.repeat, min_time=args.min_time)
+
+    if args.save:
+        print(f"\nsaved {save(results, args.save)}")
+    if args.compare:
+        regressions = compare(load(args.compare), results, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
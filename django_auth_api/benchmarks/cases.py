@@ -0,0 +1,169 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.test import RequestFactory
+
+from .runner import bench
+
+RNG = random.Random(0)
+
+
+def _request():
+    # any host the settings accept, so build_absolute_uri works
+    host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+    return RequestFactory().get("/api/plots/", HTTP_HOST=host)
+
+
+def _polygon(vertices: int):
+    ring = [
+        [153.0 + 0.001 * math.cos(2 * math.pi * i / vertices), -27.5 + 0.001 * math.sin(2 * math.pi * i / vertices)]
+        for i in range(vertices)
+    ]
+    return {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+
+
+@bench("plot_serializer.validate_large_polygon")
+def plot_validate():
+    from plots.serializers import PlotSerializer
+
+    data = {"type": "polygon", "name": "Paddock", "geometry": _polygon(5000)}
+
+    def run():
+        ser = PlotSerializer(data=data)
+        assert ser.is_valid(), ser.errors
+    return run
+
+
+@bench("plot_serializer.list_100_plots_3_images")
+def plot_list():
+    from plots.models import CropMedia, Plot
+    from plots.serializers import PlotSerializer
+
+    now = datetime.now(timezone.utc)
+    plots = []
+    for i in range(100):
+        plot = Plot(id=i + 1, owner_id=1, type="polygon", geometry=_polygon(12), name=f"Bed {i}",
+                    created_at=now, updated_at=now)
+        images = [CropMedia(id=i * 3 + j, plot=plot, image=f"plot_images/1/{i}/{j}.jpg", created_at=now)
+                  for j in range(3)]
+        plot._prefetched_objects_cache = {"images": images}
+        plots.append(plot)
+    context = {"request": _request()}
+    return lambda: PlotSerializer(plots, many=True, context=context).data
+
+
+@bench("event_serializer.many_1000")
+def event_many():
+    from accounts.models import Event
+    from accounts.serializers import EventSerializer
+
+    now = datetime.now(timezone.utc)
+    events = [
+        Event(id=i, user_id=1, title=f"Task {i}", notes="", start_dt=now + timedelta(hours=i),
+              end_dt=now + timedelta(hours=i + 1), updated_at=now)
+        for i in range(1000)
+    ]
+    return lambda: EventSerializer(events, many=True).data
+
+
+@bench("crops.crop_serializer.many_500")
+def crops_crop_many():
+    from crops.models import Crop
+    from crops.serializers import CropSerializer
+
+    crops = [
+        Crop(id=i, name=f"Crop {i}", spacing="45 cm", harvest_time="60-85 days",
+             growth_stages="Seedling|Vegetative|Flowering|Fruiting|Harvest", image=f"crop_images/{i}.png")
+        for i in range(500)
+    ]
+    context = {"request": _request()}
+    return lambda: CropSerializer(crops, many=True, context=context).data
+
+
+@bench("crop_app.crop_serializer.many_500")
+def crop_app_crop_many():
+    from crop_app.models import Crop
+    from crop_app.serializers import CropSerializer
+
+    crops = [
+        Crop(id=i, name=f"Crop {i}", spacing=0.45, harvest_time="60-85 days",
+             growth_stages=["Seedling", "Vegetative", "Flowering", "Harvest"], image=f"crops/{i}.png")
+        for i in range(500)
+    ]
+    context = {"request": _request()}
+    return lambda: CropSerializer(crops, many=True, context=context).data
+
+
+@bench("crops.growth_stages_field.roundtrip_1000")
+def growth_stages_field():
+    from crops.serializers import GrowthStagesField
+
+    field = GrowthStagesField()
+    strings = ["Seedling, Vegetative | Flowering|Fruiting , Harvest"] * 1000
+    lists = [["Seedling", "Vegetative", "Flowering", "Fruiting", "Harvest"]] * 1000
+
+    def run():
+        for s in strings:
+            field.to_representation(s)
+        for value in lists:
+            field.to_internal_value(value)
+    return run
+
+
+@bench("dashboard.validate_widgets_200")
+def validate_widgets():
+    from accounts.serializers import DashboardPreferenceUpdateSerializer
+
+    widgets = [{"name": f"widget-{i}", "visible": i % 2 == 0, "order": i} for i in range(200)]
+    ser = DashboardPreferenceUpdateSerializer()
+    return lambda: ser.validate_widgets(widgets)
+
+
+@bench("perenual.normalize_item_page_1000")
+def normalize_page():
+    from external_crops_perenual import _normalize_item
+
+    page = []
+    for i in range(1000):
+        item = {"id": i, "scientific_name": [f"Plantus {i}"], "other_name": [], "cycle": "Perennial"}
+        if RNG.random() < 0.8:
+            item["common_name"] = f"Plant {i}"
+        if RNG.random() < 0.7:
+            item["default_image"] = {"regular_url": f"https://img.example.com/{i}.jpg",
+                                     "thumbnail": f"https://img.example.com/{i}_t.jpg"}
+        page.append(item)
+    return lambda: [_normalize_item(item) for item in page]
+
+
+def _render_cases(name, build_data):
+    """Register stock vs. orjson rendering of the same payload."""
+    @bench(f"render.{name}.drf_json")
+    def drf():
+        from rest_framework.renderers import JSONRenderer
+
+        data, renderer = build_data(), JSONRenderer()
+        return lambda: renderer.render(data)
+
+    @bench(f"render.{name}.fast_json")
+    def fast():
+        from crops.renderers import FastJSONRenderer
+
+        data, renderer = build_data(), FastJSONRenderer()
+        return lambda: renderer.render(data)
+
+
+def _plots_payload():
+    return plot_list()()
+
+
+def _events_payload():
+    return event_many()()
+
+
+_render_cases("plots_100_x_400_vertices", lambda: [
+    dict(p, geometry=_polygon(400)) for p in _plots_payload()
+])
+_render_cases("events_1000", _events_payload)
+
@@ -0,0 +1,121 @@
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# The committed reference run (label "baseline"); other labels live in RESULTS_DIR.
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# name -> setup function returning the zero-argument callable to time
+REGISTRY: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def bench(name: str):
+    def register(setup):
+        REGISTRY[name] = setup
+        return setup
+    return register
+
+
+def _loops_for(fn, min_time: float) -> int:
+    """Smallest power-of-ten loop count whose run takes at least min_time."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= min_time or loops >= 1_000_000:
+            return loops
+        loops *= 10
+
+
+def measure(fn, repeat: int = 5, min_time: float = 0.2) -> dict:
+    fn()  # warm caches / lazy imports
+    loops = _loops_for(fn, min_time)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        per_call = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            per_call.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "loops": loops,
+        "min_us": min(per_call) * 1e6,
+        "median_us": statistics.median(per_call) * 1e6,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run(names: List[str], repeat: int, min_time: float, report=print) -> dict:
+    results = {}
+    for name in names:
+        results[name] = measure(REGISTRY[name](), repeat=repeat, min_time=min_time)
+        r = results[name]
+        report(f"{name:<44} {r['median_us']:>12.1f} us  (min {r['min_us']:.1f})  peak {r['peak_kib']:.1f} KiB")
+    return results
+
+
+def result_path(label: str) -> str:
+    if label.endswith(".json"):
+        return label
+    return BASELINE_PATH if label == "baseline" else os.path.join(RESULTS_DIR, f"{label}.json")
+
+
+def save(results: dict, label: str) -> str:
+    path = result_path(label)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }, f, indent=2, sort_keys=True)
+    return path
+
+
+def load(label: str) -> dict:
+    with open(result_path(label)) as f:
+        return json.load(f)["results"]
+
+
+def compare(baseline: dict, current: dict, threshold: float, report=print) -> List[str]:
+    """Print a comparison table; return the names that regressed past threshold (%)."""
+    regressions = []
+    report(f"\n{'benchmark':<44} {'baseline us':>12} {'current us':>12} {'change':>8} {'peak KiB':>16}")
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None:
+            report(f"{name:<44} {'-':>12} {cur['median_us']:>12.1f} {'new':>8}")
+            continue
+        change = (cur["median_us"] / base["median_us"] - 1) * 100
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        peak = f"{base['peak_kib']:.0f} -> {cur['peak_kib']:.0f}"
+        report(f"{name:<44} {base['median_us']:>12.1f} {cur['median_us']:>12.1f} {change:>+7.1f}% {peak:>16}{flag}")
+    return regressions
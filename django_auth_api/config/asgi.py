@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# /api/live/ (server-sent events) is served outside Django's request handling;
+# see live.asgi. Imported after Django is set up.
+from live.asgi import with_live_stream  # noqa: E402
+
+application = with_live_stream(django_application)
@@ -53,12 +53,19 @@ INSTALLED_APPS = [
     "plots",
     "crops",
     "crop_app",
+    "metrics",
+    "profiling",
+    "mediastore",
+    "live",
+    "offline",
 ]
 
 # -----------------------------------------------------------------------------
 # MIDDLEWARE
 # -----------------------------------------------------------------------------
 MIDDLEWARE = [
+    "metrics.middleware.MetricsMiddleware",
+    "profiling.middleware.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -142,6 +149,29 @@ USE_TZ = True
 STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Partial resumable uploads (plots.uploads). Must be shared by all workers and
+# must not be under MEDIA_ROOT, which is served.
+RESUMABLE_UPLOAD_DIR = os.environ.get("RESUMABLE_UPLOAD_DIR", os.path.join(BASE_DIR, "upload_tmp"))
+RESUMABLE_UPLOAD_MAX_BYTES = int(os.environ.get("RESUMABLE_UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Built offline bundles (offline app). Shared by all workers; not under MEDIA_ROOT.
+OFFLINE_BUNDLE_DIR = os.environ.get("OFFLINE_BUNDLE_DIR", os.path.join(BASE_DIR, "offline_bundles"))
+OFFLINE_BUNDLE_EVENT_DAYS = int(os.environ.get("OFFLINE_BUNDLE_EVENT_DAYS", "90"))
+# Vector tile zooms for the farm extent; deeper zooms are dropped past OFFLINE_TILE_MAX tiles.
+OFFLINE_TILE_MIN_ZOOM = int(os.environ.get("OFFLINE_TILE_MIN_ZOOM", "12"))
+OFFLINE_TILE_MAX_ZOOM = int(os.environ.get("OFFLINE_TILE_MAX_ZOOM", "18"))
+OFFLINE_TILE_MAX = int(os.environ.get("OFFLINE_TILE_MAX", "5000"))
+
+# Uploads are stored once per content hash (mediastore); gc_media removes unused blobs.
+STORAGES = {
+    "default": {"BACKEND": "mediastore.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+# Hand media bodies to the proxy: "nginx" (X-Accel-Redirect to an internal
+# location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT), "sendfile"
+# (X-Sendfile), or "" to serve from Django with sendfile/Range (crops.media).
+MEDIA_ACCEL_REDIRECT = os.environ.get("MEDIA_ACCEL_REDIRECT", "")
+MEDIA_ACCEL_PREFIX = os.environ.get("MEDIA_ACCEL_PREFIX", "/protected-media/")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # -----------------------------------------------------------------------------
@@ -149,7 +179,17 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # -----------------------------------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
+    ),
+    # orjson when installed, stock DRF JSON otherwise (see crops.renderers)
+    "DEFAULT_RENDERER_CLASSES": (
+        "crops.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "crops.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
 }
 
@@ -157,8 +197,55 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.TokenRefreshSerializer",
 }
 
+# Seconds an authenticated user (and a token's blacklist status) may be served
+# from the cache. Saves drop the entry immediately in the current process.
+AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", "60"))
+
+# Decimal places kept in ?geom=compact plot geometry (5 ≈ 1 m); ?precision= overrides.
+PLOT_GEOMETRY_PRECISION = int(os.environ.get("PLOT_GEOMETRY_PRECISION", "5"))
+
+# Upper bound (seconds) on caching a user's /api/dashboard/summary/ payload.
+DASHBOARD_SUMMARY_TTL = int(os.environ.get("DASHBOARD_SUMMARY_TTL", "300"))
+
+# Live change stream (live app, /api/live/; ASGI only). Set LIVE_REDIS_URL
+# (and pip install redis) so writes reach streams held by other workers.
+LIVE_REDIS_URL = os.environ.get("LIVE_REDIS_URL", "")
+LIVE_KEEPALIVE_SECONDS = int(os.environ.get("LIVE_KEEPALIVE_SECONDS", "25"))
+LIVE_MAX_CONNECTIONS = int(os.environ.get("LIVE_MAX_CONNECTIONS", "10000"))
+
+# Shared default cache. Set CACHE_REDIS_URL (and pip install redis) when running
+# more than one process; otherwise each process has its own local-memory cache.
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "")
+if CACHE_REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_REDIS_URL}}
+
+# Tag-invalidated API response cache (crops.response_cache). Other processes
+# would serve stale entries from a local-memory cache, so it is off unless the
+# cache is shared; `manage.py check` warns if it is enabled without one.
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "1" if CACHE_REDIS_URL else "0") == "1"
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+
+# /metrics (metrics app). Under gunicorn point METRICS_MULTIPROC_DIR at an
+# empty, writable directory shared by the workers; clear it on restart.
+# Set METRICS_TOKEN for Prometheus ("Authorization: Bearer <token>"); without
+# it /metrics is only served to staff with an admin session.
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR", "")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Slow-request profiler (profiling app); off unless PROFILING_ENABLED=1.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0.05"))
+PROFILING_THRESHOLD_MS = float(os.environ.get("PROFILING_THRESHOLD_MS", "500"))
+
+# In-process Bloom filter of blacklisted refresh-token JTIs (accounts.blacklist).
+# MAX_AGE bounds how long a process goes without checking for new entries.
+JWT_BLACKLIST_FILTER = os.environ.get("JWT_BLACKLIST_FILTER", "1") == "1"
+JWT_BLACKLIST_FILTER_MAX_AGE = float(os.environ.get("JWT_BLACKLIST_FILTER_MAX_AGE", "5"))
+
 # -----------------------------------------------------------------------------
 # DJOSER CONFIGURATION
 # -----------------------------------------------------------------------------
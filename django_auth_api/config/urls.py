@@ -2,16 +2,23 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from rest_framework_simplejwt.views import TokenBlacklistView
 
 from accounts.views import (
     UserProfileView,
     UserRegisterView,
     DashboardPreferenceView,
+    DashboardSummaryView,
     EventListCreateView,
     EventDetailView,
 )
 
+from crop_app.views import crop_snapshot
+from live.views import live_stream
+from metrics.views import metrics_view
+from offline.views import OfflineBundleView
+from plots.views import protected_media
+
 # ✅ import your Perenual proxy view
 from external_crops_perenual import external_crops_search
 
@@ -21,25 +28,37 @@ urlpatterns = [
     # --- Authentication ---
     path("api/auth/", include("djoser.urls")),
     path("api/auth/", include("djoser.urls.jwt")),
+    path("api/auth/jwt/blacklist/", TokenBlacklistView.as_view()),
 
     # --- User profile / dashboard ---
     path("api/profile/", UserProfileView.as_view()),
     path("api/register/", UserRegisterView.as_view()),
     path("api/dashboard/", DashboardPreferenceView.as_view()),
+    path("api/dashboard/summary/", DashboardSummaryView.as_view()),
 
     # --- Events ---
     path("api/events/", EventListCreateView.as_view()),
     path("api/events/<int:pk>/", EventDetailView.as_view()),
 
+    # --- Live change stream: served by live.asgi under ASGI; 501 otherwise ---
+    path("api/live/", live_stream),
+
+    # --- Offline farm bundle (gzipped SQLite + MBTiles) ---
+    path("api/offline-bundle/", OfflineBundleView.as_view()),
+
     # --- Plots + Crops (local DB) ---
     path("api/", include("plots.urls")),
+    # must precede crops.urls, whose router would read "snapshot" as a pk
+    path("api/crops/snapshot/", crop_snapshot),
     path("api/crops/", include("crops.urls")),
     path("api/", include("crop_app.urls")),
 
     # --- External proxy (🌱 Perenual global crops) ---
     path("api/external/crops/", external_crops_search),
-]
 
-# --- Static + media serving (dev only) ---
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # --- Media: owner-checked plot photos, Range/ETag or X-Accel-Redirect (plots.views) ---
+    path(settings.MEDIA_URL.lstrip("/") + "<path:path>", protected_media),
+
+    # --- Prometheus scrape endpoint ---
+    path("metrics", metrics_view),
+]
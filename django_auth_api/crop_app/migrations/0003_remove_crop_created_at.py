@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crop_app', '0002_alter_crop_growth_stages_alter_crop_harvest_time_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='crop',
+            name='created_at',
+        ),
+    ]
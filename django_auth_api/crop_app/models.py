@@ -8,6 +8,8 @@ class Crop(models.Model):
     harvest_time = models.CharField(max_length=100, blank=True)
     growth_stages = models.JSONField(blank=True, null=True)               # e.g. ["Seedling","Vegetative","Flowering","Harvest"]
     pest_notes = models.TextField(blank=True, null=True)
+    # lets the catalog snapshot check it is current with one aggregate
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from crops.response_cache import invalidate, tag
+
+from .models import Crop
+from .snapshot import invalidate_snapshot
+
+
+@receiver(post_save, sender=Crop)
+@receiver(post_delete, sender=Crop)
+def crop_catalog_changed(sender, instance, **kwargs):
+    invalidate_snapshot()
+    invalidate(tag("crop_app.crop"), tag("crop_app.crop", instance.pk))
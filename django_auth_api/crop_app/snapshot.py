@@ -0,0 +1,97 @@
+"""
+Prebuilt crop catalog snapshot for app cold start.
+
+The whole catalog is serialized once, hashed, and kept compressed in the cache.
+Each read checks it against one aggregate (row count and latest updated_at),
+so a write made by another process, whose cache this one can't see, is
+noticed on the next request. signals.py also drops it straight away in the
+writing process. Row hashes are kept per version, so a client holding an
+older version can ask for just the rows that changed.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Crop
+from .serializers import CropSerializer
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+CURRENT_KEY = "crop_app:snapshot:current"
+ROWS_KEY = "crop_app:snapshot:rows:{version}"
+# How long old row hashes stay around to answer ?since_version= diffs
+ROWS_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+def _rows() -> List[Dict[str, Any]]:
+    # No request in context -> imageUrl stays relative ("/media/crops/..."),
+    # which the app already resolves against its base URL.
+    return CropSerializer(Crop.objects.all().order_by("id"), many=True).data
+
+
+def _stamp() -> str:
+    agg = Crop.objects.aggregate(n=Count("id"), last=Max("updated_at"))
+    return f"{agg['n']}:{agg['last'].isoformat() if agg['last'] else ''}"
+
+
+def build_snapshot() -> Dict[str, Any]:
+    # read before the rows: a write in between leaves a stamp that is already stale
+    stamp = _stamp()
+    rows = _rows()
+    row_hashes = {str(r["id"]): hashlib.sha1(_dumps(r)).hexdigest()[:12] for r in rows}
+    version = hashlib.sha256(_dumps(row_hashes)).hexdigest()[:16]
+    body = _dumps({"version": version, "count": len(rows), "crops": rows})
+
+    snapshot = {
+        "stamp": stamp,
+        "version": version,
+        "rows": rows,
+        "row_hashes": row_hashes,
+        "body": body,
+        "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+        "br": brotli.compress(body) if brotli else None,
+    }
+    cache.set(ROWS_KEY.format(version=version), row_hashes, ROWS_TIMEOUT)
+    return snapshot
+
+
+def get_snapshot() -> Dict[str, Any]:
+    snapshot = cache.get(CURRENT_KEY)
+    if snapshot is None or snapshot.get("stamp") != _stamp():
+        snapshot = build_snapshot()
+        cache.set(CURRENT_KEY, snapshot, None)
+    return snapshot
+
+
+def invalidate_snapshot() -> None:
+    cache.delete(CURRENT_KEY)
+
+
+def diff_since(snapshot: Dict[str, Any], since_version: str) -> Optional[Dict[str, Any]]:
+    """
+    Rows changed/removed since `since_version`, or None if that version's
+    hashes are no longer known (the caller should then send the full snapshot).
+    """
+    old = cache.get(ROWS_KEY.format(version=since_version))
+    if old is None:
+        return None
+    new = snapshot["row_hashes"]
+    changed = [r for r in snapshot["rows"] if old.get(str(r["id"])) != new[str(r["id"])]]
+    removed = sorted(int(pk) for pk in old.keys() - new.keys())
+    return {
+        "version": snapshot["version"],
+        "since_version": since_version,
+        "changed": changed,
+        "removed": removed,
+    }
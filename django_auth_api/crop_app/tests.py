@@ -1,3 +1,84 @@
-from django.test import TestCase
+import gzip
+import json
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Crop
+
+
+class CropSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.tomato = Crop.objects.create(name="Tomato", spacing=0.45, harvest_time="Summer")
+        self.wheat = Crop.objects.create(name="Wheat", spacing=0.2, harvest_time="Spring")
+
+    def _full(self):
+        r = self.client.get("/api/crops/snapshot/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Content-Encoding"], "gzip")
+        return r, json.loads(gzip.decompress(r.content))
+
+    def test_snapshot_etag_and_304(self):
+        r, body = self._full()
+        self.assertEqual(body["count"], 2)
+        self.assertEqual(r["ETag"], f'"{body["version"]}-gzip"')
+
+        r = self.client.get("/api/crops/snapshot/", HTTP_IF_NONE_MATCH=r["ETag"], HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(r.status_code, 304)
+        # a different encoding is a different representation
+        r = self.client.get("/api/crops/snapshot/", HTTP_IF_NONE_MATCH=r["ETag"])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["ETag"], f'"{body["version"]}"')
+
+    def test_snapshot_notices_writes_from_other_processes(self):
+        _, before = self._full()
+        # as if another worker wrote: no signal reaches this process's cache
+        Crop.objects.filter(pk=self.tomato.pk).update(spacing=0.5, updated_at=timezone.now())
+        _, after = self._full()
+        self.assertNotEqual(before["version"], after["version"])
+
+    def test_snapshot_changes_with_catalog(self):
+        _, before = self._full()
+        self.tomato.spacing = 0.5
+        self.tomato.save()
+        _, after = self._full()
+        self.assertNotEqual(before["version"], after["version"])
+
+    def test_since_version_returns_diff(self):
+        _, before = self._full()
+        self.tomato.spacing = 0.5
+        self.tomato.save()
+        wheat_id = self.wheat.pk
+        self.wheat.delete()
+        Crop.objects.create(name="Kale", spacing=0.45)
+
+        r = self.client.get(f"/api/crops/snapshot/?since_version={before['version']}")
+        self.assertEqual(r.status_code, 200)
+        diff = r.json()
+        self.assertEqual(sorted(c["name"] for c in diff["changed"]), ["Kale", "Tomato"])
+        self.assertEqual(diff["removed"], [wheat_id])
+
+    def test_unknown_since_version_falls_back_to_full(self):
+        r = self.client.get("/api/crops/snapshot/?since_version=deadbeef")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(json.loads(r.content)["count"], 2)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)  # measures the uncached path
+class CropListQueryCountTests(TestCase):
+    def test_list_query_count_is_flat(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        client = APIClient()
+        counts = []
+        for n in (2, 20):
+            Crop.objects.bulk_create(Crop(name=f"Crop {n}-{i}") for i in range(n))
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(client.get("/api/api/crops/").status_code, 200)
+            counts.append(len(ctx))
+        self.assertEqual(counts, [1, 1])
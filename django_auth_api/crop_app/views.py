@@ -1,9 +1,70 @@
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets, parsers
+
+from crops.renderers import FastJSONParser
+from crops.response_cache import cached_response, tag
+
 from .models import Crop
 from .serializers import CropSerializer
+from .snapshot import diff_since, get_snapshot
+
 
 class CropViewSet(viewsets.ModelViewSet):
     queryset = Crop.objects.all().order_by("name")
     serializer_class = CropSerializer
     # Accepts JSON (no image) and multipart/form-data (with image)
-    parser_classes = [parsers.JSONParser, parsers.FormParser, parsers.MultiPartParser]
+    parser_classes = [FastJSONParser, parsers.FormParser, parsers.MultiPartParser]
+
+    @cached_response(lambda view, request, *args, **kwargs: [tag("crop_app.crop")])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response(lambda view, request, *args, **kwargs: [tag("crop_app.crop", kwargs["pk"])])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+@require_GET
+def crop_snapshot(request):
+    """
+    GET /api/crops/snapshot/                 -> whole catalog, precompressed
+    GET /api/crops/snapshot/?since_version=V -> only rows changed since V
+
+    The ETag is the catalog content hash, so unchanged catalogs revalidate to
+    304. Each encoding's bytes differ, so br and gzip bodies get their own
+    ETag ("<version>-br", "<version>-gzip").
+    """
+    snapshot = get_snapshot()
+
+    since = request.GET.get("since_version")
+    if since:
+        diff = diff_since(snapshot, since)
+        if diff is not None:
+            resp = JsonResponse(diff)
+            resp["ETag"] = f'"{snapshot["version"]}"'
+            return resp
+
+    accept = request.headers.get("Accept-Encoding", "")
+    if snapshot["br"] is not None and "br" in accept:
+        body, encoding = snapshot["br"], "br"
+    elif "gzip" in accept:
+        body, encoding = snapshot["gzip"], "gzip"
+    else:
+        body, encoding = snapshot["body"], None
+    etag = f'"{snapshot["version"]}-{encoding}"' if encoding else f'"{snapshot["version"]}"'
+
+    if etag in request.headers.get("If-None-Match", ""):
+        resp = HttpResponseNotModified()
+        resp["ETag"] = etag
+        patch_vary_headers(resp, ["Accept-Encoding"])
+        return resp
+
+    resp = HttpResponse(body, content_type="application/json")
+    if encoding:
+        resp["Content-Encoding"] = encoding
+    resp["ETag"] = etag
+    resp["Cache-Control"] = "public, max-age=0, must-revalidate"
+    patch_vary_headers(resp, ["Accept-Encoding"])
+    return resp
@@ -3,19 +3,24 @@ import os
 import logging
 from typing import Dict, Any, List, Optional
 
-import requests
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 from django.views.decorators.csrf import csrf_exempt
 
+from metrics.outbound import MeteredSession
+
 logger = logging.getLogger(__name__)
 
 # === Config ===
 PERENUAL_KEY = os.environ.get("PERENUAL_KEY", "").strip()
-BASE_URL = "https://perenual.com/api"
+# Overridable so load tests can point at a local stub (python -m loadtest.perenual_stub).
+BASE_URL = os.environ.get("PERENUAL_BASE_URL", "https://perenual.com/api").rstrip("/")
 SPECIES_LIST = f"{BASE_URL}/species-list"
 SPECIES_DETAILS = f"{BASE_URL}/species/details"  # + /{id}
 
+# Shared session: keeps upstream connections alive and records call timings.
+_session = MeteredSession()
+
 # A static final fallback so the app always shows *something*
 PLACEHOLDER_IMG = "https://via.placeholder.com/300x200?text=No+Image"
 
@@ -61,7 +66,7 @@ def _fetch_details_image(plant_id: Any, timeout: float = 8.0) -> Optional[str]:
     if not plant_id:
         return None
     try:
-        r = requests.get(
+        r = _session.get(
             f"{SPECIES_DETAILS}/{plant_id}",
             params={"key": PERENUAL_KEY},
             timeout=timeout,
@@ -103,7 +108,7 @@ def external_crops_search(request):
         params["q"] = q
 
     try:
-        resp = requests.get(SPECIES_LIST, params=params, timeout=12.0)
+        resp = _session.get(SPECIES_LIST, params=params, timeout=12.0)
         upstream_status = resp.status_code
         resp.raise_for_status()
         payload = resp.json()
@@ -0,0 +1,102 @@
+"""
+GET /api/live/: server-sent events with the signed-in user's changes.
+
+    event: change
+    data: {"type": "plot", "id": 12, "action": "updated"}
+
+Types are plot, media (with "plot"), event and events (bulk task changes).
+A resync message means messages may have been missed, so refetch whatever
+is on screen; do the same after reconnecting.
+
+This is a plain ASGI app mounted in front of Django by config.asgi, not a
+Django view. Django's ASGI handler keeps a thread per in-flight request, so
+thousands of idle streams would mean thousands of threads. Here an idle
+stream costs one queue. Authentication is the API's JWT (Authorization:
+Bearer), checked once per connection on the shared thread pool.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from accounts.authentication import CachedJWTAuthentication
+
+from .broker import broker
+
+PATH = "/api/live/"
+
+
+def _authenticate(header: bytes):
+    kind, _, raw = header.decode("latin-1").partition(" ")
+    if kind != "Bearer" or not raw:
+        return None
+    auth = CachedJWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw.strip()))
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    finally:
+        close_old_connections()
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+async def _plain(send, status: int, text: str, headers=()):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8"), *headers]})
+    await send({"type": "http.response.body", "body": text.encode()})
+
+
+async def _disconnected(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def live_app(scope, receive, send):
+    if scope["method"] not in ("GET", "HEAD"):
+        return await _plain(send, 405, "Method not allowed.", [(b"allow", b"GET")])
+    headers = dict(scope["headers"])
+    user = await sync_to_async(_authenticate, thread_sensitive=False)(headers.get(b"authorization", b""))
+    if user is None:
+        return await _plain(send, 401, "Authentication required.", [(b"www-authenticate", b'Bearer realm="api"')])
+    if broker.connection_count() >= getattr(settings, "LIVE_MAX_CONNECTIONS", 10_000):
+        return await _plain(send, 503, "Too many live connections.", [(b"retry-after", b"30")])
+
+    sub = broker.subscribe(user.pk)
+    keepalive = getattr(settings, "LIVE_KEEPALIVE_SECONDS", 25)
+    disconnect = asyncio.ensure_future(_disconnected(receive))
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),  # nginx: pass events through unbuffered
+        ]})
+        await send({"type": "http.response.body", "body": b"retry: 5000\n\n" + _sse("ready", {}), "more_body": True})
+        while True:
+            message = asyncio.ensure_future(sub.queue.get())
+            done, _ = await asyncio.wait({message, disconnect}, timeout=keepalive,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if message not in done:
+                message.cancel()
+            if disconnect in done:
+                break
+            # a ping keeps proxies from closing an idle connection
+            body = _sse("change", message.result()) if message in done else b": ping\n\n"
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+    finally:
+        disconnect.cancel()
+        broker.unsubscribe(sub)
+
+
+def with_live_stream(django_app):
+    """Serve PATH with live_app and everything else with `django_app`."""
+    async def application(scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == PATH:
+            return await live_app(scope, receive, send)
+        return await django_app(scope, receive, send)
+    return application
@@ -0,0 +1,142 @@
+"""
+In-process pub/sub for live change notifications.
+
+Each open stream subscribes an asyncio.Queue for its user. publish() may be
+called from any thread (model signals run in request or command threads); it
+hands the message to each subscriber's event loop with call_soon_threadsafe,
+so an idle stream costs one queue and no thread.
+
+With LIVE_REDIS_URL set (and the optional `redis` package installed),
+publish() goes through a Redis channel instead, and each worker process
+relays what it receives to its own subscribers, so a write handled by one
+worker reaches streams held open by the others.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Set
+
+from django.conf import settings
+
+try:
+    import redis  # optional: pip install redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "live:changes"
+QUEUE_SIZE = 100
+# Sent instead of the backlog when a slow client's queue overflows.
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, message) -> None:
+        # runs on self.loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._relay = None
+
+    def subscribe(self, user_id) -> Subscription:
+        sub = Subscription(user_id)
+        with self._lock:
+            self._subscribers[user_id].add(sub)
+        if _redis_url():
+            self._start_relay()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish_local(self, user_id, message) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.deliver, message)
+            except RuntimeError:  # loop closed under a stream that is going away
+                self.unsubscribe(sub)
+
+    def _start_relay(self) -> None:
+        with self._lock:
+            if self._relay is not None:
+                return
+            self._relay = threading.Thread(target=self._run_relay, name="live-relay", daemon=True)
+        self._relay.start()
+
+    def _run_relay(self) -> None:
+        client = redis.Redis.from_url(_redis_url())
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                for item in pubsub.listen():
+                    payload = json.loads(item["data"])
+                    self.publish_local(payload["user"], payload["message"])
+            except Exception:
+                # Redis restarted or the network blipped: clients may have
+                # missed messages, so tell them to resync once reconnected.
+                logger.exception("live relay lost its Redis subscription; reconnecting")
+                with self._lock:
+                    users = list(self._subscribers)
+                for user_id in users:
+                    self.publish_local(user_id, RESYNC)
+                time.sleep(1)
+
+
+broker = Broker()
+_publisher = None
+_warned = []
+
+
+def _redis_url() -> str:
+    url = getattr(settings, "LIVE_REDIS_URL", "")
+    if url and redis is None:
+        if not _warned:
+            _warned.append(True)
+            logger.warning("LIVE_REDIS_URL is set but the redis package is not installed; using in-process delivery")
+        return ""
+    return url
+
+
+def publish(user_id, message: dict) -> None:
+    """Notify every open stream of `user_id`, in this process or (with Redis) any worker."""
+    global _publisher
+    url = _redis_url()
+    if not url:
+        broker.publish_local(user_id, message)
+        return
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(url)
+    try:
+        _publisher.publish(CHANNEL, json.dumps({"user": user_id, "message": message}))
+    except Exception:
+        logger.exception("live publish to Redis failed; delivering in this process only")
+        broker.publish_local(user_id, message)
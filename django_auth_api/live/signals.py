@@ -0,0 +1,58 @@
+"""
+Change notifications for the live stream. Messages carry only what changed
+("plot" 12 "updated"), never the data: clients refetch the objects they
+show. They are published once the transaction commits, so a client that
+refetches straight away sees the change.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Event
+from plots.milestones import events_synced
+from plots.models import CropMedia, Plot
+
+from .broker import publish
+
+
+def notify(user_id, message: dict) -> None:
+    transaction.on_commit(lambda: publish(user_id, message))
+
+
+def _action(kwargs) -> str:
+    if "created" not in kwargs:
+        return "deleted"
+    return "created" if kwargs["created"] else "updated"
+
+
+@receiver(post_save, sender=Plot)
+@receiver(post_delete, sender=Plot)
+def plot_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        notify(instance.owner_id, {"type": "plot", "id": instance.pk, "action": _action(kwargs)})
+
+
+@receiver(post_save, sender=CropMedia)
+@receiver(post_delete, sender=CropMedia)
+def media_changed(sender, instance, raw=False, origin=None, **kwargs):
+    # photos removed along with their plot are covered by the plot message
+    if raw or isinstance(origin, Plot):
+        return
+    notify(instance.plot.owner_id, {
+        "type": "media", "id": instance.pk, "plot": instance.plot_id, "action": _action(kwargs),
+    })
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    notify(instance.user_id, {"type": "event", "id": instance.pk, "action": _action(kwargs)})
+
+
+@receiver(events_synced)
+def events_bulk_changed(sender, user_ids, **kwargs):
+    # generated tasks are written in bulk, without per-row signals
+    for user_id in user_ids:
+        notify(user_id, {"type": "events", "action": "changed"})
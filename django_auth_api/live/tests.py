@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, TransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import CustomUser, Event
+from plots.models import CropMedia, Plot
+
+from .asgi import live_app
+from .broker import broker, publish
+
+POINT = {"type": "Point", "coordinates": [0, 0]}
+
+
+class LiveSignalTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="live@example.com", password="x")
+
+    def published(self, fn):
+        with mock.patch("live.signals.publish") as pub, self.captureOnCommitCallbacks(execute=True):
+            fn()
+        return [c.args for c in pub.call_args_list]
+
+    def test_changes_are_published_after_commit(self):
+        plot = Plot.objects.create(owner=self.user, type="point", geometry=POINT, name="P")
+        uid = self.user.pk
+        self.assertEqual(self.published(lambda: CropMedia.objects.create(plot=plot, image="plot_images/a.jpg")),
+                         [(uid, {"type": "media", "id": plot.images.get().pk, "plot": plot.pk, "action": "created"})])
+        now = datetime.now(timezone.utc)
+        msgs = self.published(lambda: Event.objects.create(user=self.user, title="E", start_dt=now,
+                                                           end_dt=now + timedelta(hours=1)))
+        self.assertEqual(msgs[0][1]["type"], "event")
+        pk = plot.pk
+        msgs = self.published(plot.delete)
+        self.assertEqual(msgs, [(uid, {"type": "plot", "id": pk, "action": "deleted"})])
+
+    def test_nothing_is_published_on_rollback(self):
+        with mock.patch("live.signals.publish") as pub, self.captureOnCommitCallbacks(execute=False):
+            Plot.objects.create(owner=self.user, type="point", geometry=POINT, name="P")
+        pub.assert_not_called()
+
+
+class LiveStreamTests(TransactionTestCase):
+    # TransactionTestCase: the token is checked on another thread/connection.
+
+    async def call(self, headers=(), method="GET"):
+        """Run live_app; returns (sent messages, task, receive queue)."""
+        sent, inbox = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "http", "method": method, "path": "/api/live/", "headers": list(headers)}
+        task = asyncio.ensure_future(live_app(scope, inbox.get, sent.put))
+        return sent, task, inbox
+
+    async def test_stream_delivers_to_the_user_only(self):
+        user = await sync_to_async(CustomUser.objects.create_user)(email="sse@example.com", password="x")
+        token = str(AccessToken.for_user(user))
+        sent, task, inbox = await self.call([(b"authorization", f"Bearer {token}".encode())])
+        start = await asyncio.wait_for(sent.get(), 5)
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+        self.assertIn(b"event: ready", (await sent.get())["body"])
+        self.assertEqual(broker.connection_count(), 1)
+
+        publish(user.pk + 1, {"type": "plot", "id": 1, "action": "updated"})
+        publish(user.pk, {"type": "plot", "id": 2, "action": "updated"})
+        body = (await asyncio.wait_for(sent.get(), 1))["body"]
+        self.assertEqual(body, b'event: change\ndata: {"type":"plot","id":2,"action":"updated"}\n\n')
+
+        await inbox.put({"type": "http.disconnect"})
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(broker.connection_count(), 0)
+
+    async def test_requires_a_valid_token(self):
+        for headers in ([], [(b"authorization", b"Bearer nonsense")]):
+            sent, task, _ = await self.call(headers)
+            await asyncio.wait_for(task, 5)
+            self.assertEqual((await sent.get())["status"], 401)
+        sent, task, _ = await self.call(method="POST")
+        await task
+        self.assertEqual((await sent.get())["status"], 405)
+
+    def test_other_paths_reach_django(self):
+        from config.asgi import application, django_application
+        self.assertIsNot(application, django_application)
+        # without config.asgi (runserver/WSGI) the URL explains itself
+        self.assertEqual(self.client.get("/api/live/").status_code, 501)
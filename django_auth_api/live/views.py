@@ -0,0 +1,6 @@
+from django.http import HttpResponse
+
+
+def live_stream(request):
+    # Only reached without config.asgi (e.g. runserver / WSGI); see live.asgi.
+    return HttpResponse("Live updates need the ASGI server (config.asgi:application).", status=501)
@@ -0,0 +1,16 @@
+"""
+HTTP load harness replaying the Flutter app's request mix.
+
+    # 1. seed data and start the stub + server
+    python manage.py seed_scale --users 200 --plots-per-user 20 --events-per-user 300
+    python -m loadtest.perenual_stub --port 8765 &
+    PERENUAL_BASE_URL=http://127.0.0.1:8765/api PERENUAL_KEY=stub gunicorn config.wsgi -w 4
+
+    # 2. run
+    python -m loadtest --base-url http://127.0.0.1:8000 --users 50 --duration 60
+
+Virtual users log in through /api/auth/jwt/create/ as the seed_scale users,
+then loop over weighted scenarios with think time. The report gives
+p50/p95/p99 latency, throughput and error rate per endpoint, checked against
+loadtest/thresholds.json; any breach exits 1.
+"""
@@ -0,0 +1,43 @@
+import argparse
+import json
+import os
+import sys
+
+from loadtest import __doc__ as USAGE
+from loadtest.harness import Harness, check, format_report
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest", description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users.")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds at full concurrency.")
+    parser.add_argument("--ramp-up", type=float, default=10)
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between requests (s).")
+    parser.add_argument("--email-pattern", default="seed{}@example.com",
+                        help="Login emails; {} is replaced by 0..users-1 (matches seed_scale).")
+    parser.add_argument("--password", default="seed-password")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--json", metavar="PATH", help="Also write the summary as JSON.")
+    args = parser.parse_args(argv)
+
+    emails = [args.email_pattern.format(i) for i in range(args.users)]
+    harness = Harness(args.base_url, emails, args.password, args.duration,
+                      ramp_up=args.ramp_up, think_time=args.think_time)
+    summary = harness.run().summary()
+    with open(args.thresholds) as f:
+        breaches = check(summary, json.load(f))
+
+    print(format_report(summary, breaches))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "breaches": breaches}, f, indent=2)
+    return 1 if breaches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
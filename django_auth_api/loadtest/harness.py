@@ -0,0 +1,199 @@
+import asyncio
+import io
+import math
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+SEARCH_TERMS = ["tomato", "apple", "basil", "lettuce", "citrus", "mango", "rose", "bean", "", "fern"]
+TASK_STATUSES = ["not_started", "in_progress", "completed"]
+
+# (name, weight) — roughly the Flutter app's request mix.
+SCENARIOS = [
+    ("plots.map", 30),
+    ("events.calendar", 25),
+    ("dashboard.summary", 15),
+    ("events.patch", 10),
+    ("crops.search", 10),
+    ("crops.list", 8),
+    ("media.upload", 2),
+]
+
+
+def _tiny_jpeg() -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 48), (90, 140, 60)).save(buf, "JPEG", quality=70)
+    return buf.getvalue()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        self.latencies[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self) -> Dict[str, dict]:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        out = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            out[name] = {
+                "count": len(values),
+                "rps": len(values) / elapsed,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000,
+                "error_rate": self.errors[name] / len(values),
+            }
+        return out
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def check(summary: Dict[str, dict], thresholds: Dict[str, dict]) -> Dict[str, List[str]]:
+    """Endpoint -> list of breached limits."""
+    breaches = {}
+    for name, row in summary.items():
+        limits = thresholds.get(name, thresholds.get("default", {}))
+        failed = [f"{key}={row[key]:.3g}>{limit}" for key, limit in limits.items() if row.get(key, 0) > limit]
+        if failed:
+            breaches[name] = failed
+    return breaches
+
+
+class VirtualUser:
+    def __init__(self, harness: "Harness", email: str):
+        self.h = harness
+        self.email = email
+        self.session = requests.Session()
+        self.plot_ids: List[int] = []
+        self.event_ids: List[int] = []
+
+    async def call(self, name: str, method: str, path: str, expect=(200,), **kwargs):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            resp = await loop.run_in_executor(
+                self.h.pool,
+                lambda: self.session.request(method, self.h.base_url + path, timeout=self.h.timeout, **kwargs),
+            )
+            ok = resp.status_code in expect
+        except requests.RequestException:
+            resp, ok = None, False
+        self.h.stats.record(name, time.perf_counter() - start, ok)
+        return resp if ok else None
+
+    async def login(self) -> bool:
+        resp = await self.call("login", "POST", "/api/auth/jwt/create/",
+                               json={"email": self.email, "password": self.h.password})
+        if resp is None:
+            return False
+        self.session.headers["Authorization"] = f"Bearer {resp.json()['access']}"
+        return True
+
+    async def setup(self) -> bool:
+        if not await self.login():
+            return False
+        resp = await self.call("plots.map", "GET", "/api/plots/?mine=1")
+        self.plot_ids = [p["id"] for p in resp.json()] if resp is not None else []
+        resp = await self.call("events.calendar", "GET", "/api/events/", params=self._month())
+        self.event_ids = [e["id"] for e in resp.json()] if resp is not None else []
+        return True
+
+    def _month(self):
+        start = datetime.now(timezone.utc) + timedelta(days=random.randint(-60, 60))
+        return {"start": start.isoformat(), "end": (start + timedelta(days=31)).isoformat()}
+
+    async def step(self, scenario: str):
+        if scenario == "plots.map":
+            await self.call(scenario, "GET", "/api/plots/?mine=1")
+        elif scenario == "events.calendar":
+            await self.call(scenario, "GET", "/api/events/", params=self._month())
+        elif scenario == "dashboard.summary":
+            await self.call(scenario, "GET", "/api/dashboard/summary/")
+        elif scenario == "events.patch" and self.event_ids:
+            await self.call(scenario, "PATCH", f"/api/events/{random.choice(self.event_ids)}/",
+                            json={"status": random.choice(TASK_STATUSES)})
+        elif scenario == "crops.search":
+            await self.call(scenario, "GET", "/api/external/crops/",
+                            params={"q": random.choice(SEARCH_TERMS), "limit": 24})
+        elif scenario == "crops.list":
+            await self.call(scenario, "GET", "/api/crops/")
+        elif scenario == "media.upload" and self.plot_ids:
+            await self.call(scenario, "POST", f"/api/plots/{random.choice(self.plot_ids)}/media/",
+                            expect=(201,), files={"image": ("leaf.jpg", self.h.image, "image/jpeg")},
+                            data={"caption": "load test"})
+
+    async def run(self, deadline: float):
+        if not await self.setup():
+            return
+        names, weights = zip(*SCENARIOS)
+        while time.monotonic() < deadline:
+            await self.step(random.choices(names, weights)[0])
+            await asyncio.sleep(random.expovariate(1 / self.h.think_time) if self.h.think_time else 0)
+
+
+class Harness:
+    def __init__(self, base_url: str, emails: List[str], password: str, duration: float,
+                 ramp_up: float = 10.0, think_time: float = 1.0, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.emails = emails
+        self.password = password
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.timeout = timeout
+        self.stats = Stats()
+        self.image = _tiny_jpeg()
+        self.pool = ThreadPoolExecutor(max_workers=len(emails))
+
+    async def _start(self, user: VirtualUser, delay: float, deadline: float):
+        await asyncio.sleep(delay)
+        await user.run(deadline)
+
+    async def run_async(self) -> Stats:
+        deadline = time.monotonic() + self.ramp_up + self.duration
+        users = [VirtualUser(self, email) for email in self.emails]
+        step = self.ramp_up / max(len(users), 1)
+        await asyncio.gather(*(self._start(u, i * step, deadline) for i, u in enumerate(users)))
+        self.stats.finished = time.monotonic()
+        self.pool.shutdown()
+        return self.stats
+
+    def run(self) -> Stats:
+        return asyncio.run(self.run_async())
+
+
+def format_report(summary: Dict[str, dict], breaches: Dict[str, List[str]]) -> str:
+    lines = [f"{'endpoint':<20} {'count':>7} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+             f"{'max ms':>8} {'errors':>7}  result"]
+    for name, r in summary.items():
+        result = "FAIL " + ", ".join(breaches[name]) if name in breaches else "ok"
+        lines.append(
+            f"{name:<20} {r['count']:>7} {r['rps']:>7.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['error_rate']:>7.1%}  {result}"
+        )
+    total = sum(r["count"] for r in summary.values())
+    rps = sum(r["rps"] for r in summary.values())
+    lines.append(f"{'total':<20} {total:>7} {rps:>7.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,86 @@
+"""
+Local stand-in for the Perenual API: canned species-list/details responses
+with a configurable delay, so load tests don't hit (or get throttled by) the
+real service.
+
+    python -m loadtest.perenual_stub --port 8765 --delay-ms 120
+"""
+import argparse
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PAGE_SIZE = 30
+
+
+def species(i: int) -> dict:
+    item = {
+        "id": i,
+        "common_name": f"Stub plant {i}",
+        "scientific_name": [f"Plantus stubbius {i}"],
+        "other_name": [],
+        "cycle": "Perennial",
+        "watering": "Average",
+    }
+    if i % 4:
+        item["default_image"] = {
+            "regular_url": f"https://img.example.com/{i}.jpg",
+            "thumbnail": f"https://img.example.com/{i}_t.jpg",
+        }
+    return item
+
+
+class Handler(BaseHTTPRequestHandler):
+    delay = 0.0
+    jitter = 0.0
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        time.sleep(max(0.0, self.delay + random.uniform(-self.jitter, self.jitter)))
+        if url.path.rstrip("/") == "/api/species-list":
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            first = (page - 1) * PAGE_SIZE + 1
+            body = {"data": [species(i) for i in range(first, first + PAGE_SIZE)],
+                    "current_page": page, "per_page": PAGE_SIZE, "total": 10_000}
+            return self._json(200, body)
+        m = re.fullmatch(r"/api/species/details/(\d+)/?", url.path)
+        if m:
+            return self._json(200, species(int(m.group(1)) * 4 + 1))
+        return self._json(404, {"error": "not found"})
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, delay_ms: float = 120, jitter_ms: float = 40):
+    Handler.delay, Handler.jitter = delay_ms / 1000, jitter_ms / 1000
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loadtest.perenual_stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=120, help="Simulated upstream latency.")
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    args = parser.parse_args(argv)
+    server = serve(args.host, args.port, args.delay_ms, args.jitter_ms)
+    print(f"Perenual stub on http://{args.host}:{args.port}/api")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
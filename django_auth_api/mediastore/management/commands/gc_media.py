@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from mediastore.models import Blob
+from mediastore.signals import TRACKED
+from mediastore.storage import ContentAddressedStorage, is_content_addressed
+
+BATCH_SIZE = 1000
+
+
+def referenced(name) -> bool:
+    return any(
+        model._default_manager.filter(**{field: name}).exists()
+        for model, fields in TRACKED.items() for field in fields
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount references to content-addressed media blobs, then delete blobs "
+        "no record has referred to for --grace-hours. Intended for a nightly cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float, default=24,
+                            help="Keep unreferenced blobs this long (covers uploads mid-save).")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        counts = {}
+        for model, fields in TRACKED.items():
+            for field in fields:
+                rows = model._default_manager.exclude(**{field: ""}).values(field).annotate(n=Count("pk"))
+                for row in rows.iterator():
+                    if is_content_addressed(row[field]):
+                        counts[row[field]] = counts.get(row[field], 0) + row["n"]
+
+        fixed = 0
+        for blob in Blob.objects.only("id", "name", "refcount").iterator(chunk_size=BATCH_SIZE):
+            actual = counts.get(blob.name, 0)
+            if blob.refcount != actual:
+                fixed += 1
+                if not opts["dry_run"]:
+                    Blob.objects.filter(pk=blob.pk).update(refcount=actual)
+
+        cutoff = timezone.now() - timedelta(hours=opts["grace_hours"])
+        garbage = Blob.objects.filter(refcount__lte=0, last_referenced_at__lt=cutoff)
+        deleted = freed = 0
+        storage = default_storage if isinstance(default_storage, ContentAddressedStorage) else None
+        for blob in garbage.iterator(chunk_size=BATCH_SIZE):
+            if opts["dry_run"]:
+                deleted += 1
+                freed += blob.size
+                continue
+            with transaction.atomic():
+                # Lock the row first, then re-check it and the records themselves:
+                # a save may have stored or referenced the blob since the recount.
+                # storage._save upserts this row, so it waits for the lock.
+                locked = Blob.objects.select_for_update().filter(
+                    pk=blob.pk, refcount__lte=0, last_referenced_at__lt=cutoff
+                ).first()
+                if locked is None:
+                    continue
+                if referenced(locked.name):
+                    Blob.objects.filter(pk=locked.pk).update(refcount=F("refcount") + 1)
+                    continue
+                if locked.delete()[0]:
+                    deleted += 1
+                    freed += locked.size
+                    if storage is not None:
+                        storage.delete_blob(locked.name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"recounted={fixed} deleted={deleted} freed_bytes={freed}" + (" (dry run)" if opts["dry_run"] else "")
+        ))
@@ -0,0 +1,31 @@
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def from_created_at(apps, schema_editor):
+    apps.get_model("mediastore", "Blob").objects.update(last_referenced_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mediastore', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='last_referenced_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(from_created_at, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='blob',
+            name='mediastore__refcoun_2cddaa_idx',
+        ),
+        migrations.AddIndex(
+            model_name='blob',
+            index=models.Index(fields=['refcount', 'last_referenced_at'], name='mediastore__refcoun_7c0c2a_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Blob(models.Model):
+    """
+    One stored file in the content-addressed store, with the number of
+    FileField values pointing at it. Blobs at zero references are removed by
+    `manage.py gc_media` once nothing has stored them for a grace period;
+    every store of the content refreshes last_referenced_at, because its
+    record only takes the reference when it saves.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_referenced_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["refcount", "last_referenced_at"])]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
@@ -0,0 +1,66 @@
+"""
+Reference counting for content-addressed blobs. For every model with a
+FileField on ContentAddressedStorage, saves and deletes adjust Blob.refcount.
+bulk_create/update/delete send no signals; gc_media recounts from scratch
+before collecting, so such writes are repaired there.
+"""
+from django.apps import apps
+from django.db.models import F, FileField
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import Blob
+from .storage import ContentAddressedStorage, is_content_addressed
+
+# model -> [field names]
+TRACKED = {}
+
+
+def tracked_fields(model):
+    return [
+        f.name for f in model._meta.concrete_fields
+        if isinstance(f, FileField) and isinstance(f.storage, ContentAddressedStorage)
+    ]
+
+
+def _adjust(names, delta):
+    names = [n for n in names if n and is_content_addressed(n)]
+    for name in names:
+        Blob.objects.filter(name=name).update(refcount=F("refcount") + delta)
+
+
+def _names(instance, fields):
+    return [getattr(instance, f).name for f in fields]
+
+
+def remember_old_names(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or instance.pk is None:
+        instance._mediastore_old = []
+        return
+    fields = TRACKED[sender]
+    row = sender._default_manager.filter(pk=instance.pk).values_list(*fields).first()
+    instance._mediastore_old = list(row) if row else []
+
+
+def count_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    new = _names(instance, TRACKED[sender])
+    old = getattr(instance, "_mediastore_old", [])
+    _adjust([n for n in new if n not in old], +1)
+    _adjust([n for n in old if n not in new], -1)
+    instance._mediastore_old = new
+
+
+def count_deleted(sender, instance, **kwargs):
+    _adjust(_names(instance, TRACKED[sender]), -1)
+
+
+def connect_file_fields():
+    for model in apps.get_models():
+        fields = tracked_fields(model)
+        if not fields:
+            continue
+        TRACKED[model] = fields
+        pre_save.connect(remember_old_names, sender=model, dispatch_uid=f"mediastore-pre-{model._meta.label}")
+        post_save.connect(count_saved, sender=model, dispatch_uid=f"mediastore-post-{model._meta.label}")
+        post_delete.connect(count_deleted, sender=model, dispatch_uid=f"mediastore-del-{model._meta.label}")
@@ -0,0 +1,77 @@
+"""
+Content-addressed file storage: every upload is stored once, at
+cas/<aa>/<bb>/<sha256><ext>, however many records (or users) upload it.
+
+The digest is computed while the upload is streamed to a temporary file, so
+nothing is read twice. Names never change for given bytes, so URLs can be
+cached forever (see IMMUTABLE_CACHE_CONTROL). Deleting through the storage is
+a no-op: blobs are shared, and only gc_media removes them once no FileField
+refers to them.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+PREFIX = "cas/"
+IMMUTABLE_CACHE_CONTROL = "max-age=31536000, immutable"
+
+
+def is_content_addressed(name: str) -> bool:
+    return name.startswith(PREFIX)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save; no suffixing needed.
+        return name
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        ext = os.path.splitext(name)[1].lower()
+        tmp_dir = self.path(PREFIX + "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    tmp.write(chunk)
+            hexdigest = digest.hexdigest()
+            final = f"{PREFIX}{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{ext}"
+            final_path = self.path(final)
+            # Before looking at the file: gc_media skips blobs stored within its
+            # grace period, so it can't delete the file this save is reusing.
+            # Refcounts are taken when a record saves the name (mediastore.signals).
+            Blob.objects.bulk_create(
+                [Blob(name=final, size=size, last_referenced_at=timezone.now())],
+                update_conflicts=True, unique_fields=["name"], update_fields=["last_referenced_at"],
+            )
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return final
+
+    def delete(self, name):
+        if not is_content_addressed(name):
+            super().delete(name)
+
+    def delete_blob(self, name):
+        """Remove the bytes for good; only gc_media should call this."""
+        super().delete(name)
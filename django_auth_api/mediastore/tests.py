@@ -0,0 +1,93 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from plots.models import CropMedia, Plot
+from .models import Blob
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = CustomUser.objects.create_user(email="cas@example.com", password="x")
+        self.plots = [
+            Plot.objects.create(owner=self.user, type="point", name=f"P{i}",
+                                geometry={"type": "Point", "coordinates": [0, 0]})
+            for i in range(2)
+        ]
+
+    def upload(self, plot, data=b"same photo bytes", name="IMG_0001.JPG"):
+        return CropMedia.objects.create(plot=plot, image=SimpleUploadedFile(name, data))
+
+    def test_identical_uploads_share_one_blob(self):
+        a = self.upload(self.plots[0])
+        b = self.upload(self.plots[1], name="copy.jpg")
+        self.assertEqual(a.image.name, b.image.name)
+        self.assertRegex(a.image.name, r"^cas/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+        self.assertEqual(a.image.url, "/media/" + a.image.name)
+        self.assertEqual(Blob.objects.get().refcount, 2)
+        files = [f for _, _, fs in os.walk(os.path.join(self.root.name, "cas")) for f in fs]
+        self.assertEqual(len(files), 1)
+
+        self.upload(self.plots[0], data=b"different")
+        self.assertEqual(Blob.objects.count(), 2)
+
+    def test_refcounts_follow_updates_and_deletes(self):
+        a = self.upload(self.plots[0])
+        b = self.upload(self.plots[1])
+        a.image = SimpleUploadedFile("new.jpg", b"replacement")
+        a.save()
+        self.assertEqual(Blob.objects.get(name=b.image.name).refcount, 1)
+        self.assertEqual(Blob.objects.get(name=a.image.name).refcount, 1)
+        b.delete()
+        self.assertEqual(Blob.objects.get(name=b.image.name).refcount, 0)
+
+    def test_gc_removes_unreferenced_blobs_and_repairs_counts(self):
+        kept = self.upload(self.plots[0])
+        dropped = self.upload(self.plots[1], data=b"to be removed")
+        dropped.delete()
+        # bulk writes skip the signals; gc recounts them
+        CropMedia.objects.bulk_create([CropMedia(plot=self.plots[1], image=kept.image.name)])
+        Blob.objects.update(last_referenced_at=kept.created_at - timedelta(days=2))
+
+        call_command("gc_media", stdout=StringIO())
+
+        self.assertEqual(list(Blob.objects.values_list("name", "refcount")), [(kept.image.name, 2)])
+        self.assertFalse(os.path.exists(os.path.join(self.root.name, dropped.image.name)))
+        self.assertTrue(os.path.exists(os.path.join(self.root.name, kept.image.name)))
+
+    def test_reupload_of_an_old_unreferenced_blob_survives_gc(self):
+        media = self.upload(self.plots[0])
+        name = media.image.name
+        media.delete()
+        Blob.objects.update(created_at=timezone.now() - timedelta(days=30),
+                            last_referenced_at=timezone.now() - timedelta(days=30))
+        # the same bytes are stored again; gc runs before the record takes its reference
+        self.assertEqual(default_storage.save("again.jpg", ContentFile(b"same photo bytes")), name)
+
+        call_command("gc_media", stdout=StringIO())
+
+        self.assertTrue(Blob.objects.filter(name=name).exists())
+        self.assertTrue(os.path.exists(os.path.join(self.root.name, name)))
+
+    def test_served_with_immutable_cache_headers(self):
+        media = self.upload(self.plots[0])
+        client = APIClient()
+        client.force_login(self.user)
+        r = client.get(media.image.url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Cache-Control"], "private, max-age=31536000, immutable")
@@ -0,0 +1,90 @@
+"""
+Per-route request metrics: latency, status, response size, SQL count/time and
+outbound HTTP time. Add first in MIDDLEWARE so the timing covers the rest of
+the stack.
+"""
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Optional
+
+from django.db import connections
+
+from .registry import registry
+
+_current: ContextVar[Optional["RequestStats"]] = ContextVar("metrics_request", default=None)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "outbound_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.outbound_seconds = 0.0
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += time.perf_counter() - start
+
+
+def route_label(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    # Unresolved paths share one label so 404 scans can't blow up cardinality.
+    return match.route if match is not None and match.route else "<unmatched>"
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - start
+
+        route = route_label(request)
+        labels = {"route": route, "method": request.method}
+        registry.inc("http_requests_total", dict(labels, status=str(response.status_code)))
+        registry.observe("http_request_duration_seconds", labels, elapsed)
+        registry.observe("db_queries_per_request", labels, stats.queries)
+        registry.inc("db_query_seconds_total", labels, stats.db_seconds)
+        if stats.outbound_seconds:
+            registry.inc("outbound_http_seconds_total", labels, stats.outbound_seconds)
+
+        if response.streaming:
+            response.streaming_content = self._count_stream(response.streaming_content, labels)
+        else:
+            registry.observe("http_response_size_bytes", labels, len(response.content))
+            registry.flush()
+        return response
+
+    @staticmethod
+    def _count_stream(chunks, labels):
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.observe("http_response_size_bytes", labels, size)
+            registry.flush()
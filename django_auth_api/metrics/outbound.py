@@ -0,0 +1,28 @@
+"""
+requests.Session that records outbound call latency by host, and adds it to
+the current request's outbound time (see MetricsMiddleware).
+"""
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from .middleware import current_stats
+from .registry import registry
+
+
+class MeteredSession(requests.Session):
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().request(method, url, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.observe(
+                "outbound_http_request_duration_seconds",
+                {"host": urlsplit(url).hostname or "", "method": method.upper()},
+                elapsed,
+            )
+            stats = current_stats()
+            if stats is not None:
+                stats.outbound_seconds += elapsed
@@ -0,0 +1,148 @@
+"""
+Minimal Prometheus-style registry: labelled counters and histograms held in
+process memory, rendered in the text exposition format.
+
+Under gunicorn each worker has its own registry. When METRICS_MULTIPROC_DIR
+is set, workers periodically write a JSON snapshot to <dir>/<pid>.json and
+/metrics sums every snapshot in the directory, so one scrape sees all
+workers. Snapshots of exited workers are kept (counters must not go
+backwards); clear the directory when the service is restarted.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "http_requests_total": ("counter", "Requests by route, method and status.", None),
+    "http_request_duration_seconds": ("histogram", "Time to response headers, by route.", LATENCY_BUCKETS),
+    "http_response_size_bytes": ("histogram", "Response body size, by route.", BYTES_BUCKETS),
+    "db_queries_per_request": ("histogram", "SQL statements executed per request, by route.", QUERY_BUCKETS),
+    "db_query_seconds_total": ("counter", "Time spent in SQL, by route.", None),
+    "outbound_http_seconds_total": ("counter", "Time spent in outbound HTTP calls, by route.", None),
+    "outbound_http_request_duration_seconds": ("histogram", "Outbound HTTP call latency, by host.", LATENCY_BUCKETS),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        # (name, labels) -> [per-bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._flushed_at = 0.0
+
+    def inc(self, name: str, labels: dict, value: float = 1.0) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += value
+
+    def observe(self, name: str, labels: dict, value: float) -> None:
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [0] * (len(buckets) + 2)
+            h[bisect_left(buckets, value)] += 1
+            h[-1] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [[n, list(map(list, lb)), v] for (n, lb), v in self.counters.items()],
+                "histograms": [[n, list(map(list, lb)), h[:]] for (n, lb), h in self.histograms.items()],
+            }
+
+    # -- multi-process ------------------------------------------------------
+    def flush(self, force: bool = False) -> None:
+        directory = getattr(settings, "METRICS_MULTIPROC_DIR", "")
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0):
+            return
+        self._flushed_at = now
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, os.path.join(directory, f"{os.getpid()}.json"))
+
+
+registry = Registry()
+
+
+def collect() -> Registry:
+    """This process's registry, or the sum over every worker's snapshot."""
+    directory = getattr(settings, "METRICS_MULTIPROC_DIR", "")
+    if not directory:
+        return registry
+    registry.flush(force=True)
+    merged = Registry()
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path) as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snap["counters"]:
+            merged.counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, h in snap["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            acc = merged.histograms.setdefault(key, [0] * len(h))
+            for i, v in enumerate(h):
+                acc[i] += v
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Iterable, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(str(v))}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(reg: Registry) -> str:
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (n, labels), value in sorted(reg.counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+            continue
+        for (n, labels), h in sorted(reg.histograms.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ("+Inf",), h):
+                cumulative += count
+                le = 'le="%s"' % (bound if bound == "+Inf" else _fmt(bound))
+                lines.append(f"{name}_bucket{_labels(labels, le)} {_fmt(cumulative)}")
+            lines.append(f"{name}_sum{_labels(labels)} {_fmt(h[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {_fmt(cumulative)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from .outbound import MeteredSession
+from .registry import Registry, collect, registry, render
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(email="m@example.com", password="x"))
+
+    def test_routes_are_recorded(self):
+        self.client.get("/api/events/")
+        self.client.get("/no/such/path/")
+        self.client.force_login(CustomUser.objects.create_user(email="staff@example.com", password="x", is_staff=True))
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="api/events/"}', body)
+        self.assertIn('http_requests_total{method="GET",route="<unmatched>",status="404"}', body)
+        self.assertIn('db_queries_per_request_bucket{method="GET",route="api/events/",le="+Inf"}', body)
+
+    def test_staff_only_without_a_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_login(CustomUser.objects.create_user(email="m2@example.com", password="x"))
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        r = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(r.status_code, 200)
+
+    def test_outbound_time_is_attributed(self):
+        with mock.patch("requests.Session.request", return_value=mock.Mock(status_code=200)):
+            MeteredSession().get("https://perenual.com/api/species-list")
+        body = render(registry)
+        self.assertIn('outbound_http_request_duration_seconds_count{host="perenual.com",method="GET"}', body)
+
+
+class MultiProcessAggregationTests(TestCase):
+    def test_worker_snapshots_are_summed(self):
+        with tempfile.TemporaryDirectory() as d, override_settings(METRICS_MULTIPROC_DIR=d):
+            other = Registry()
+            other.inc("http_requests_total", {"route": "x", "method": "GET", "status": "200"}, 2)
+            other.observe("http_request_duration_seconds", {"route": "x", "method": "GET"}, 0.02)
+            with open(os.path.join(d, "99999.json"), "w") as f:
+                json.dump(other.snapshot(), f)
+            registry.inc("http_requests_total", {"route": "x", "method": "GET", "status": "200"}, 3)
+
+            merged = collect()
+            key = ("http_requests_total", (("method", "GET"), ("route", "x"), ("status", "200")))
+            self.assertGreaterEqual(merged.counters[key], 5)
+            self.assertIn('le="0.025"} 1', render(merged))
@@ -0,0 +1,27 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .registry import collect, render
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@require_GET
+def metrics_view(request):
+    """
+    GET /metrics in Prometheus text format. If METRICS_TOKEN is set, scrapers
+    must send "Authorization: Bearer <token>". Without one, only staff logged
+    in to the admin can read it: per-route latency and query counts are not
+    for the public.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, token):
+            return HttpResponseForbidden()
+    elif not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
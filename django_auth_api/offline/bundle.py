@@ -0,0 +1,279 @@
+"""
+Offline farm bundles: one gzipped SQLite file per user for use without signal.
+
+The file holds the user's plots, upcoming events, the crop catalog, photo
+thumbnails, and vector tiles of the plots. The tiles go in MBTiles tables
+(`metadata`, `tiles`), so map libraries can open the same file as a tile
+source.
+
+Each section has a version built from cheap aggregates (crops.conditional),
+and the bundle's content version is a hash of those. It names the file, so an
+unchanged bundle is served from disk without touching its data. Builds run in
+the background (start_build) and are incremental. They start from the
+previous build's uncompressed working copy and rewrite only the sections
+whose version changed. Photos are added or removed row by row, so existing
+thumbnails are not read again.
+
+Like response_cache, the versions are read before the data. A change made
+during a build can end up in a bundle named after the older version. The
+next request then sees a new version and builds again.
+"""
+import fcntl
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime, time, timedelta, timezone
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone as dj_timezone
+
+from accounts.models import Event
+from crops.conditional import collection_validators
+from crops.models import Crop
+from plots.models import CropMedia, Plot
+
+from .tiles import LAYER, bounds, plot_shapes, render_tiles
+
+logger = logging.getLogger(__name__)
+
+# Bump when the schema or the contents of a section change meaning.
+FORMAT = 1
+SECTIONS = ("plots", "events", "crops", "media")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bundle_meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS plots (
+    id INTEGER PRIMARY KEY, name TEXT, type TEXT, geometry TEXT, notes TEXT,
+    crop_id INTEGER, growth_stage TEXT, planted_at TEXT, updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY, title TEXT, notes TEXT, start_dt TEXT, end_dt TEXT,
+    all_day INTEGER, location TEXT, status TEXT, completed INTEGER, source_key TEXT
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start_dt);
+CREATE TABLE IF NOT EXISTS crops (
+    id INTEGER PRIMARY KEY, name TEXT, spacing TEXT, harvest_time TEXT, growth_stages TEXT,
+    plant_type TEXT, soil_type TEXT, watering_needs TEXT, sunlight_needs TEXT,
+    planting_season TEXT, fertiliser_tips TEXT, pest_notes TEXT
+);
+CREATE TABLE IF NOT EXISTS media (
+    id INTEGER PRIMARY KEY, plot_id INTEGER, caption TEXT, created_at TEXT, thumbnail BLOB
+);
+CREATE INDEX IF NOT EXISTS media_plot ON media (plot_id);
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (
+    zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB
+);
+CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+"""
+CROP_COLUMNS = (
+    "id", "name", "spacing", "harvest_time", "growth_stages", "plant_type", "soil_type",
+    "watering_needs", "sunlight_needs", "planting_season", "fertiliser_tips", "pest_notes",
+)
+EVENT_COLUMNS = (
+    "id", "title", "notes", "start_dt", "end_dt", "all_day", "location", "status", "completed", "source_key",
+)
+
+
+def bundle_dir() -> str:
+    path = getattr(settings, "OFFLINE_BUNDLE_DIR", None) or os.path.join(settings.BASE_DIR, "offline_bundles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def user_dir(user_id) -> str:
+    path = os.path.join(bundle_dir(), str(user_id))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def bundle_name(user_id, version: str) -> str:
+    """Path of the bundle relative to bundle_dir()."""
+    return f"{user_id}/farm-{version}.sqlite.gz"
+
+
+def _upcoming_events(user_id):
+    start = datetime.combine(dj_timezone.now().date(), time.min, tzinfo=timezone.utc)
+    days = getattr(settings, "OFFLINE_BUNDLE_EVENT_DAYS", 90)
+    return Event.objects.filter(user_id=user_id, end_dt__gte=start, start_dt__lt=start + timedelta(days=days)), start
+
+
+def section_versions(user_id) -> dict:
+    events, start = _upcoming_events(user_id)
+    return {
+        # photo changes touch their plot's updated_at too, but the media
+        # section has its own version so plot edits don't re-read thumbnails
+        "plots": collection_validators(Plot.objects.filter(owner_id=user_id))[0],
+        # the window moves every day
+        "events": collection_validators(events, start.date())[0],
+        "crops": collection_validators(Crop.objects.all())[0],
+        "media": collection_validators(CropMedia.objects.filter(plot__owner_id=user_id), field="pk")[0],
+    }
+
+
+def content_version(versions: dict) -> str:
+    return hashlib.sha1(json.dumps([FORMAT, versions], sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _write_plots(db, user_id):
+    plots = list(Plot.objects.filter(owner_id=user_id).only(
+        "id", "name", "type", "geometry", "notes", "crop", "growth_stage", "planted_at", "updated_at"
+    ).order_by("id"))
+    db.execute("DELETE FROM plots")
+    db.executemany("INSERT INTO plots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        (p.id, p.name, p.type, json.dumps(p.geometry), p.notes, p.crop_id, p.growth_stage,
+         _iso(p.planted_at), _iso(p.updated_at))
+        for p in plots
+    ])
+
+    shapes = plot_shapes(plots)
+    min_zoom = getattr(settings, "OFFLINE_TILE_MIN_ZOOM", 12)
+    max_zoom = getattr(settings, "OFFLINE_TILE_MAX_ZOOM", 18)
+    db.execute("DELETE FROM tiles")
+    db.execute("DELETE FROM metadata")
+    db.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?)", (
+        # MBTiles rows count from the bottom (TMS)
+        (z, x, 2 ** z - 1 - y, gzip.compress(data, mtime=0))
+        for z, x, y, data in render_tiles(shapes, min_zoom, max_zoom, getattr(settings, "OFFLINE_TILE_MAX", 5000))
+    ))
+    if shapes:
+        west, south, east, north = bounds(shapes)
+        zooms = [z for (z,) in db.execute("SELECT DISTINCT zoom_level FROM tiles ORDER BY zoom_level")]
+        db.executemany("INSERT INTO metadata VALUES (?, ?)", [
+            ("name", "Farm"),
+            ("format", "pbf"),
+            ("type", "overlay"),
+            ("bounds", f"{west:.6f},{south:.6f},{east:.6f},{north:.6f}"),
+            ("center", f"{(west + east) / 2:.6f},{(south + north) / 2:.6f},{zooms[0] if zooms else min_zoom}"),
+            ("minzoom", str(zooms[0] if zooms else min_zoom)),
+            ("maxzoom", str(zooms[-1] if zooms else min_zoom)),
+            ("json", json.dumps({"vector_layers": [{
+                "id": LAYER, "fields": {"name": "String", "type": "String", "crop_id": "Number"},
+            }]})),
+        ])
+
+
+def _write_events(db, user_id):
+    events, _ = _upcoming_events(user_id)
+    db.execute("DELETE FROM events")
+    db.executemany(f"INSERT INTO events VALUES ({', '.join('?' * len(EVENT_COLUMNS))})", [
+        tuple(_iso(v) if isinstance(v, datetime) else v for v in row)
+        for row in events.order_by("start_dt").values_list(*EVENT_COLUMNS)
+    ])
+
+
+def _write_crops(db, user_id):
+    db.execute("DELETE FROM crops")
+    db.executemany(f"INSERT INTO crops VALUES ({', '.join('?' * len(CROP_COLUMNS))})",
+                   Crop.objects.order_by("id").values_list(*CROP_COLUMNS))
+
+
+def _thumbnail(name: str):
+    if not name:
+        return None  # originals can be large; the app downloads them on demand
+    try:
+        with CropMedia._meta.get_field("thumbnail").storage.open(name) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_media(db, user_id):
+    current = {
+        pk: (plot_id, caption, created_at, thumbnail)
+        for pk, plot_id, caption, created_at, thumbnail in CropMedia.objects.filter(
+            plot__owner_id=user_id
+        ).values_list("id", "plot_id", "caption", "created_at", "thumbnail")
+    }
+    have = {pk for (pk,) in db.execute("SELECT id FROM media")}
+    gone = have - current.keys()
+    db.executemany("DELETE FROM media WHERE id = ?", [(pk,) for pk in gone])
+    db.executemany("UPDATE media SET caption = ? WHERE id = ?",
+                   [(current[pk][1], pk) for pk in have & current.keys()])
+    db.executemany("INSERT INTO media VALUES (?, ?, ?, ?, ?)", (
+        (pk, plot_id, caption, _iso(created_at), _thumbnail(thumbnail))
+        for pk, (plot_id, caption, created_at, thumbnail) in current.items() if pk not in have
+    ))
+
+
+def build_bundle(user_id):
+    """
+    Build the user's bundle for the current data unless it exists already.
+    Returns (name relative to bundle_dir(), built).
+    """
+    versions = section_versions(user_id)
+    version = content_version(versions)
+    name = bundle_name(user_id, version)
+    path = os.path.join(bundle_dir(), name)
+    if os.path.exists(path):
+        return name, False
+
+    folder = user_dir(user_id)
+    with open(os.path.join(folder, ".lock"), "w") as lock:
+        # one build per user across processes; a waiter finds the file built
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(path):
+            return name, False
+
+        work = os.path.join(folder, "work.sqlite")
+        db = sqlite3.connect(work)
+        try:
+            db.executescript(SCHEMA)
+            built = dict(db.execute("SELECT key, value FROM bundle_meta"))
+            if built.get("format") != str(FORMAT):
+                built = {}
+            writers = {"plots": _write_plots, "events": _write_events, "crops": _write_crops, "media": _write_media}
+            for section in SECTIONS:
+                if built.get(section) != versions[section]:
+                    writers[section](db, user_id)
+                    db.execute("INSERT OR REPLACE INTO bundle_meta VALUES (?, ?)", (section, versions[section]))
+            db.executemany("INSERT OR REPLACE INTO bundle_meta VALUES (?, ?)", [
+                ("format", str(FORMAT)), ("version", version), ("built_at", _iso(dj_timezone.now())),
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        tmp = f"{path}.tmp"
+        with open(work, "rb") as src, gzip.open(tmp, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp, path)
+        for old in glob.glob(os.path.join(folder, "farm-*.sqlite.gz")):
+            if old != path:
+                os.remove(old)
+    return name, True
+
+
+_building = set()
+_building_lock = threading.Lock()
+
+
+def start_build(user_id) -> None:
+    """Build the user's bundle on a background thread, unless one is already running here."""
+    with _building_lock:
+        if user_id in _building:
+            return
+        _building.add(user_id)
+    threading.Thread(target=_run_build, args=(user_id,), name=f"offline-bundle-{user_id}", daemon=True).start()
+
+
+def _run_build(user_id):
+    try:
+        build_bundle(user_id)
+    except Exception:
+        logger.exception("offline bundle build failed for user %s", user_id)
+    finally:
+        with _building_lock:
+            _building.discard(user_id)
+        connections.close_all()
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from offline.bundle import build_bundle
+
+
+class Command(BaseCommand):
+    help = "Build offline bundles ahead of time (all users with plots, or --user) so downloads don't wait."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users")
+
+    def handle(self, *args, **opts):
+        users = opts["users"] or get_user_model().objects.filter(plots__isnull=False).distinct().values_list(
+            "pk", flat=True
+        )
+        built = current = 0
+        for user_id in users:
+            _, was_built = build_bundle(user_id)
+            built += was_built
+            current += not was_built
+        self.stdout.write(self.style.SUCCESS(f"built={built} up_to_date={current}"))
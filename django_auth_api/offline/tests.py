@@ -0,0 +1,171 @@
+import gzip
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone as dj_timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser, Event
+from crops.models import Crop
+from plots.models import CropMedia, Plot
+
+from . import bundle
+from .tiles import Shape, covering_tiles, encode_tile, plot_shapes, render_tiles
+
+# ~100 m square near Sydney
+FIELD = {
+    "type": "Polygon",
+    "coordinates": [[[151.2093, -33.8688], [151.2102, -33.8688], [151.2102, -33.8679],
+                     [151.2093, -33.8679], [151.2093, -33.8688]]],
+}
+
+
+def unpack(path):
+    """Open a built bundle as SQLite."""
+    plain = path[:-len(".gz")]
+    with gzip.open(path) as src, open(plain, "wb") as dst:
+        dst.write(src.read())
+    return sqlite3.connect(plain)
+
+
+class OfflineTilesTests(TestCase):
+    def test_tiles_cover_the_plots(self):
+        plots = [
+            Plot(id=1, type="polygon", geometry=FIELD, name="Bed", crop_id=3),
+            Plot(id=2, type="circle", geometry={"center": [151.21, -33.87], "radiusMeters": 20}, name="Pond"),
+            Plot(id=3, type="point", geometry={"type": "Point", "coordinates": [151.2095, -33.8685]}, name="Gate"),
+            Plot(id=4, type="polygon", geometry={"type": "Polygon", "coordinates": "junk"}, name="Bad"),
+        ]
+        shapes = plot_shapes(plots)
+        self.assertEqual([s.id for s in shapes], [1, 2, 3])
+        tiles = list(render_tiles(shapes, 12, 18, 100))
+        self.assertEqual({z for z, *_ in tiles}, set(range(12, 19)))
+        z, x, y, data = tiles[0]
+        self.assertTrue(data.startswith(b"\x1a"))  # Tile.layers
+        for text in (b"plots", b"Bed", b"Pond", b"Gate", b"crop_id"):
+            self.assertIn(text, data)
+        self.assertEqual(list(covering_tiles(shapes, 12)), [(x, y)])  # a farm fits one z12 tile
+        self.assertEqual(encode_tile([], z, x, y), b"")
+        # the tile budget stops at the zoom that would exceed it
+        self.assertLess(max(z for z, *_ in render_tiles(shapes, 12, 18, 5)), 18)
+
+    def test_tile_budget_is_checked_before_listing_tiles(self):
+        def square(side_deg):
+            return {"type": "Polygon", "coordinates": [[[151.2, -33.8], [151.2 + side_deg, -33.8],
+                                                        [151.2 + side_deg, -33.8 + side_deg], [151.2, -33.8]]]}
+
+        shapes = plot_shapes([
+            Plot(id=1, type="polygon", geometry=square(0.1), name="Paddock"),  # ~10 km, kept
+            Plot(id=2, type="polygon", geometry=square(120), name="Continent"),
+            Plot(id=3, type="circle", geometry={"center": [151.2, -33.8], "radiusMeters": 1e9}, name="Huge"),
+            Plot(id=4, type="point", geometry={"type": "Point", "coordinates": [float("nan"), 0]}, name="NaN"),
+        ])
+        self.assertEqual([s.id for s in shapes], [1])
+        # a whole-world shape at z18 is ~7e10 tiles; listing them would never finish
+        world = Shape(9, {}, rings=[np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]])])
+        self.assertIsNone(covering_tiles([world], 18, 5000))
+        self.assertEqual(list(render_tiles(shapes, 18, 18, 100)), [])
+
+
+class OfflineBundleTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(MEDIA_ROOT=os.path.join(self.root.name, "media"),
+                                     OFFLINE_BUNDLE_DIR=os.path.join(self.root.name, "bundles"))
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = CustomUser.objects.create_user(email="offline@example.com", password="x")
+        self.crop = Crop.objects.create(name="Kale", spacing="50 cm", harvest_time="60 days")
+        self.plot = Plot.objects.create(owner=self.user, type="polygon", geometry=FIELD, name="Bed", crop=self.crop)
+        thumbs = os.path.join(self.root.name, "media", "plot_images", "thumbs")
+        os.makedirs(thumbs)
+        with open(os.path.join(thumbs, "a.jpg"), "wb") as f:
+            f.write(b"thumb-bytes")
+        CropMedia.objects.create(plot=self.plot, image="plot_images/a.jpg", thumbnail="plot_images/thumbs/a.jpg")
+        now = datetime.now(timezone.utc)
+        self.event = Event.objects.create(user=self.user, title="Weed", start_dt=now + timedelta(days=1),
+                                          end_dt=now + timedelta(days=1, hours=1))
+        Event.objects.create(user=self.user, title="Old", start_dt=now - timedelta(days=30),
+                             end_dt=now - timedelta(days=30) + timedelta(hours=1))
+        other = CustomUser.objects.create_user(email="other@example.com", password="x")
+        Plot.objects.create(owner=other, type="polygon", geometry=FIELD, name="Not mine")
+
+    def path(self, name):
+        return os.path.join(bundle.bundle_dir(), name)
+
+    def test_bundle_contents(self):
+        name, built = bundle.build_bundle(self.user.pk)
+        self.assertTrue(built)
+        db = unpack(self.path(name))
+        self.assertEqual(db.execute("SELECT name, crop_id FROM plots").fetchall(), [("Bed", self.crop.pk)])
+        self.assertEqual(db.execute("SELECT title FROM events").fetchall(), [("Weed",)])
+        self.assertEqual(db.execute("SELECT name FROM crops").fetchall(), [("Kale",)])
+        self.assertEqual(db.execute("SELECT thumbnail FROM media").fetchall(), [(b"thumb-bytes",)])
+        meta = dict(db.execute("SELECT name, value FROM metadata"))
+        self.assertEqual((meta["format"], meta["minzoom"], meta["maxzoom"]), ("pbf", "12", "18"))
+        self.assertEqual(db.execute("SELECT COUNT(DISTINCT zoom_level) FROM tiles").fetchone(), (7,))
+
+    def test_rebuilds_only_what_changed(self):
+        first, _ = bundle.build_bundle(self.user.pk)
+        self.assertEqual(bundle.build_bundle(self.user.pk), (first, False))
+
+        self.event.title = "Weed beds"
+        self.event.save()
+        with mock.patch("offline.bundle._write_plots") as plots, \
+                mock.patch("offline.bundle._thumbnail") as thumbnail:
+            second, built = bundle.build_bundle(self.user.pk)
+        self.assertTrue(built)
+        plots.assert_not_called()
+        thumbnail.assert_not_called()
+        self.assertNotEqual(second, first)
+        self.assertFalse(os.path.exists(self.path(first)))
+        db = unpack(self.path(second))
+        self.assertEqual(db.execute("SELECT title FROM events").fetchall(), [("Weed beds",)])
+        self.assertEqual(db.execute("SELECT COUNT(*) FROM media").fetchone(), (1,))
+
+        self.plot.images.get().delete()
+        third, _ = bundle.build_bundle(self.user.pk)
+        self.assertEqual(unpack(self.path(third)).execute("SELECT COUNT(*) FROM media").fetchone(), (0,))
+
+    def test_crop_version_comes_from_the_database(self):
+        before = bundle.section_versions(self.user.pk)["crops"]
+        # a queryset update sends no signals, like a write made by another process
+        Crop.objects.filter(pk=self.crop.pk).update(name="Curly kale", updated_at=dj_timezone.now())
+        self.assertNotEqual(bundle.section_versions(self.user.pk)["crops"], before)
+
+    def test_endpoint(self):
+        client = APIClient()
+        self.assertEqual(client.get("/api/offline-bundle/").status_code, 401)
+        client.force_authenticate(self.user)
+
+        with mock.patch("offline.bundle.start_build") as start:
+            r = client.get("/api/offline-bundle/")
+        self.assertEqual(r.status_code, 202)
+        start.assert_called_once_with(self.user.pk)
+        version = r.data["version"]
+
+        bundle.build_bundle(self.user.pk)
+        r = client.get("/api/offline-bundle/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["X-Bundle-Version"], version)
+        body = b"".join(r.streaming_content)
+        self.assertEqual(gzip.decompress(body)[:16], b"SQLite format 3\x00")
+        self.assertEqual(client.get("/api/offline-bundle/", HTTP_IF_NONE_MATCH=r["ETag"]).status_code, 304)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("build_offline_bundles", stdout=out)
+        self.assertIn("built=2", out.getvalue())
+        out = StringIO()
+        call_command("build_offline_bundles", "--user", str(self.user.pk), stdout=out)
+        self.assertIn("built=0 up_to_date=1", out.getvalue())
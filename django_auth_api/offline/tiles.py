@@ -0,0 +1,233 @@
+"""
+Mapbox Vector Tiles of a user's plots, for the offline bundle's MBTiles tables.
+
+Plots are projected to Web Mercator once. Each feature then goes only to the
+tiles its bounding box covers. Per zoom, rings are simplified to about a
+pixel (plots.geometry.simplify_mask), so low zooms stay small. Tiles are
+written in a single layer, "plots", with the name, type and crop_id
+properties. The protobuf is encoded by hand; it is only a few varints.
+
+Tile counts are bounded before any tile is listed: each shape's bbox gives
+its tile count per zoom. Plots larger than MAX_EXTENT_M are skipped as bad
+data, since one of them would spend the whole budget on a single plot.
+"""
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from plots.geometry import EARTH_RADIUS_M, LocalFrame, polygon_rings, simplify_mask
+
+EXTENT = 4096
+LAYER = "plots"
+CIRCLE_SEGMENTS = 32
+MAX_LAT = 85.0511287798
+# Widest plot (either side of its bbox) that is tiled; nothing on a farm is bigger.
+MAX_EXTENT_M = 20000.0
+
+
+class Shape:
+    def __init__(self, plot_id, props: dict, rings: List[np.ndarray] = None, point=None):
+        self.id = plot_id
+        self.props = props
+        self.rings = rings or []  # Web Mercator world coordinates in [0, 1], outer ring first
+        self.point = point
+        coords = np.concatenate(self.rings) if self.rings else np.asarray([point])
+        self.bbox = (*coords.min(axis=0), *coords.max(axis=0))
+
+
+def to_world(lng_lat) -> np.ndarray:
+    lng_lat = np.asarray(lng_lat, dtype=np.float64).reshape(-1, 2)
+    lat = np.radians(np.clip(lng_lat[:, 1], -MAX_LAT, MAX_LAT))
+    x = (lng_lat[:, 0] + 180.0) / 360.0
+    y = 0.5 - np.log(np.tan(np.pi / 4 + lat / 2)) / (2 * np.pi)
+    return np.column_stack([x, y])
+
+
+def _circle(center, radius) -> np.ndarray:
+    frame = LocalFrame(center[0], center[1])
+    t = np.linspace(0, 2 * np.pi, CIRCLE_SEGMENTS + 1)
+    return np.column_stack(frame.to_lnglat(radius * np.cos(t), radius * np.sin(t)))
+
+
+def _closed(ring: np.ndarray) -> np.ndarray:
+    return ring if np.array_equal(ring[0], ring[-1]) else np.vstack([ring, ring[:1]])
+
+
+def _plausible(lng_lat: np.ndarray) -> bool:
+    """Finite, on the globe, and no wider than MAX_EXTENT_M."""
+    if not np.all(np.isfinite(lng_lat)) or np.any(np.abs(lng_lat) > (180.0, 90.0)):
+        return False
+    k = np.radians(1.0) * EARTH_RADIUS_M
+    width = np.ptp(lng_lat[:, 0]) * k * np.cos(np.radians(lng_lat[:, 1].mean()))
+    return max(width, np.ptp(lng_lat[:, 1]) * k) <= MAX_EXTENT_M
+
+
+def plot_shapes(plots: Iterable) -> List[Shape]:
+    """Shapes of plots with usable, farm-sized geometry; the rest are skipped."""
+    shapes = []
+    for plot in plots:
+        props = {"name": plot.name, "type": plot.type}
+        if plot.crop_id is not None:
+            props["crop_id"] = plot.crop_id
+        g = plot.geometry
+        try:
+            if plot.type == "circle":
+                radius = float(g["radiusMeters"])
+                rings = [_circle(g["center"][:2], radius)] if radius > 0 else []
+            elif isinstance(g, dict) and g.get("type") == "Point":
+                point = np.asarray(g["coordinates"][:2], dtype=np.float64).reshape(1, 2)
+                if _plausible(point):
+                    shapes.append(Shape(plot.id, props, point=to_world(point)[0]))
+                continue
+            else:
+                rings = [_closed(np.asarray(r, dtype=np.float64)[:, :2]) for r in polygon_rings(g)]
+            if rings and _plausible(np.concatenate(rings)):
+                shapes.append(Shape(plot.id, props, rings=[to_world(r) for r in rings]))
+        except (KeyError, TypeError, ValueError, IndexError):
+            continue
+    return shapes
+
+
+def bounds(shapes: List[Shape]) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) in degrees."""
+    x0 = min(s.bbox[0] for s in shapes)
+    y0 = min(s.bbox[1] for s in shapes)
+    x1 = max(s.bbox[2] for s in shapes)
+    y1 = max(s.bbox[3] for s in shapes)
+
+    def lat(y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+    return x0 * 360 - 180, lat(y1), x1 * 360 - 180, lat(y0)
+
+
+def covering_tiles(shapes: List[Shape], zoom: int,
+                   max_tiles: Optional[int] = None) -> Optional[Dict[Tuple[int, int], List[Shape]]]:
+    """
+    Shapes per (x, y) tile at `zoom`, or None if the shapes' bboxes together
+    span more than max_tiles tiles. That is checked before any tile is listed.
+    """
+    n = 2 ** zoom
+    spans = [tuple(min(max(int(v * n), 0), n - 1) for v in shape.bbox) for shape in shapes]
+    if max_tiles is not None and sum((x1 - x0 + 1) * (y1 - y0 + 1) for x0, y0, x1, y1 in spans) > max_tiles:
+        return None
+    out: Dict[Tuple[int, int], List[Shape]] = {}
+    for shape, (x0, y0, x1, y1) in zip(shapes, spans):
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                out.setdefault((x, y), []).append(shape)
+    return out
+
+
+# --- protobuf -------------------------------------------------------------
+def _varint(v: int) -> bytes:
+    out = bytearray()
+    while v > 0x7F:
+        out.append((v & 0x7F) | 0x80)
+        v >>= 7
+    out.append(v)
+    return bytes(out)
+
+
+def _field(number: int, value) -> bytes:
+    if isinstance(value, int):
+        return _varint(number << 3) + _varint(value)
+    return _varint(number << 3 | 2) + _varint(len(value)) + value
+
+
+def _packed(number: int, values: List[int]) -> bytes:
+    return _field(number, b"".join(_varint(v) for v in values))
+
+
+def _zigzag(v: int) -> int:
+    return (v << 1) ^ (v >> 63)
+
+
+def _command(cmd: int, count: int) -> int:
+    return (cmd & 0x7) | (count << 3)
+
+
+def _ring_commands(ring: np.ndarray, cursor: List[int], exterior: bool) -> List[int]:
+    """MoveTo/LineTo/ClosePath for a closed ring of integer tile coordinates."""
+    pts = ring[:-1]
+    x, y = pts[:, 0], pts[:, 1]
+    area = np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+    # MVT: exterior rings have positive area in tile space (y down), holes negative
+    if (area > 0) != exterior:
+        pts = pts[::-1]
+    out = []
+    for i, (px, py) in enumerate(pts.tolist()):
+        if i == 0:
+            out.append(_command(1, 1))
+        elif i == 1:
+            out.append(_command(2, len(pts) - 1))
+        out += [_zigzag(px - cursor[0]), _zigzag(py - cursor[1])]
+        cursor[:] = [px, py]
+    out.append(_command(7, 1))
+    return out
+
+
+def _tile_ring(ring: np.ndarray, zoom: int, x: int, y: int):
+    px = (ring * 2 ** zoom - (x, y)) * EXTENT
+    px = np.round(px[simplify_mask(px, 1.0)]).astype(np.int64)
+    px = px[np.r_[True, np.any(px[1:] != px[:-1], axis=1)]]
+    return px if len(px) >= 4 else None
+
+
+def encode_tile(shapes: List[Shape], zoom: int, x: int, y: int) -> bytes:
+    keys: List[str] = []
+    values: list = []
+    features = []
+    for shape in shapes:
+        if shape.point is not None:
+            px, py = np.round((shape.point * 2 ** zoom - (x, y)) * EXTENT).astype(np.int64).tolist()
+            geom_type, geometry = 1, [_command(1, 1), _zigzag(px), _zigzag(py)]
+        else:
+            geom_type, geometry, cursor = 3, [], [0, 0]
+            for i, ring in enumerate(shape.rings):
+                tile_ring = _tile_ring(ring, zoom, x, y)
+                if tile_ring is None:
+                    if i == 0:
+                        break  # under a pixel at this zoom
+                    continue
+                geometry += _ring_commands(tile_ring, cursor, exterior=i == 0)
+            if not geometry:
+                continue
+        tags = []
+        for key, value in shape.props.items():
+            if key not in keys:
+                keys.append(key)
+            if value not in values:
+                values.append(value)
+            tags += [keys.index(key), values.index(value)]
+        features.append(_field(2, _field(1, shape.id) + _packed(2, tags)
+                               + _field(3, geom_type) + _packed(4, geometry)))
+    if not features:
+        return b""
+
+    layer = _field(15, 2) + _field(1, LAYER.encode()) + b"".join(features)
+    layer += b"".join(_field(3, k.encode()) for k in keys)
+    for v in values:
+        # Value: string_value = 1, uint_value = 5
+        layer += _field(4, _field(5, v) if isinstance(v, int) else _field(1, str(v).encode()))
+    layer += _field(5, EXTENT)
+    return _field(3, layer)
+
+
+def render_tiles(shapes: List[Shape], min_zoom: int, max_zoom: int, max_tiles: int) -> Iterator[Tuple[int, int, int, bytes]]:
+    """
+    (zoom, x, y, tile) for every non-empty tile from min_zoom up, stopping
+    before the zoom that would take the total past max_tiles (x/y are XYZ,
+    not the TMS rows MBTiles stores).
+    """
+    total = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        covered = covering_tiles(shapes, zoom, max_tiles - total)
+        if covered is None:
+            return
+        total += len(covered)
+        for (x, y), tile_shapes in covered.items():
+            data = encode_tile(tile_shapes, zoom, x, y)
+            if data:
+                yield zoom, x, y, data
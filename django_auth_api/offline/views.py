@@ -0,0 +1,34 @@
+from django.http import Http404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from crops.media import serve_file
+
+from . import bundle
+
+
+class OfflineBundleView(APIView):
+    """
+    GET /api/offline-bundle/ -> the user's farm bundle (gzipped SQLite, see offline.bundle)
+
+    200 with the file when the bundle for the current data is built (Range
+    and If-None-Match work as for media). Otherwise 202 {"status": "building"}
+    with Retry-After while a background build runs; ask again then.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        version = bundle.content_version(bundle.section_versions(request.user.pk))
+        name = bundle.bundle_name(request.user.pk, version)
+        try:
+            # bundles live outside MEDIA_ROOT, where the proxy's media location can't reach
+            response = serve_file(request, name, root=bundle.bundle_dir(), accel=False,
+                                  cache_control="private, max-age=0, must-revalidate")
+        except Http404:
+            bundle.start_build(request.user.pk)
+            return Response({"status": "building", "version": version}, status=202,
+                            headers={"Retry-After": "5"})
+        response["Content-Disposition"] = f'attachment; filename="farm-{version}.sqlite.gz"'
+        response["X-Bundle-Version"] = version
+        return response
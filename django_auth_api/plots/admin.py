@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Plot, CropMedia
+from .models import Plot, CropMedia, PlotPlanting, UploadSession
 
 @admin.register(Plot)
 class PlotAdmin(admin.ModelAdmin):
@@ -10,3 +10,12 @@ class PlotAdmin(admin.ModelAdmin):
 @admin.register(CropMedia)
 class CropMediaAdmin(admin.ModelAdmin):
     list_display = ("id", "plot", "caption", "created_at")
+
+@admin.register(PlotPlanting)
+class PlotPlantingAdmin(admin.ModelAdmin):
+    list_display = ("id", "plot", "crop", "planted_at", "created_at")
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "plot", "filename", "size", "media", "created_at", "updated_at")
+
@@ -0,0 +1,293 @@
+"""
+Vectorized geometry helpers for Plot.geometry.
+
+Plot geometry is GeoJSON-like JSON (Point / Polygon in [lng, lat]) or, for
+circles, {"center": [lng, lat], "radiusMeters": r}. Everything here works on
+whole batches of plots with NumPy so per-plot cost stays out of Python.
+"""
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6378137.0
+
+
+def polygon_rings(geometry) -> List[Sequence[Sequence[float]]]:
+    """Rings of a GeoJSON-like Polygon (outer ring first), or [] if malformed."""
+    if not isinstance(geometry, dict) or geometry.get("type") != "Polygon":
+        return []
+    rings = geometry.get("coordinates") or []
+    return [r for r in rings if isinstance(r, list) and len(r) >= 3]
+
+
+def ring_array(ring) -> np.ndarray:
+    """A ring from polygon_rings() as an (n, 2) float array; ValueError if it isn't one."""
+    arr = np.asarray(ring, dtype=np.float64)  # ragged or non-numeric: ValueError/TypeError
+    if arr.ndim != 2 or arr.shape[1] < 2 or not np.all(np.isfinite(arr[:, :2])):
+        raise ValueError("Polygon rings must be lists of finite [lng, lat] positions.")
+    return arr[:, :2]
+
+
+def areas_m2(items: Iterable[Tuple[str, dict]]) -> np.ndarray:
+    """
+    Geodesic area in m² for each (plot type, geometry) pair.
+
+    Polygons use the spherical-excess ring formula
+        A = R² / 2 * |Σ (λ₂ - λ₁)(2 + sin φ₁ + sin φ₂)|
+    evaluated for every ring of every plot in one pass; holes are subtracted.
+    Circles are πr². Points (and anything malformed) are 0.
+    """
+    items = list(items)
+    out = np.zeros(len(items), dtype=np.float64)
+
+    ring_coords = []
+    ring_owner = []
+    ring_sign = []
+    circle_idx = []
+    circle_r = []
+
+    for i, (kind, geometry) in enumerate(items):
+        if kind == "circle":
+            try:
+                circle_r.append(float(geometry["radiusMeters"]))
+                circle_idx.append(i)
+            except (KeyError, TypeError, ValueError):
+                pass
+            continue
+        try:
+            rings = [ring_array(r) for r in polygon_rings(geometry)]
+        except (TypeError, ValueError):
+            continue  # malformed, like compact_geometry and offline.tiles skip it
+        for j, ring in enumerate(rings):
+            ring_coords.append(ring)
+            ring_owner.append(i)
+            ring_sign.append(1.0 if j == 0 else -1.0)
+
+    if circle_idx:
+        out[circle_idx] = np.pi * np.square(circle_r)
+
+    if ring_coords:
+        ring_areas = _ring_areas(ring_coords)
+        out += np.bincount(
+            ring_owner, weights=np.asarray(ring_sign) * ring_areas, minlength=len(items)
+        )
+
+    return np.clip(out, 0.0, None)
+
+
+def _ring_areas(rings: List[np.ndarray]) -> np.ndarray:
+    # Close every ring, then lay them end to end so each consecutive pair of
+    # vertices is a segment; the pairs that straddle two rings are masked off.
+    closed = [r if np.array_equal(r[0], r[-1]) else np.vstack([r, r[:1]]) for r in rings]
+    lengths = np.fromiter((len(r) for r in closed), dtype=np.intp, count=len(closed))
+    coords = np.radians(np.concatenate(closed))
+    lng, sin_lat = coords[:, 0], np.sin(coords[:, 1])
+
+    terms = (lng[1:] - lng[:-1]) * (2.0 + sin_lat[:-1] + sin_lat[1:])
+    ends = np.cumsum(lengths)
+    terms[ends[:-1] - 1] = 0.0
+
+    starts = ends - lengths
+    sums = np.add.reduceat(terms, starts) if len(terms) else np.zeros(len(rings))
+    return np.abs(sums) * EARTH_RADIUS_M ** 2 / 2.0
+
+
+# ---------------------------------------------------------------------------
+# Local planar frame + point-in-polygon
+# ---------------------------------------------------------------------------
+class LocalFrame:
+    """
+    Equirectangular projection around an origin, in metres. Accurate to well
+    under a percent across a farm-sized extent, and trivially invertible.
+    """
+
+    def __init__(self, lng0: float, lat0: float):
+        self.lng0 = lng0
+        self.lat0 = lat0
+        self.ky = np.pi / 180.0 * EARTH_RADIUS_M
+        self.kx = self.ky * np.cos(np.radians(lat0))
+
+    def to_xy(self, lng, lat):
+        return (np.asarray(lng) - self.lng0) * self.kx, (np.asarray(lat) - self.lat0) * self.ky
+
+    def to_lnglat(self, x, y):
+        return np.asarray(x) / self.kx + self.lng0, np.asarray(y) / self.ky + self.lat0
+
+
+def _edges(rings: List[np.ndarray]) -> np.ndarray:
+    """All ring edges as an (E, 4) array of xa, ya, xb, yb."""
+    parts = []
+    for ring in rings:
+        nxt = np.roll(ring, -1, axis=0)
+        parts.append(np.column_stack([ring[:, 0], ring[:, 1], nxt[:, 0], nxt[:, 1]]))
+    return np.concatenate(parts)
+
+
+def lattice_in_rings(x: np.ndarray, row_y: np.ndarray, rings: List[np.ndarray]) -> np.ndarray:
+    """
+    Even-odd point-in-polygon for a lattice: `x` is (rows, cols), `row_y` the
+    y of each row. Edge crossings are computed once per (row, edge) and every
+    point is then classified with a single searchsorted, so the cost is
+    O(rows * edges + points * log edges) rather than O(points * edges).
+    Holes fall out of the even-odd rule.
+    """
+    edges = _edges(rings)
+    edges = edges[edges[:, 1] != edges[:, 3]]
+    n_rows, n_edges = len(row_y), len(edges)
+    if not n_edges:
+        return np.zeros(x.shape, dtype=bool)
+    xa, ya, xb, yb = (edges[:, k] for k in range(4))
+    y = row_y[:, None]
+    crosses = (ya > y) != (yb > y)
+    x_at = np.where(crosses, xa + (y - ya) * (xb - xa) / (yb - ya), np.inf)
+    x_at.sort(axis=1)
+
+    # Shift each row into its own disjoint band so one flat searchsorted
+    # answers every row; "no crossing" (inf) sorts to the end of its band.
+    finite = np.isfinite(x_at)
+    lo = min(x.min(), x_at[finite].min(initial=np.inf))
+    span = max(x.max(), x_at[finite].max(initial=-np.inf)) - lo + 1.0
+    offset = np.arange(n_rows)[:, None] * (2 * span)
+    bands = np.where(finite, x_at - lo, span * 1.5) + offset
+    before = np.searchsorted(bands.ravel(), (x - lo + offset).ravel()).reshape(x.shape)
+    return (before - np.arange(n_rows)[:, None] * n_edges) % 2 == 1
+
+
+def lattice_clear_of_rings(x: np.ndarray, row_y: np.ndarray, rings: List[np.ndarray], buffer: float) -> np.ndarray:
+    """
+    True where a lattice point is at least `buffer` from every ring edge.
+    Each edge only visits the rows its y-extent (plus buffer) touches.
+    """
+    clear = np.ones(x.shape, dtype=bool)
+    if buffer <= 0:
+        return clear
+    for xa, ya, xb, yb in _edges(rings):
+        r0, r1 = np.searchsorted(row_y, [min(ya, yb) - buffer, max(ya, yb) + buffer], side="left")
+        if r0 >= r1:
+            continue
+        px, py = x[r0:r1], row_y[r0:r1, None]
+        dx, dy = xb - xa, yb - ya
+        seg2 = dx * dx + dy * dy
+        t = 0.0 if seg2 == 0 else np.clip(((px - xa) * dx + (py - ya) * dy) / seg2, 0.0, 1.0)
+        clear[r0:r1] &= np.hypot(px - (xa + t * dx), py - (ya + t * dy)) >= buffer
+    return clear
+
+
+# ---------------------------------------------------------------------------
+# Compact encoding (?geom=compact)
+# ---------------------------------------------------------------------------
+# Web Mercator ground resolution at the equator, zoom 0, in metres per pixel.
+METRES_PER_PIXEL_Z0 = 2 * np.pi * EARTH_RADIUS_M / 256
+
+
+def simplify_mask(xy: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas–Peucker on planar (N, 2) points: True for the vertices to keep.
+    Iterative, and each span's distances are one vectorized step. A closed
+    ring (first == last) is split at the vertex farthest from its start.
+    """
+    keep = np.zeros(len(xy), dtype=bool)
+    keep[[0, -1]] = True
+    spans = [(0, len(xy) - 1)]
+    while spans:
+        a, b = spans.pop()
+        if b - a < 2:
+            continue
+        dx, dy = xy[b] - xy[a]
+        px, py = xy[a + 1:b, 0] - xy[a, 0], xy[a + 1:b, 1] - xy[a, 1]
+        norm = np.hypot(dx, dy)
+        dist = np.hypot(px, py) if norm == 0 else np.abs(dx * py - dy * px) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            k = a + 1 + i
+            keep[k] = True
+            spans += [(a, k), (k, b)]
+    return keep
+
+
+def encode_polyline(lat_lng: np.ndarray, precision: int = 5) -> str:
+    """
+    Encoded polyline (Google's format) of (N, 2) [lat, lng] rows: values are
+    quantized to `precision` decimals, delta-encoded and packed 5 bits per
+    character. Precision 5 is ~1 m and decodes with the usual polyline
+    libraries.
+    """
+    q = np.round(np.asarray(lat_lng, dtype=np.float64) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(q, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    out = []
+    for v in ((deltas << 1) ^ (deltas >> 63)).tolist():  # zigzag
+        while v >= 0x20:
+            out.append(chr((0x20 | (v & 0x1F)) + 63))
+            v >>= 5
+        out.append(chr(v + 63))
+    return "".join(out)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+    """[lat, lng] rows of an encoded polyline; inverse of encode_polyline."""
+    values, v, shift = [], 0, 0
+    for ch in encoded:
+        b = ord(ch) - 63
+        v |= (b & 0x1F) << shift
+        shift += 5
+        if b < 0x20:
+            values.append(~(v >> 1) if v & 1 else v >> 1)
+            v, shift = 0, 0
+    q = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0)
+    return (q / 10 ** precision).tolist()
+
+
+def _compact_ring(ring: np.ndarray, frame: LocalFrame, tolerance: float, precision: int):
+    if tolerance > 0:
+        x, y = frame.to_xy(ring[:, 0], ring[:, 1])
+        ring = ring[simplify_mask(np.column_stack([x, y]), tolerance)]
+    ring = np.round(ring, precision)
+    # quantizing can make neighbours identical; they would only add zero deltas
+    ring = ring[np.r_[True, np.any(ring[1:] != ring[:-1], axis=1)]]
+    if len(ring) < 4:
+        return None
+    return encode_polyline(ring[:, ::-1], precision)
+
+
+def compact_geometry(kind: str, geometry, precision: int = 5, zoom=None):
+    """
+    Plot.geometry for small payloads. Polygons become
+        {"type": "Polygon", "precision": 5, "rings": ["<encoded polyline>", ...]}
+    with [lat, lng] order inside the polylines, as that format expects.
+    Points and circle centres are rounded to `precision` decimals. With a
+    `zoom`, rings are first simplified to about half a pixel at that zoom;
+    holes that shrink below a pixel are dropped. Anything malformed is
+    returned unchanged.
+    """
+    try:
+        if kind == "circle":
+            return {
+                "center": [round(float(c), precision) for c in geometry["center"][:2]],
+                "radiusMeters": round(float(geometry["radiusMeters"]), 1),
+            }
+        if geometry.get("type") == "Point":
+            return {"type": "Point", "coordinates": [round(float(c), precision) for c in geometry["coordinates"][:2]]}
+        rings = [np.asarray(r, dtype=np.float64)[:, :2] for r in polygon_rings(geometry)]
+    except (AttributeError, KeyError, TypeError, ValueError, IndexError):
+        return geometry
+    if not rings:
+        return geometry
+
+    outer = rings[0]
+    frame = LocalFrame(outer[0, 0], outer[0, 1])
+    tolerance = 0.0
+    if zoom is not None:
+        tolerance = 0.5 * METRES_PER_PIXEL_Z0 * np.cos(np.radians(outer[0, 1])) / 2 ** zoom
+    encoded = []
+    for i, ring in enumerate(rings):
+        if not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack([ring, ring[:1]])
+        packed = _compact_ring(ring, frame, tolerance, precision)
+        if packed is None and i == 0:
+            # the whole plot is under a pixel: keep its shape rather than lose it
+            packed = _compact_ring(ring, frame, 0.0, precision)
+            if packed is None:
+                return geometry  # degenerate
+        if packed is not None:
+            encoded.append(packed)
+    return {"type": "Polygon", "precision": precision, "rings": encoded}
@@ -0,0 +1,152 @@
+"""
+Planting-position layouts: the lattice points that fit inside a plot.
+
+Candidates are generated a band of lattice rows at a time and filtered with
+the row-wise vectorized tests in plots.geometry, so memory stays proportional
+to the band, not the plot. Results are cached as quantized int32 pairs keyed by
+(geometry hash, spacing, pattern, buffer).
+"""
+import hashlib
+import json
+import math
+from typing import Iterator, Optional
+
+import numpy as np
+from django.core.cache import cache
+
+from .geometry import LocalFrame, lattice_clear_of_rings, lattice_in_rings, polygon_rings, ring_array
+
+PATTERNS = ("grid", "hex")
+# Coordinates are stored as integers of 1e-7 degrees (~1 cm).
+SCALE = 10_000_000
+MAX_POINTS = 2_000_000
+# Candidate points generated per band before filtering.
+BAND_POINTS = 250_000
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class LayoutError(ValueError):
+    pass
+
+
+def geometry_hash(geometry) -> str:
+    return hashlib.sha1(
+        json.dumps(geometry, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def _cache_key(geometry, spacing: float, pattern: str, buffer: float) -> str:
+    return f"plots:layout:{geometry_hash(geometry)}:{spacing:g}:{pattern}:{buffer:g}"
+
+
+def _shape(plot_type: str, geometry):
+    """(frame, rings in metres or None, circle radius or None, bbox)."""
+    if plot_type == "circle":
+        try:
+            lng, lat = (float(v) for v in geometry["center"][:2])
+            radius = float(geometry["radiusMeters"])
+        except (KeyError, TypeError, ValueError):
+            raise LayoutError("Circle geometry must contain center [lng,lat] and radiusMeters.")
+        return LocalFrame(lng, lat), None, radius, (-radius, -radius, radius, radius)
+
+    rings = polygon_rings(geometry)
+    if not rings:
+        raise LayoutError("Layouts need a polygon, rectangle or circle plot.")
+    try:
+        rings = [ring_array(r) for r in rings]
+    except (TypeError, ValueError):
+        raise LayoutError("Polygon rings must be lists of [lng, lat] positions.")
+    outer = rings[0]
+    frame = LocalFrame(outer[:, 0].mean(), outer[:, 1].mean())
+    xy_rings = []
+    for arr in rings:
+        x, y = frame.to_xy(arr[:, 0], arr[:, 1])
+        xy_rings.append(np.column_stack([x, y]))
+    ox, oy = xy_rings[0][:, 0], xy_rings[0][:, 1]
+    return frame, xy_rings, None, (ox.min(), oy.min(), ox.max(), oy.max())
+
+
+def generate_layout(plot_type: str, geometry, spacing: float, pattern: str, buffer: float) -> np.ndarray:
+    """Planting positions as an (n, 2) int32 array of [lng, lat] * SCALE."""
+    frame, rings, radius, (minx, miny, maxx, maxy) = _shape(plot_type, geometry)
+
+    # Anchor the lattice one buffer in from the bbox corner, so rectangular
+    # plots get the full row/column count along both edges.
+    row_step = spacing * (math.sqrt(3) / 2 if pattern == "hex" else 1.0)
+    if not all(math.isfinite(v) for v in (spacing, buffer, minx, miny, maxx, maxy)) or spacing <= 0:
+        raise LayoutError("Spacing, buffer and geometry must be finite numbers.")
+    # size the lattice before allocating it: a tiny spacing must fail here, not in np.arange
+    n_cols = max(0, math.ceil((maxx - minx - 2 * buffer + 1e-9) / spacing))
+    n_rows = max(0, math.ceil((maxy - miny - 2 * buffer + 1e-9) / row_step))
+    if n_cols * n_rows > MAX_POINTS * 4:
+        raise LayoutError("Spacing is too small for this plot.")
+    cols = np.arange(minx + buffer, maxx - buffer + 1e-9, spacing)
+    rows = np.arange(miny + buffer, maxy - buffer + 1e-9, row_step)
+
+    rows_per_band = max(1, BAND_POINTS // max(len(cols), 1))
+    kept = []
+    total = 0
+    for start in range(0, len(rows), rows_per_band):
+        band = np.arange(start, min(start + rows_per_band, len(rows)))
+        x = np.broadcast_to(cols, (len(band), len(cols))).copy()
+        if pattern == "hex":
+            x[band % 2 == 1] += spacing / 2
+        row_y = rows[band]
+
+        if radius is not None:
+            mask = np.hypot(x, row_y[:, None]) <= radius - buffer
+        else:
+            mask = lattice_in_rings(x, row_y, rings)
+            if buffer > 0 and mask.any():
+                mask &= lattice_clear_of_rings(x, row_y, rings, buffer)
+
+        if mask.any():
+            y = np.broadcast_to(row_y[:, None], x.shape)
+            lng, lat = frame.to_lnglat(x[mask], y[mask])
+            kept.append(np.column_stack([np.rint(lng * SCALE), np.rint(lat * SCALE)]).astype(np.int32))
+            total += len(kept[-1])
+            if total > MAX_POINTS:
+                raise LayoutError(f"Layout exceeds {MAX_POINTS} positions; increase spacing.")
+
+    return np.concatenate(kept) if kept else np.zeros((0, 2), dtype=np.int32)
+
+
+def get_layout(plot, spacing: float, pattern: str, buffer: Optional[float] = None) -> np.ndarray:
+    if buffer is None:
+        buffer = spacing / 2
+    key = _cache_key(plot.geometry, spacing, pattern, buffer)
+    blob = cache.get(key)
+    if blob is not None:
+        return np.frombuffer(blob, dtype=np.int32).reshape(-1, 2)
+    points = generate_layout(plot.type, plot.geometry, spacing, pattern, buffer)
+    cache.set(key, points.tobytes(), CACHE_TIMEOUT)
+    return points
+
+
+# ---------------------------------------------------------------------------
+# Streaming encoders
+# ---------------------------------------------------------------------------
+CHUNK = 20_000
+
+
+def stream_geojson(points: np.ndarray, properties: dict) -> Iterator[bytes]:
+    yield (
+        '{"type":"Feature","properties":%s,"geometry":{"type":"MultiPoint","coordinates":['
+        % json.dumps(properties)
+    ).encode()
+    for start in range(0, len(points), CHUNK):
+        chunk = points[start:start + CHUNK] / SCALE
+        body = ",".join("[%.7f,%.7f]" % (lng, lat) for lng, lat in chunk.tolist())
+        yield ((b"," if start else b"") + body.encode())
+    yield b"]}}"
+
+
+def stream_compact(points: np.ndarray, properties: dict) -> Iterator[bytes]:
+    """{"scale":1e7, ..., "coordinates":[lng0,lat0,lng1,lat1,...]} as integers."""
+    header = dict(properties, scale=SCALE, count=len(points))
+    yield (json.dumps(header)[:-1] + ',"coordinates":[').encode()
+    flat = points.ravel()
+    for start in range(0, len(flat), CHUNK * 2):
+        body = ",".join(map(str, flat[start:start + CHUNK * 2].tolist()))
+        yield ((b"," if start else b"") + body.encode())
+    yield b"]}"
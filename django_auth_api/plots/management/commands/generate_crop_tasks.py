@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from plots.milestones import sync_plot_events
+from plots.models import Plot
+
+
+class Command(BaseCommand):
+    help = (
+        "Create/update/delete the generated crop-stage and harvest-window events "
+        "for every planted plot. Safe to rerun; intended for a nightly cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only regenerate this user's plots (user id).")
+        parser.add_argument("--chunk-size", type=int, default=5000,
+                            help="Approximate plots per batch (batches never split an owner).")
+
+    def handle(self, *args, **opts):
+        qs = Plot.objects.select_related("crop").order_by("owner_id", "id")
+        if opts["user"]:
+            qs = qs.filter(owner_id=opts["user"])
+
+        totals = {"created": 0, "updated": 0, "deleted": 0}
+        batch, owner = [], None
+
+        def flush():
+            for k, v in sync_plot_events(batch, prune_missing=True).items():
+                totals[k] += v
+            batch.clear()
+
+        for plot in qs.iterator(chunk_size=2000):
+            if plot.owner_id != owner and len(batch) >= opts["chunk_size"]:
+                flush()
+            owner = plot.owner_id
+            batch.append(plot)
+        flush()
+
+        self.stdout.write(self.style.SUCCESS(
+            "created={created} updated={updated} deleted={deleted}".format(**totals)
+        ))
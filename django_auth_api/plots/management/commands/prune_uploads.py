@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from plots.models import UploadSession
+from plots.uploads import discard
+
+
+class Command(BaseCommand):
+    help = "Delete resumable upload sessions (and their partial files) idle for --hours."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=48)
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(hours=opts["hours"])
+        n = 0
+        for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+            discard(session)
+            n += 1
+        self.stdout.write(self.style.SUCCESS(f"deleted={n}"))
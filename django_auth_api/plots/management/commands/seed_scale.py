@@ -0,0 +1,190 @@
+import io
+import math
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+
+from accounts.models import CustomUser, DashboardPreference, Event
+from crops.models import Crop
+from plots.models import CropMedia, Plot
+
+# Synthetic farms are scattered around south-east Queensland.
+REGION = (152.0, -28.5, 153.5, -26.5)  # min lng, min lat, max lng, max lat
+METRES_PER_DEGREE = 111_320.0
+GROWTH_STAGES = ["", "seedling", "vegetative", "flowering", "fruiting", "harvest"]
+EVENT_TITLES = ["Water", "Fertilise", "Weed", "Spray for pests", "Prune", "Check irrigation", "Harvest"]
+EVENT_STATUSES = ["not_started"] * 3 + ["in_progress", "completed"]
+DEFAULT_WIDGETS = [{"name": n, "visible": True} for n in ("weather", "tasks", "plots")]
+IMAGE_POOL = 32
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load synthetic users, plots, events and media for load and "
+        "performance testing. Signals are bypassed, so generated crop-stage "
+        "events and rotation caches are not built."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--plots-per-user", type=int, default=10)
+        parser.add_argument("--events-per-user", type=int, default=100)
+        parser.add_argument("--media", action="store_true", help="Attach generated images to plots.")
+        parser.add_argument("--images-per-plot", type=int, default=2)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, for reproducible datasets.")
+        parser.add_argument("--password", default="seed-password",
+                            help="Password for every generated user (hashed once).")
+
+    def handle(self, *args, **opts):
+        self.rng = random.Random(opts["seed"])
+        self.batch_size = opts["batch_size"]
+        started = time.monotonic()
+
+        users = self.create_users(opts["users"], opts["password"])
+        crop_ids = list(Crop.objects.values_list("id", flat=True)) or [None]
+        plot_ids = self.create_plots(users, opts["plots_per_user"], crop_ids)
+        events = self.bulk(Event, (
+            self.event(user_id) for user_id in users for _ in range(opts["events_per_user"])
+        ))
+        media = 0
+        if opts["media"]:
+            images = self.image_pool(opts["seed"])
+            media = self.bulk(CropMedia, (
+                CropMedia(plot_id=plot_id, image=self.rng.choice(images), caption=f"Photo {n + 1}")
+                for plot_id in plot_ids for n in range(opts["images_per_plot"])
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"users={len(users)} plots={len(plot_ids)} events={events} media={media} "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    def bulk(self, model, objs) -> int:
+        """bulk_create from a generator, one transaction per batch; returns the row count."""
+        total, batch = 0, []
+        for obj in objs:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                total += self._flush(model, batch)
+        if batch:
+            total += self._flush(model, batch)
+        return total
+
+    def _flush(self, model, batch):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+        n = len(batch)
+        batch.clear()
+        return n
+
+    # -- users ----------------------------------------------------------------
+    def create_users(self, n, password):
+        # Continue numbering after earlier runs so emails stay unique.
+        start = CustomUser.objects.filter(email__startswith="seed", email__endswith="@example.com").count()
+        emails = [f"seed{i}@example.com" for i in range(start, start + n)]
+        hashed = make_password(password)
+        # bulk_create skips post_save, so create_dashboard_pref is replaced by
+        # one bulk insert below.
+        self.bulk(CustomUser, (CustomUser(email=e, password=hashed) for e in emails))
+        user_ids = []
+        for i in range(0, len(emails), self.batch_size):
+            user_ids += CustomUser.objects.filter(email__in=emails[i:i + self.batch_size]).values_list("id", flat=True)
+        self.bulk(DashboardPreference, (
+            DashboardPreference(user_id=uid, widgets=DEFAULT_WIDGETS) for uid in user_ids
+        ))
+        return user_ids
+
+    # -- plots ----------------------------------------------------------------
+    def create_plots(self, user_ids, per_user, crop_ids):
+        plots = []
+        for user_id in user_ids:
+            # Each user's plots cluster around one farm.
+            farm = (self.rng.uniform(REGION[0], REGION[2]), self.rng.uniform(REGION[1], REGION[3]))
+            for i in range(per_user):
+                plots.append(self.plot(user_id, farm, i, self.rng.choice(crop_ids)))
+                if len(plots) >= self.batch_size:
+                    self._flush_plots(plots)
+        self._flush_plots(plots)
+        ids = Plot.objects.filter(owner_id__in=user_ids).values_list("id", flat=True)
+        return list(ids.order_by("id"))
+
+    def _flush_plots(self, plots):
+        if plots:
+            self._flush(Plot, plots)
+
+    def plot(self, user_id, farm, i, crop_id):
+        kind = self.rng.choices(["polygon", "rectangle", "circle"], weights=[7, 2, 1])[0]
+        lng = farm[0] + self.rng.uniform(-0.005, 0.005)
+        lat = farm[1] + self.rng.uniform(-0.005, 0.005)
+        radius = self.rng.uniform(8, 80)
+        if kind == "circle":
+            geometry = {"center": [round(lng, 7), round(lat, 7)], "radiusMeters": round(radius, 1)}
+        else:
+            geometry = {"type": "Polygon", "coordinates": [self.ring(lng, lat, radius, kind)]}
+        planted = self.rng.random() < 0.7
+        return Plot(
+            owner_id=user_id,
+            type=kind,
+            geometry=geometry,
+            name=f"Block {i + 1}",
+            crop_id=crop_id if planted else None,
+            growth_stage=self.rng.choice(GROWTH_STAGES) if planted else "",
+            planted_at=date.today() - timedelta(days=self.rng.randint(0, 120)) if planted else None,
+        )
+
+    def ring(self, lng, lat, radius, kind):
+        """A closed [lng, lat] ring: a rotated rectangle or an irregular convex-ish polygon."""
+        if kind == "rectangle":
+            w, h = radius, radius * self.rng.uniform(0.4, 1.0)
+            corners = [(-w, -h), (w, -h), (w, h), (-w, h)]
+            theta = self.rng.uniform(0, math.pi)
+            offsets = [(x * math.cos(theta) - y * math.sin(theta), x * math.sin(theta) + y * math.cos(theta))
+                       for x, y in corners]
+        else:
+            n = self.rng.randint(5, 12)
+            angles = sorted(self.rng.uniform(0, 2 * math.pi) for _ in range(n))
+            offsets = [(math.cos(a) * radius * self.rng.uniform(0.6, 1.0),
+                        math.sin(a) * radius * self.rng.uniform(0.6, 1.0)) for a in angles]
+        k = METRES_PER_DEGREE * math.cos(math.radians(lat))
+        ring = [[round(lng + dx / k, 7), round(lat + dy / METRES_PER_DEGREE, 7)] for dx, dy in offsets]
+        return ring + [ring[0]]
+
+    # -- events ---------------------------------------------------------------
+    def event(self, user_id):
+        start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(
+            hours=self.rng.randint(-180 * 24, 180 * 24)
+        )
+        status = self.rng.choice(EVENT_STATUSES)
+        return Event(
+            user_id=user_id,
+            title=self.rng.choice(EVENT_TITLES),
+            start_dt=start,
+            end_dt=start + timedelta(hours=self.rng.choice([1, 1, 2, 4])),
+            status=status,
+            completed=status == "completed",
+        )
+
+    # -- media ----------------------------------------------------------------
+    def image_pool(self, seed):
+        """
+        A small pool of generated JPEGs that media rows share, so a million rows
+        don't mean a million files on disk.
+        """
+        names = []
+        for n in range(IMAGE_POOL):
+            name = f"plot_images/seed/{seed}-{n}.jpg"
+            if not default_storage.exists(name):
+                colour = tuple(self.rng.randint(40, 200) for _ in range(3))
+                buf = io.BytesIO()
+                Image.new("RGB", (64, 48), colour).save(buf, "JPEG", quality=70)
+                name = default_storage.save(name, ContentFile(buf.getvalue()))
+            names.append(name)
+        return names
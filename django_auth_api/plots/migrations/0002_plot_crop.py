@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0001_initial'),
+        ('plots', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plot',
+            name='crop',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='plots', to='crops.crop'),
+        ),
+    ]
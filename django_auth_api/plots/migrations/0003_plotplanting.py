@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0001_initial'),
+        ('plots', '0002_plot_crop'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlotPlanting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('planted_at', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plantings', to='crops.crop')),
+                ('plot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plantings', to='plots.plot')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['plot', '-created_at'], name='plots_plotp_plot_id_9c1c1a_idx')],
+            },
+        ),
+    ]
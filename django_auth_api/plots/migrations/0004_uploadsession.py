@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:30
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plots', '0003_plotplanting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=200)),
+                ('caption', models.CharField(blank=True, default='', max_length=200)),
+                ('size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('media', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='plots.cropmedia')),
+                ('plot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='plots.plot')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:34
+
+import plots.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plots', '0004_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cropmedia',
+            name='thumbnail',
+            field=models.ImageField(blank=True, db_index=True, default='', upload_to=plots.models.plot_thumbnail_path),
+        ),
+        migrations.AlterField(
+            model_name='cropmedia',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to=plots.models.plot_media_path),
+        ),
+        migrations.AddIndex(
+            model_name='cropmedia',
+            index=models.Index(fields=['plot', '-created_at'], name='plots_cropm_plot_id_c0cdc7_idx'),
+        ),
+    ]
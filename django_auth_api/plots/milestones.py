@@ -0,0 +1,141 @@
+"""
+Crop-stage tasks generated from planted plots.
+
+Every plot with a crop and a planted_at date gets one calendar Event per
+expected growth stage plus a harvest-window Event. Generated events carry a
+source_key ("plot:<id>:stage:<n>", "plot:<id>:harvest") so regeneration diffs
+against what already exists and only inserts, updates or deletes the rows that
+changed. Task status/completion set by the user is never overwritten.
+"""
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone as dj_timezone
+
+from accounts.models import Event, invalidate_dashboard_summary
+from crops.response_cache import invalidate, tag
+
+BATCH_SIZE = 1000
+# Stage names that mean "harvest"; the harvest window event covers these.
+HARVEST_STAGES = {"harvest", "harvesting", "ripening", "maturity"}
+SYNCED_FIELDS = ["title", "notes", "start_dt", "end_dt", "all_day"]
+
+# Sent with user_ids after a sync that created or updated events; the bulk
+# writes send no per-row signals.
+events_synced = Signal()
+
+
+def plot_prefix(plot_id) -> str:
+    return f"plot:{plot_id}:"
+
+
+def _day(d, offset_days: int) -> datetime:
+    return datetime.combine(d + timedelta(days=offset_days), time.min, tzinfo=timezone.utc)
+
+
+def plot_milestones(plot) -> Dict[str, dict]:
+    """Desired generated events for one plot, keyed by source_key."""
+    crop = plot.crop
+    if not plot.planted_at or crop is None:
+        return {}
+    days = crop.harvest_days
+    if not days:
+        return {}
+    first, last = days
+    prefix = plot_prefix(plot.id)
+    notes = f"{crop.name} planted {plot.planted_at.isoformat()}"
+    out = {}
+
+    stages = [s for s in crop.stage_list if s.lower() not in HARVEST_STAGES]
+    for i, stage in enumerate(stages[1:], start=1):
+        # Stages are spread evenly between planting and the earliest harvest.
+        start = _day(plot.planted_at, round(first * i / len(stages)))
+        out[f"{prefix}stage:{i}"] = {
+            "title": f"Expect {stage.lower()}: {plot.name}",
+            "notes": notes,
+            "start_dt": start,
+            "end_dt": start + timedelta(days=1),
+            "all_day": True,
+        }
+
+    out[f"{prefix}harvest"] = {
+        "title": f"Harvest window: {plot.name}",
+        "notes": notes,
+        "start_dt": _day(plot.planted_at, first),
+        "end_dt": _day(plot.planted_at, last + 1),
+        "all_day": True,
+    }
+    return out
+
+
+@transaction.atomic
+def sync_plot_events(plots: Iterable, prune_missing: bool = False) -> Dict[str, int]:
+    """
+    Bring generated events for `plots` in line with plot_milestones().
+    Plots should have `crop` selected. With prune_missing=True, generated
+    events for the owners' plots that are not in `plots` are deleted too, so
+    `plots` must then hold every plot of each owner it mentions (the nightly
+    full run uses this to sweep up after plots that were removed).
+    """
+    plots = list(plots)
+    if not plots:
+        return {"created": 0, "updated": 0, "deleted": 0}
+
+    desired: Dict[tuple, dict] = {}
+    for plot in plots:
+        for key, fields in plot_milestones(plot).items():
+            desired[(plot.owner_id, key)] = fields
+
+    if len(plots) == 1:
+        existing_qs = Event.objects.filter(
+            user_id=plots[0].owner_id, source_key__startswith=plot_prefix(plots[0].id)
+        )
+    else:
+        existing_qs = Event.objects.filter(
+            user_id__in={p.owner_id for p in plots}, source_key__startswith="plot:"
+        )
+    in_batch = {plot_prefix(p.id) for p in plots}
+    existing = {}
+    stale: List[int] = []
+    for ev in existing_qs.only("id", "user_id", "source_key", *SYNCED_FIELDS):
+        prefix = ev.source_key[:ev.source_key.index(":", 5) + 1]
+        if (ev.user_id, ev.source_key) in desired:
+            existing[(ev.user_id, ev.source_key)] = ev
+        elif prune_missing or prefix in in_batch:
+            stale.append(ev.id)
+
+    now = dj_timezone.now()
+    to_create: List[Event] = []
+    to_update: List[Event] = []
+    for (user_id, key), fields in desired.items():
+        ev = existing.get((user_id, key))
+        if ev is None:
+            to_create.append(Event(user_id=user_id, source_key=key, **fields))
+        elif any(getattr(ev, f) != v for f, v in fields.items()):
+            for f, v in fields.items():
+                setattr(ev, f, v)
+            ev.updated_at = now  # bulk_update skips auto_now
+            to_update.append(ev)
+
+    Event.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    Event.objects.bulk_update(to_update, SYNCED_FIELDS + ["updated_at"], batch_size=BATCH_SIZE)
+    for i in range(0, len(stale), BATCH_SIZE):
+        Event.objects.filter(id__in=stale[i:i + BATCH_SIZE]).delete()
+
+    # bulk_create/bulk_update send no signals, so drop the cached responses here.
+    if to_create or to_update:
+        user_ids = {ev.user_id for ev in to_create + to_update}
+        for user_id in user_ids:
+            invalidate_dashboard_summary(user_id)
+            invalidate(tag("accounts.event", user=user_id))
+        events_synced.send(sender=Event, user_ids=user_ids)
+
+    return {"created": len(to_create), "updated": len(to_update), "deleted": len(stale)}
+
+
+def delete_plot_events(plot) -> None:
+    Event.objects.filter(
+        user_id=plot.owner_id, source_key__startswith=plot_prefix(plot.id)
+    ).delete()
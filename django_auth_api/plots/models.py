@@ -1,6 +1,10 @@
+import uuid
+
 from django.conf import settings
 from django.db import models
 
+from crops.response_cache import tag
+
 
 class Plot(models.Model):
     class PlotType(models.TextChoices):
@@ -19,6 +23,9 @@ class Plot(models.Model):
     name = models.CharField(max_length=120)
     notes = models.TextField(blank=True, default="")
 
+    crop = models.ForeignKey(
+        "crops.Crop", on_delete=models.SET_NULL, null=True, blank=True, related_name="plots"
+    )
     growth_stage = models.CharField(max_length=64, blank=True, default="")
     planted_at = models.DateField(null=True, blank=True)
 
@@ -29,16 +36,64 @@ class Plot(models.Model):
         return f"{self.name} ({self.type})"
 
 
+def plot_cache_tags(plot_id, owner_id):
+    """Response-cache tags (crops.response_cache) that a change to this plot invalidates."""
+    return [tag("plots.plot"), tag("plots.plot", plot_id), tag("plots.plot", owner=owner_id)]
+
+
+class PlotPlanting(models.Model):
+    """One row per crop planted in a plot; the plot's rotation history."""
+    plot = models.ForeignKey(Plot, on_delete=models.CASCADE, related_name="plantings")
+    crop = models.ForeignKey("crops.Crop", on_delete=models.CASCADE, related_name="plantings")
+    planted_at = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["plot", "-created_at"])]
+
+    def __str__(self):
+        return f"{self.crop_id} in plot {self.plot_id}"
+
+
 def plot_media_path(instance, filename):
     # media/plot_images/<user_id>/<plot_id>/<filename>
     return f"plot_images/{instance.plot.owner_id}/{instance.plot_id}/{filename}"
 
 
+def plot_thumbnail_path(instance, filename):
+    return f"plot_images/{instance.plot.owner_id}/{instance.plot_id}/thumbs/{filename}"
+
+
 class CropMedia(models.Model):
     plot = models.ForeignKey(Plot, on_delete=models.CASCADE, related_name="images")
-    image = models.ImageField(upload_to=plot_media_path)
+    # indexed: protected_media looks files up by name
+    image = models.ImageField(upload_to=plot_media_path, db_index=True)
+    thumbnail = models.ImageField(upload_to=plot_thumbnail_path, blank=True, default="", db_index=True)
     caption = models.CharField(max_length=200, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["plot", "-created_at"])]
+
     def __str__(self):
         return f"Media for plot {self.plot_id}"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable plot-media upload in progress (see plots.uploads). The bytes
+    received so far live in a temporary file named after the id; once all
+    `size` bytes have arrived the file becomes a CropMedia row.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    plot = models.ForeignKey(Plot, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=200)
+    caption = models.CharField(max_length=200, blank=True, default="")
+    size = models.BigIntegerField()
+    media = models.OneToOneField(CropMedia, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id} for plot {self.plot_id}"
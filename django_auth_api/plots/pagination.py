@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class MediaCursorPagination(CursorPagination):
+    """
+    Newest-first cursor pages over a plot's photos, served from the
+    (plot, -created_at) index, so late pages cost the same as the first.
+
+    The body stays a plain list (what the app already parses). The cursors
+    for other pages are in the Link header (rel="next"/"prev").
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 30
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_paginated_response(self, data):
+        links = [
+            f'<{url}>; rel="{rel}"'
+            for url, rel in ((self.get_next_link(), "next"), (self.get_previous_link(), "prev"))
+            if url
+        ]
+        headers = {"Link": ", ".join(links)} if links else None
+        return Response(data, headers=headers)
@@ -0,0 +1,83 @@
+"""
+Planting plan: plant counts, seed and fertiliser quantities for a set of plots.
+
+Areas come from plots.geometry.areas_m2 in one vectorized pass; every other
+quantity is an array operation over the same plot axis.
+"""
+import math
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .geometry import areas_m2
+
+# Fraction of seeds expected to come up; seeds sown = plants / rate.
+DEFAULT_GERMINATION_RATE = 0.85
+DEFAULT_SEEDS_PER_PLANT = 1
+# General-purpose NPK application rate.
+DEFAULT_FERTILISER_KG_PER_HA = 150.0
+
+# Area one plant occupies, in units of spacing².
+CELL_FACTOR = {
+    "grid": 1.0,
+    "hex": math.sqrt(3) / 2,
+}
+
+
+def planting_plan(
+    plots,
+    pattern: str = "grid",
+    seeds_per_plant: float = DEFAULT_SEEDS_PER_PLANT,
+    germination_rate: float = DEFAULT_GERMINATION_RATE,
+    fertiliser_kg_per_ha: float = DEFAULT_FERTILISER_KG_PER_HA,
+) -> Dict[str, Any]:
+    """
+    `plots` is a list of Plot instances with `crop` selected. Plots without a
+    crop (or whose crop spacing can't be read) still report their area but no
+    plant or seed figures.
+    """
+    plots = list(plots)
+    area = areas_m2((p.type, p.geometry) for p in plots)
+
+    # Parse each distinct crop's spacing once, not once per plot.
+    spacing_by_crop = {}
+    for p in plots:
+        if p.crop_id is not None and p.crop_id not in spacing_by_crop:
+            spacing_by_crop[p.crop_id] = p.crop.spacing_m
+    spacing = np.array(
+        [spacing_by_crop.get(p.crop_id) or np.nan for p in plots], dtype=np.float64
+    )
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        plants = np.floor(area / (np.square(spacing) * CELL_FACTOR[pattern]))
+        seeds = np.ceil(plants * seeds_per_plant / germination_rate)
+    fertiliser = area / 10_000.0 * fertiliser_kg_per_ha
+    has_crop = ~np.isnan(plants)
+
+    rows: List[Dict[str, Any]] = []
+    area_l, plants_l, seeds_l, fert_l = (
+        np.round(area, 2).tolist(), plants.tolist(), seeds.tolist(), np.round(fertiliser, 3).tolist()
+    )
+    for i, p in enumerate(plots):
+        rows.append({
+            "id": p.id,
+            "name": p.name,
+            "crop": p.crop_id,
+            "spacing_m": spacing_by_crop.get(p.crop_id),
+            "area_m2": area_l[i],
+            "plants": int(plants_l[i]) if has_crop[i] else None,
+            "seeds": int(seeds_l[i]) if has_crop[i] else None,
+            "fertiliser_kg": fert_l[i],
+        })
+
+    return {
+        "pattern": pattern,
+        "plots": rows,
+        "totals": {
+            "plots": len(plots),
+            "area_m2": round(float(area.sum()), 2),
+            "plants": int(plants[has_crop].sum()),
+            "seeds": int(seeds[has_crop].sum()),
+            "fertiliser_kg": round(float(fertiliser.sum()), 3),
+        },
+    }
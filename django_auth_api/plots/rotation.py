@@ -0,0 +1,363 @@
+"""
+Crop rotation / companion-planting recommendations.
+
+Two structures are precomputed and kept in the cache so a recommendation is a
+lookup plus one small vector ranking:
+
+* the crop matrix: rotation[i, j] (how good crop j is after crop i) and
+  companion[i, j] (how well j grows next to i) over the whole catalog,
+  derived from botanical family and plant_type;
+* a per-user adjacency graph of plots whose extents lie within
+  NEIGHBOUR_DISTANCE_M of each other.
+
+Both are patched in place once a Crop or Plot write commits (see
+plots.signals) rather than rebuilt. Each also records a stamp of the rows it
+describes (row count and latest updated_at). Reads compare the stamp with
+one aggregate query and rebuild on a mismatch. A patch only advances the
+stamp when its own write explains the change. So a write the patches missed
+(another process with its own cache, a lost race, a bulk update) is
+rebuilt on the next read instead of being served stale.
+"""
+import copy
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from crops.models import Crop
+
+from .geometry import EARTH_RADIUS_M, polygon_rings
+
+MATRIX_KEY = "plots:rotation:matrix"
+ADJACENCY_KEY = "plots:rotation:adjacency:{user_id}"
+NEIGHBOUR_DISTANCE_M = 5.0
+# Stamps make stale entries rebuild; the timeout only bounds unused ones.
+CACHE_TIMEOUT = 60 * 60 * 24
+# Serializes this process's read-patch-write of a cached structure.
+_patch_lock = threading.Lock()
+# Weight of each earlier planting, most recent first.
+HISTORY_WEIGHTS = (1.0, 0.6, 0.3)
+
+# Keyword in the crop name -> botanical family.
+FAMILIES = {
+    "tomato": "Solanaceae", "potato": "Solanaceae", "capsicum": "Solanaceae",
+    "pepper": "Solanaceae", "eggplant": "Solanaceae", "chilli": "Solanaceae",
+    "kale": "Brassicaceae", "cabbage": "Brassicaceae", "broccoli": "Brassicaceae",
+    "cauliflower": "Brassicaceae", "radish": "Brassicaceae", "turnip": "Brassicaceae",
+    "corn": "Poaceae", "maize": "Poaceae", "wheat": "Poaceae", "barley": "Poaceae",
+    "oat": "Poaceae", "rice": "Poaceae", "sorghum": "Poaceae",
+    "bean": "Fabaceae", "pea": "Fabaceae", "lentil": "Fabaceae", "chickpea": "Fabaceae",
+    "clover": "Fabaceae", "lucerne": "Fabaceae",
+    "carrot": "Apiaceae", "parsley": "Apiaceae", "dill": "Apiaceae",
+    "coriander": "Apiaceae", "celery": "Apiaceae", "fennel": "Apiaceae",
+    "onion": "Amaryllidaceae", "garlic": "Amaryllidaceae", "leek": "Amaryllidaceae",
+    "chives": "Amaryllidaceae",
+    "mint": "Lamiaceae", "basil": "Lamiaceae", "oregano": "Lamiaceae",
+    "thyme": "Lamiaceae", "rosemary": "Lamiaceae", "sage": "Lamiaceae",
+    "lettuce": "Asteraceae", "sunflower": "Asteraceae",
+    "cucumber": "Cucurbitaceae", "pumpkin": "Cucurbitaceae", "zucchini": "Cucurbitaceae",
+    "melon": "Cucurbitaceae", "squash": "Cucurbitaceae",
+    "spinach": "Amaranthaceae", "beet": "Amaranthaceae", "chard": "Amaranthaceae",
+    "asparagus": "Asparagaceae",
+    "strawberry": "Rosaceae", "apple": "Rosaceae",
+    "orange": "Rutaceae", "lemon": "Rutaceae", "lime": "Rutaceae",
+}
+
+HEAVY_FEEDERS = {"Solanaceae", "Brassicaceae", "Poaceae", "Cucurbitaceae"}
+NITROGEN_FIXERS = {"Fabaceae"}
+
+# Symmetric family pairs that help / hinder each other when grown side by side.
+COMPANIONS = {
+    frozenset({"Solanaceae", "Lamiaceae"}), frozenset({"Solanaceae", "Apiaceae"}),
+    frozenset({"Solanaceae", "Amaryllidaceae"}), frozenset({"Brassicaceae", "Apiaceae"}),
+    frozenset({"Brassicaceae", "Amaryllidaceae"}), frozenset({"Brassicaceae", "Lamiaceae"}),
+    frozenset({"Poaceae", "Fabaceae"}), frozenset({"Poaceae", "Cucurbitaceae"}),
+    frozenset({"Fabaceae", "Cucurbitaceae"}), frozenset({"Asteraceae", "Apiaceae"}),
+}
+ANTAGONISTS = {
+    frozenset({"Solanaceae", "Brassicaceae"}), frozenset({"Fabaceae", "Amaryllidaceae"}),
+    frozenset({"Solanaceae", "Cucurbitaceae"}), frozenset({"Apiaceae", "Asparagaceae"}),
+}
+
+
+_FAMILY_PATTERNS = [(re.compile(rf"\b{kw}(e?s)?\b"), family) for kw, family in FAMILIES.items()]
+
+
+def crop_family(crop) -> str:
+    name = (crop.name or "").lower()
+    for pattern, family in _FAMILY_PATTERNS:
+        if pattern.search(name):
+            return family
+    # Unknown crops are grouped by their catalog plant_type.
+    return (crop.plant_type or crop.name or "").strip().title()
+
+
+# ---------------------------------------------------------------------------
+# Crop matrix
+# ---------------------------------------------------------------------------
+def _rotation_score(prev_family, prev_type, next_family, next_type) -> float:
+    if prev_family == next_family:
+        return -3.0
+    score = 1.0
+    if prev_family in HEAVY_FEEDERS and next_family in NITROGEN_FIXERS:
+        score += 2.0
+    if prev_family in NITROGEN_FIXERS and next_family in HEAVY_FEEDERS:
+        score += 2.0
+    if prev_type and prev_type == next_type:
+        score -= 0.5
+    return score
+
+
+def _companion_score(a_family, b_family) -> float:
+    if a_family == b_family:
+        return -0.5  # shared pests and diseases
+    pair = frozenset({a_family, b_family})
+    if pair in COMPANIONS:
+        return 1.0
+    if pair in ANTAGONISTS:
+        return -1.0
+    return 0.0
+
+
+def _scores_against(families, types, family, plant_type) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(rotation row, rotation column, companion row) for one crop vs the catalog."""
+    row = np.array([_rotation_score(family, plant_type, f, t) for f, t in zip(families, types)])
+    col = np.array([_rotation_score(f, t, family, plant_type) for f, t in zip(families, types)])
+    comp = np.array([_companion_score(family, f) for f in families])
+    return row, col, comp
+
+
+def build_matrix() -> Dict:
+    crops = list(Crop.objects.only("id", "name", "plant_type").order_by("id"))
+    families = [crop_family(c) for c in crops]
+    types = [(c.plant_type or "").strip().lower() for c in crops]
+    n = len(crops)
+    rotation = np.zeros((n, n))
+    companion = np.zeros((n, n))
+    for i in range(n):
+        rotation[i], _, companion[i] = _scores_against(families, types, families[i], types[i])
+    return {
+        "ids": [c.id for c in crops],
+        "names": [c.name for c in crops],
+        "families": families,
+        "types": types,
+        "rotation": rotation,
+        "companion": companion,
+    }
+
+
+def _stamp(qs) -> Tuple:
+    agg = qs.order_by().aggregate(n=Count("pk"), last=Max("updated_at"))
+    return agg["n"], agg["last"]
+
+
+def _cached(key: str, qs, build):
+    # stamp first: a write during the build leaves an entry that is already stale
+    stamp = _stamp(qs)
+    value = cache.get(key)
+    if value is None or value.get("stamp") != stamp:
+        value = build()
+        value["stamp"] = stamp
+        cache.set(key, value, CACHE_TIMEOUT)
+    return value
+
+
+def _patch_after_commit(key: str, qs, instance, created: bool, deleted: bool, apply) -> None:
+    # as of this write: delete() clears the pk and later saves may change fields
+    instance = copy.copy(instance)
+
+    def patch():
+        with _patch_lock:
+            value = cache.get(key)
+            if value is None:
+                return  # built lazily on next use
+            apply(value, instance, deleted)
+            n, last = value.get("stamp", (None, None))
+            if n is None:
+                expected = None
+            elif deleted:
+                # if the deleted row was the latest, the new latest is unknown
+                expected = (n - 1, last) if last and instance.updated_at < last else None
+            else:
+                expected = (n + created, max(t for t in (last, instance.updated_at) if t))
+            if expected is not None and _stamp(qs) == expected:
+                value["stamp"] = expected
+                cache.set(key, value, CACHE_TIMEOUT)
+            else:
+                cache.delete(key)  # other writes happened too: rebuild on next use
+
+    transaction.on_commit(patch)
+
+
+def get_matrix() -> Dict:
+    return _cached(MATRIX_KEY, Crop.objects.all(), build_matrix)
+
+
+def update_matrix_crop(crop, created: bool = False, deleted: bool = False) -> None:
+    """Patch one crop's row and column, after commit, instead of rebuilding the matrix."""
+    _patch_after_commit(MATRIX_KEY, Crop.objects.all(), crop, created, deleted, _patch_matrix)
+
+
+def _patch_matrix(matrix, crop, deleted: bool) -> None:
+    ids = matrix["ids"]
+    i = ids.index(crop.id) if crop.id in ids else None
+
+    if deleted:
+        if i is not None:
+            for key in ("ids", "names", "families", "types"):
+                del matrix[key][i]
+            for key in ("rotation", "companion"):
+                matrix[key] = np.delete(np.delete(matrix[key], i, axis=0), i, axis=1)
+    else:
+        family, plant_type = crop_family(crop), (crop.plant_type or "").strip().lower()
+        if i is None:
+            i = len(ids)
+            for key, value in (("ids", crop.id), ("names", crop.name),
+                               ("families", family), ("types", plant_type)):
+                matrix[key].append(value)
+            for key in ("rotation", "companion"):
+                matrix[key] = np.pad(matrix[key], ((0, 1), (0, 1)))
+        else:
+            matrix["names"][i], matrix["families"][i], matrix["types"][i] = crop.name, family, plant_type
+        row, col, comp = _scores_against(matrix["families"], matrix["types"], family, plant_type)
+        matrix["rotation"][i, :], matrix["rotation"][:, i] = row, col
+        matrix["companion"][i, :] = matrix["companion"][:, i] = comp
+
+
+# ---------------------------------------------------------------------------
+# Plot adjacency
+# ---------------------------------------------------------------------------
+def plot_bbox(plot_type: str, geometry) -> Optional[Tuple[float, float, float, float]]:
+    """(min lng, min lat, max lng, max lat) of a plot, or None if malformed."""
+    try:
+        if plot_type == "circle":
+            lng, lat = (float(v) for v in geometry["center"][:2])
+            r = float(geometry["radiusMeters"])
+            dlat = np.degrees(r / EARTH_RADIUS_M)
+            dlng = dlat / max(np.cos(np.radians(lat)), 1e-6)
+            return lng - dlng, lat - dlat, lng + dlng, lat + dlat
+        if plot_type == "point":
+            lng, lat = (float(v) for v in geometry["coordinates"][:2])
+            return lng, lat, lng, lat
+        rings = polygon_rings(geometry)
+        if not rings:
+            return None
+        arr = np.asarray(rings[0], dtype=np.float64)[:, :2]
+        return arr[:, 0].min(), arr[:, 1].min(), arr[:, 0].max(), arr[:, 1].max()
+    except (KeyError, TypeError, ValueError, IndexError):
+        return None
+
+
+def _near(boxes: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """Which of `boxes` lie within NEIGHBOUR_DISTANCE_M of `box` (vectorized)."""
+    k = np.pi / 180.0 * EARTH_RADIUS_M
+    kx = k * np.cos(np.radians((box[1] + box[3]) / 2))
+    gap_x = np.maximum(0.0, np.maximum(boxes[:, 0] - box[2], box[0] - boxes[:, 2])) * kx
+    gap_y = np.maximum(0.0, np.maximum(boxes[:, 1] - box[3], box[1] - boxes[:, 3])) * k
+    return np.hypot(gap_x, gap_y) <= NEIGHBOUR_DISTANCE_M
+
+
+def build_adjacency(user_id) -> Dict:
+    from .models import Plot
+
+    ids, boxes = [], []
+    for pid, kind, geometry in Plot.objects.filter(owner_id=user_id).values_list("id", "type", "geometry"):
+        box = plot_bbox(kind, geometry)
+        if box is not None:
+            ids.append(pid)
+            boxes.append(box)
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    neighbours = {}
+    for i, pid in enumerate(ids):
+        hits = np.flatnonzero(_near(boxes, boxes[i]))
+        neighbours[pid] = [ids[j] for j in hits if j != i]
+    return {"ids": ids, "boxes": boxes, "neighbours": neighbours}
+
+
+def _owner_plots(user_id):
+    from .models import Plot
+
+    return Plot.objects.filter(owner_id=user_id)
+
+
+def get_adjacency(user_id) -> Dict:
+    return _cached(ADJACENCY_KEY.format(user_id=user_id), _owner_plots(user_id), lambda: build_adjacency(user_id))
+
+
+def update_adjacency_plot(plot, created: bool = False, deleted: bool = False) -> None:
+    """Re-link one plot against the owner's others in a single vector pass, after commit."""
+    _patch_after_commit(ADJACENCY_KEY.format(user_id=plot.owner_id), _owner_plots(plot.owner_id),
+                        plot, created, deleted, _patch_adjacency)
+
+
+def _patch_adjacency(graph, plot, deleted: bool) -> None:
+    ids, boxes, neighbours = graph["ids"], graph["boxes"], graph["neighbours"]
+
+    if plot.id in neighbours:
+        i = ids.index(plot.id)
+        for other in neighbours.pop(plot.id):
+            neighbours[other].remove(plot.id)
+        del ids[i]
+        boxes = np.delete(boxes, i, axis=0)
+
+    box = None if deleted else plot_bbox(plot.type, plot.geometry)
+    if box is not None:
+        box = np.asarray(box, dtype=np.float64)
+        hits = [ids[j] for j in np.flatnonzero(_near(boxes, box))]
+        neighbours[plot.id] = hits
+        for other in hits:
+            neighbours[other].append(plot.id)
+        ids.append(plot.id)
+        boxes = np.vstack([boxes, box])
+
+    graph["boxes"] = boxes
+
+
+# ---------------------------------------------------------------------------
+# Ranking
+# ---------------------------------------------------------------------------
+def recommend(plot, limit: int = 5) -> List[Dict]:
+    from .models import Plot
+
+    matrix = get_matrix()
+    if not matrix["ids"]:
+        return []
+    index = {cid: i for i, cid in enumerate(matrix["ids"])}
+
+    history = list(plot.plantings.values_list("crop_id", flat=True)[:len(HISTORY_WEIGHTS)])
+    if plot.crop_id and (not history or history[0] != plot.crop_id):
+        history = [plot.crop_id] + history[:len(HISTORY_WEIGHTS) - 1]
+
+    neighbour_ids = get_adjacency(plot.owner_id)["neighbours"].get(plot.id, [])
+    neighbour_crops = [
+        cid for cid in Plot.objects.filter(id__in=neighbour_ids, crop__isnull=False)
+        .values_list("crop_id", flat=True)
+    ]
+
+    n = len(matrix["ids"])
+    rotation = np.zeros(n)
+    for weight, cid in zip(HISTORY_WEIGHTS, history):
+        if cid in index:
+            rotation += weight * matrix["rotation"][index[cid]]
+    companion = np.zeros(n)
+    rows = [index[cid] for cid in neighbour_crops if cid in index]
+    if rows:
+        companion = matrix["companion"][rows].mean(axis=0)
+
+    score = rotation + companion
+    order = np.argsort(-score, kind="stable")[:limit]
+    return [
+        {
+            "crop": matrix["ids"][j],
+            "name": matrix["names"][j],
+            "family": matrix["families"][j],
+            "score": round(float(score[j]), 3),
+            "rotation_score": round(float(rotation[j]), 3),
+            "companion_score": round(float(companion[j]), 3),
+        }
+        for j in order
+    ]
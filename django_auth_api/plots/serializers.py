@@ -1,35 +1,85 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.conf import settings
 from rest_framework import serializers
+
+from .geometry import compact_geometry
 from .models import Plot, CropMedia
 
+# Rendered unless ?fields= / ?omit= say otherwise.
+DEFAULT_FIELDS = (
+    "id", "type", "geometry", "name", "notes",
+    "crop", "growth_stage", "planted_at",
+    "created_at", "updated_at",
+    "images",
+)
+OPTIONAL_FIELDS = ("images_summary",)
+
 
 class CropMediaSerializer(serializers.ModelSerializer):
     url = serializers.SerializerMethodField(read_only=True)
+    thumbnail = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = CropMedia
-        fields = ["id", "url", "caption", "created_at"]
-        read_only_fields = ["id", "url", "created_at"]
+        fields = ["id", "url", "thumbnail", "caption", "created_at"]
+        read_only_fields = ["id", "url", "thumbnail", "created_at"]
 
-    def get_url(self, obj):
+    def _absolute(self, file):
         request = self.context.get("request")
-        if obj.image and hasattr(obj.image, "url"):
-            return request.build_absolute_uri(obj.image.url) if request else obj.image.url
+        if file and hasattr(file, "url"):
+            return request.build_absolute_uri(file.url) if request else file.url
         return None
 
+    def get_url(self, obj):
+        return self._absolute(obj.image)
+
+    def get_thumbnail(self, obj):
+        # photos Pillow couldn't read have no thumbnail; use the original
+        return self._absolute(obj.thumbnail) or self._absolute(obj.image)
+
 
 class PlotSerializer(serializers.ModelSerializer):
+    """
+    context["fields"] (see select_fields) limits the output to those fields;
+    images_summary is only rendered when asked for, and then expects the
+    queryset to come from with_images_summary(). context["geom"] (see
+    geometry_options) renders geometry with compact_geometry().
+    """
     images = CropMediaSerializer(many=True, read_only=True)
+    images_summary = serializers.SerializerMethodField()
 
     class Meta:
         model = Plot
         fields = [
             "id", "type", "geometry", "name", "notes",
-            "growth_stage", "planted_at",
+            "crop", "growth_stage", "planted_at",
             "created_at", "updated_at",
-            "images",
+            "images", "images_summary",
         ]
         read_only_fields = ["id", "created_at", "updated_at", "images"]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get("fields") or DEFAULT_FIELDS
+        for name in set(self.fields) - set(selected):
+            self.fields.pop(name)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        geom = self.context.get("geom")
+        if geom and "geometry" in data:
+            data["geometry"] = compact_geometry(instance.type, data["geometry"], **geom)
+        return data
+
+    def get_images_summary(self, obj):
+        cover = obj.cover_thumbnail or obj.cover_image
+        url = None
+        if cover:
+            url = CropMedia._meta.get_field("image").storage.url(cover)
+            request = self.context.get("request")
+            url = request.build_absolute_uri(url) if request else url
+        return {"count": obj.image_count or 0, "cover": url}
+
     def validate(self, attrs):
         # Minimal geometry validation (you can harden later)
         g = attrs.get("geometry")
@@ -51,3 +101,59 @@ class PlotSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Circle geometry must contain center [lng,lat] and radiusMeters.")
 
         return attrs
+
+
+def select_fields(params):
+    """
+    PlotSerializer fields for ?fields=id,name,images_summary or ?omit=geometry,images
+    ("id" is always included).
+    """
+    def names(key):
+        return [n.strip() for n in params.get(key, "").split(",") if n.strip()]
+
+    fields, omit = names("fields"), names("omit")
+    unknown = set(fields + omit) - set(DEFAULT_FIELDS + OPTIONAL_FIELDS)
+    if unknown:
+        raise serializers.ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}."})
+    selected = fields or DEFAULT_FIELDS
+    return ("id",) + tuple(f for f in selected if f != "id" and f not in omit)
+
+
+def geometry_options(params):
+    """
+    compact_geometry() arguments for ?geom=compact[&precision=5][&zoom=15],
+    or None for the default full-precision GeoJSON.
+    """
+    geom = params.get("geom", "full")
+    if geom == "full":
+        return None
+    if geom != "compact":
+        raise serializers.ValidationError({"geom": "Use full or compact."})
+
+    def bounded(key, low, high, default):
+        value = params.get(key)
+        if value in (None, ""):
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            value = None
+        if value is None or not low <= value <= high:
+            raise serializers.ValidationError({key: f"Expected an integer from {low} to {high}."})
+        return value
+
+    return {
+        "precision": bounded("precision", 0, 7, getattr(settings, "PLOT_GEOMETRY_PRECISION", 5)),
+        "zoom": bounded("zoom", 0, 24, None),
+    }
+
+
+def with_images_summary(qs):
+    """Annotate image_count and the newest photo's names without fetching the rows."""
+    images = CropMedia.objects.filter(plot=OuterRef("pk"))
+    newest = images.order_by("-created_at", "-id")
+    return qs.annotate(
+        image_count=Subquery(images.values("plot").annotate(n=Count("id")).values("n")[:1]),
+        cover_thumbnail=Subquery(newest.values("thumbnail")[:1]),
+        cover_image=Subquery(newest.values("image")[:1]),
+    )
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import invalidate_dashboard_summary
+from crops.models import Crop
+from crops.response_cache import invalidate
+from .milestones import delete_plot_events, sync_plot_events
+from .models import CropMedia, Plot, PlotPlanting, plot_cache_tags
+from .rotation import update_adjacency_plot, update_matrix_crop
+from .thumbnails import make_thumbnail
+
+
+@receiver(post_save, sender=Plot)
+def plot_saved(sender, instance, created=False, raw=False, **kwargs):
+    invalidate(*plot_cache_tags(instance.pk, instance.owner_id))
+    if raw:
+        return
+    invalidate_dashboard_summary(instance.owner_id)
+    sync_plot_events([instance])
+    update_adjacency_plot(instance, created=created)
+    if instance.crop_id:
+        last = instance.plantings.values_list("crop_id", "planted_at").first()
+        if last != (instance.crop_id, instance.planted_at):
+            PlotPlanting.objects.create(
+                plot=instance, crop_id=instance.crop_id, planted_at=instance.planted_at
+            )
+
+
+@receiver(post_delete, sender=Plot)
+def plot_deleted(sender, instance, **kwargs):
+    invalidate(*plot_cache_tags(instance.pk, instance.owner_id))
+    invalidate_dashboard_summary(instance.owner_id)
+    delete_plot_events(instance)
+    update_adjacency_plot(instance, deleted=True)
+
+
+@receiver(post_save, sender=Crop)
+def crop_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        update_matrix_crop(instance, created=created)
+
+
+@receiver(post_delete, sender=Crop)
+def crop_deleted(sender, instance, **kwargs):
+    update_matrix_crop(instance, deleted=True)
+
+
+@receiver(pre_save, sender=CropMedia)
+def media_thumbnail(sender, instance, raw=False, **kwargs):
+    # Before the insert, so the thumbnail is stored with the same query. Only
+    # new uploads: rows pointing at an already-stored name are left alone.
+    if raw or not instance._state.adding or instance.thumbnail or not instance.image:
+        return
+    if instance.image._committed:
+        return
+    thumb = make_thumbnail(instance.image.file)
+    if thumb is not None:
+        instance.thumbnail = thumb
+
+
+@receiver(post_save, sender=CropMedia)
+@receiver(post_delete, sender=CropMedia)
+def media_changed(sender, instance, raw=False, origin=None, **kwargs):
+    # Photos are part of the plot's representation, so its ETag and cached
+    # responses must change. (Deleting the plot itself is handled above.)
+    if raw or isinstance(origin, Plot):
+        return
+    Plot.objects.filter(pk=instance.plot_id).update(updated_at=timezone.now())
+    invalidate(*plot_cache_tags(instance.plot_id, instance.plot.owner_id))
@@ -1,3 +1,734 @@
-from django.test import TestCase
+import io
+import json
+import math
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser, Event
+from crops.models import Crop
+from .geometry import areas_m2, compact_geometry, decode_polyline, encode_polyline
+from .milestones import sync_plot_events
+from .rotation import MATRIX_KEY, build_adjacency, get_adjacency, get_matrix
+from mediastore.models import Blob
+from .models import CropMedia, Plot, UploadSession
+
+# ~100 m x ~100 m square at the equator (0.0009° ≈ 100.19 m)
+SQUARE = {
+    "type": "Polygon",
+    "coordinates": [[[0, 0], [0.0009, 0], [0.0009, 0.0009], [0, 0.0009], [0, 0]]],
+}
+SQUARE_M2 = (0.0009 * math.pi / 180 * 6378137.0) ** 2
+
+
+class GeometryAreaTests(TestCase):
+    def test_polygon_circle_and_point_areas(self):
+        with_hole = {
+            "type": "Polygon",
+            "coordinates": SQUARE["coordinates"] + [
+                [[0.0003, 0.0003], [0.0006, 0.0003], [0.0006, 0.0006], [0.0003, 0.0006]],
+            ],
+        }
+        areas = areas_m2([
+            ("polygon", SQUARE),
+            ("circle", {"center": [0, 0], "radiusMeters": 10}),
+            ("point", {"type": "Point", "coordinates": [0, 0]}),
+            ("polygon", with_hole),
+        ])
+        self.assertAlmostEqual(areas[0], SQUARE_M2, delta=SQUARE_M2 * 0.001)
+        self.assertAlmostEqual(areas[1], math.pi * 100, places=6)
+        self.assertEqual(areas[2], 0)
+        self.assertAlmostEqual(areas[3], SQUARE_M2 * 8 / 9, delta=SQUARE_M2 * 0.001)
+
+    def test_malformed_rings_have_no_area(self):
+        areas = areas_m2([
+            ("polygon", {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [2]]]}),
+            ("polygon", {"type": "Polygon", "coordinates": [[[0, 0], [1, "x"], [1, 0]]]}),
+            ("polygon", {"type": "Polygon", "coordinates": [[[0, 0], [0, 1], [1, float("nan")]]]}),
+            ("polygon", SQUARE),
+        ])
+        self.assertEqual(areas[:3].tolist(), [0, 0, 0])
+        self.assertGreater(areas[3], 0)
+
+
+def noisy_field(n=500):
+    """An ~200 m round field traced with n full-precision vertices."""
+    ring = [[151.2093 + 0.001 * math.cos(2 * math.pi * i / n) + 1e-9 * i,
+             -33.8688 + 0.001 * math.sin(2 * math.pi * i / n)] for i in range(n)]
+    return {"type": "Polygon", "coordinates": [ring + ring[:1]]}
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class CompactGeometryTests(TestCase):
+    def test_polyline_round_trip_and_simplification(self):
+        self.assertEqual(encode_polyline([[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]),
+                         "_p~iF~ps|U_ulLnnqC_mqNvxq`@")  # the format's reference example
+        ring = SQUARE["coordinates"][0]
+        full = compact_geometry("polygon", SQUARE)
+        self.assertEqual(decode_polyline(full["rings"][0]), [[lat, lng] for lng, lat in ring])
+
+        field = noisy_field()
+        vertices = [len(decode_polyline(compact_geometry("polygon", field, zoom=z)["rings"][0]))
+                    for z in (12, 16, 20)]
+        self.assertLess(vertices[0], vertices[1])
+        self.assertLess(vertices[1], vertices[2])
+        self.assertGreaterEqual(vertices[0], 4)
+        self.assertEqual(compact_geometry("circle", {"center": [1.23456789, 2], "radiusMeters": 12.345}),
+                         {"center": [1.23457, 2.0], "radiusMeters": 12.3})
+        self.assertEqual(compact_geometry("point", {"type": "Point", "coordinates": [1.23456789, 2]}, precision=3),
+                         {"type": "Point", "coordinates": [1.235, 2.0]})
+
+    def test_compact_plot_list_is_much_smaller(self):
+        user = CustomUser.objects.create_user(email="compact@example.com", password="x")
+        client = APIClient()
+        client.force_authenticate(user)
+        for i in range(5):
+            Plot.objects.create(owner=user, type="polygon", geometry=noisy_field(), name=f"Field {i}")
+
+        full = client.get("/api/plots/?omit=images")
+        compact = client.get("/api/plots/?omit=images&geom=compact&zoom=16")
+        self.assertEqual(compact.status_code, 200)
+        self.assertEqual(compact.data[0]["geometry"]["type"], "Polygon")
+        self.assertLess(len(compact.content) * 10, len(full.content))
+        self.assertEqual(client.get("/api/plots/?geom=tiny").status_code, 400)
+        self.assertEqual(client.get("/api/plots/?geom=compact&zoom=99").status_code, 400)
+
+
+class PlantingPlanTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="farmer@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.crop = Crop.objects.create(name="Kale", spacing="50 cm", harvest_time="60 days")
+
+    def test_plan_per_plot_and_totals(self):
+        Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE, name="A", crop=self.crop)
+        Plot.objects.create(owner=self.user, type="circle", name="B",
+                            geometry={"center": [0, 0], "radiusMeters": 10})
+        other = CustomUser.objects.create_user(email="other@example.com", password="x")
+        Plot.objects.create(owner=other, type="polygon", geometry=SQUARE, name="C", crop=self.crop)
+
+        r = self.client.get("/api/plots/planting-plan/?germination_rate=1")
+        self.assertEqual(r.status_code, 200)
+        a, b = r.data["plots"]
+        self.assertEqual(a["plants"], math.floor(a["area_m2"] / 0.25))
+        self.assertEqual(a["seeds"], a["plants"])
+        self.assertIsNone(b["plants"])
+        self.assertEqual(r.data["totals"]["plots"], 2)
+        self.assertEqual(r.data["totals"]["plants"], a["plants"])
+
+    def test_malformed_stored_plot_does_not_break_the_plan(self):
+        Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE, name="A", crop=self.crop)
+        # stored before validation tightened, or written around the API
+        Plot.objects.create(owner=self.user, type="polygon", name="Bad", crop=self.crop,
+                            geometry={"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [2]]]})
+        r = self.client.get("/api/plots/planting-plan/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([p["area_m2"] > 0 for p in r.data["plots"]], [True, False])
+
+    def test_rejects_bad_parameters(self):
+        for query in ("pattern=spiral", "seeds_per_plant=nan", "seeds_per_plant=-1",
+                      "fertiliser_kg_per_ha=inf", "germination_rate=nan"):
+            r = self.client.get(f"/api/plots/planting-plan/?{query}")
+            self.assertEqual(r.status_code, 400, query)
+
+
+class PlotLayoutTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="farmer@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.plot = Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE, name="A")
+
+    def test_grid_layout_counts(self):
+        # ~100 m square, 10 m spacing, 5 m buffer -> 10 x 10 positions
+        r = self.client.get(f"/api/plots/{self.plot.id}/layout/?spacing=10&output=compact")
+        self.assertEqual(r.status_code, 200)
+        body = json.loads(b"".join(r.streaming_content))
+        self.assertEqual(body["count"], 100)
+        self.assertEqual(len(body["coordinates"]), 200)
+
+    def test_hex_layout_is_denser_and_geojson(self):
+        grid = self.client.get(f"/api/plots/{self.plot.id}/layout/?spacing=5&buffer=0&output=binary")
+        hex_ = self.client.get(f"/api/plots/{self.plot.id}/layout/?spacing=5&buffer=0&pattern=hex")
+        feature = json.loads(b"".join(hex_.streaming_content))
+        self.assertEqual(feature["geometry"]["type"], "MultiPoint")
+        self.assertGreater(len(feature["geometry"]["coordinates"]), int(grid["X-Layout-Count"]))
+
+    def test_spacing_required_without_crop(self):
+        r = self.client.get(f"/api/plots/{self.plot.id}/layout/")
+        self.assertEqual(r.status_code, 400)
+
+    def test_rejects_unusable_spacing_before_allocating(self):
+        for query in ("spacing=1e-7", "spacing=nan", "spacing=inf", "spacing=1&buffer=nan"):
+            r = self.client.get(f"/api/plots/{self.plot.id}/layout/?{query}")
+            self.assertEqual(r.status_code, 400, query)
+
+    def test_malformed_stored_rings_are_a_bad_request(self):
+        for ring in ([[0, 0], [1, 1], [2]], [[0, 0], [1, "x"], [1, 0]]):
+            Plot.objects.filter(pk=self.plot.pk).update(geometry={"type": "Polygon", "coordinates": [ring]})
+            r = self.client.get(f"/api/plots/{self.plot.id}/layout/?spacing=10")
+            self.assertEqual(r.status_code, 400, ring)
+
+
+class CropTaskGenerationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="farmer@example.com", password="x")
+        self.crop = Crop.objects.create(
+            name="Corn", spacing="25 cm", harvest_time="60–100 days",
+            growth_stages="Germination, Tasseling, Silking, Maturity",
+        )
+
+    def _plot(self, **kw):
+        return Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE, name="North",
+                                   crop=self.crop, planted_at=date(2025, 9, 1), **kw)
+
+    def test_plot_save_generates_stage_and_harvest_events(self):
+        plot = self._plot()
+        events = Event.objects.filter(user=self.user).order_by("start_dt")
+        self.assertEqual(
+            [e.title for e in events],
+            ["Expect tasseling: North", "Expect silking: North", "Harvest window: North"],
+        )
+        harvest = events.last()
+        self.assertEqual(harvest.start_dt.date(), date(2025, 10, 31))
+        self.assertEqual(harvest.source_key, f"plot:{plot.id}:harvest")
+
+    def test_rerun_is_idempotent_and_edits_update_in_place(self):
+        plot = self._plot()
+        ids = set(Event.objects.values_list("id", flat=True))
+        self.assertEqual(sync_plot_events([plot]), {"created": 0, "updated": 0, "deleted": 0})
+
+        plot.planted_at = date(2025, 9, 10)
+        plot.save()
+        self.assertEqual(set(Event.objects.values_list("id", flat=True)), ids)
+        self.assertEqual(
+            Event.objects.get(source_key=f"plot:{plot.id}:harvest").start_dt.date(), date(2025, 11, 9)
+        )
+
+        plot.planted_at = None
+        plot.save()
+        self.assertFalse(Event.objects.exists())
+
+    def test_command_and_plot_delete(self):
+        plot = self._plot()
+        Event.objects.all().delete()
+        call_command("generate_crop_tasks", stdout=StringIO())
+        self.assertEqual(Event.objects.count(), 3)
+        plot.delete()
+        self.assertFalse(Event.objects.exists())
+
+
+class RotationRecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email="farmer@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tomato = Crop.objects.create(name="Tomato", spacing="45 cm", harvest_time="60 days",
+                                          plant_type="Vegetable")
+        self.bean = Crop.objects.create(name="Bush Bean", spacing="10 cm", harvest_time="55 days",
+                                        plant_type="Vegetable")
+        self.basil = Crop.objects.create(name="Basil", spacing="20 cm", harvest_time="40 days",
+                                         plant_type="Herb")
+        self.potato = Crop.objects.create(name="Potato", spacing="30 cm", harvest_time="90 days",
+                                          plant_type="Vegetable")
+
+    def _plot(self, geometry, crop=None):
+        return Plot.objects.create(owner=self.user, type="polygon", geometry=geometry, name="P", crop=crop)
+
+    def _recommend(self, plot):
+        r = self.client.get(f"/api/plots/{plot.id}/recommendations/?limit=4")
+        self.assertEqual(r.status_code, 200)
+        return [row["name"] for row in r.data["results"]]
+
+    def test_rotation_prefers_legume_after_nightshade(self):
+        plot = self._plot(SQUARE, crop=self.tomato)
+        names = self._recommend(plot)
+        self.assertEqual(names[0], "Bush Bean")
+        self.assertEqual(set(names[-2:]), {"Tomato", "Potato"})
+
+    def test_history_and_neighbours_are_tracked(self):
+        plot = self._plot(SQUARE, crop=self.tomato)
+        plot.crop = self.bean
+        plot.save()
+        self.assertEqual(
+            list(plot.plantings.values_list("crop__name", flat=True)), ["Bush Bean", "Tomato"]
+        )
+        self._recommend(plot)  # builds and caches the adjacency graph
+
+        shifted = {"type": "Polygon", "coordinates": [
+            [[x + 0.0009, y] for x, y in SQUARE["coordinates"][0]]
+        ]}
+        far = {"type": "Polygon", "coordinates": [[[x + 1, y] for x, y in SQUARE["coordinates"][0]]]}
+        with self.captureOnCommitCallbacks(execute=True):
+            neighbour = self._plot(shifted, crop=self.tomato)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._plot(far)
+
+        with mock.patch("plots.rotation.build_adjacency") as build:
+            graph = get_adjacency(self.user.id)
+        build.assert_not_called()  # the patches kept the stamp current
+        self.assertEqual(graph["neighbours"][plot.id], [neighbour.id])
+        rebuilt = build_adjacency(self.user.id)["neighbours"]
+        self.assertEqual({k: sorted(v) for k, v in graph["neighbours"].items()},
+                         {k: sorted(v) for k, v in rebuilt.items()})
+
+    def test_matrix_is_patched_on_catalog_change(self):
+        plot = self._plot(SQUARE, crop=self.tomato)
+        self._recommend(plot)
+        with self.captureOnCommitCallbacks(execute=True):
+            Crop.objects.create(name="Snow Pea", spacing="5 cm", harvest_time="60 days")
+        with mock.patch("plots.rotation.build_matrix") as build:
+            self.assertIn("Snow Pea", get_matrix()["names"])
+        build.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.basil.delete()
+        self.assertNotIn("Basil", self._recommend(plot))
+
+    def test_unpatched_writes_rebuild(self):
+        plot = self._plot(SQUARE, crop=self.tomato)
+        self._recommend(plot)
+        # bulk updates send no signals, like a write whose patch went to another cache
+        Crop.objects.filter(pk=self.bean.pk).update(name="Runner Bean", updated_at=timezone.now())
+        self.assertIn("Runner Bean", self._recommend(plot))
+        # patches wait for the commit; an uncommitted write never reaches the cache
+        Crop.objects.create(name="Snow Pea", spacing="5 cm", harvest_time="60 days")
+        self.assertNotIn("Snow Pea", cache.get(MATRIX_KEY)["names"])
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)  # measures the uncached path
+class PlotQueryCountTests(TestCase):
+    """
+    Query counts must not grow with the number of plots or images; an N+1 in
+    PlotSerializer/CropMediaSerializer fails here before it reaches production.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="queries@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.crop = Crop.objects.create(name="Tomato", spacing="45 cm", harvest_time="60-85 days")
+
+    def seed(self, plots, images_per_plot=3):
+        for i in range(plots):
+            plot = Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE,
+                                       name=f"Bed {i}", crop=self.crop, planted_at=date(2025, 1, 1))
+            CropMedia.objects.bulk_create(
+                CropMedia(plot=plot, image=f"plot_images/{self.user.id}/{plot.id}/{j}.jpg")
+                for j in range(images_per_plot)
+            )
+        return plot
+
+    def count(self, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            r = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(r.status_code, 300, r.content[:200])
+        return len(ctx)
+
+    def assertFlat(self, url, budget):
+        self.seed(2)
+        small = self.count("get", url)
+        self.seed(8, images_per_plot=5)
+        large = self.count("get", url)
+        self.assertEqual(small, large, f"{url} grows with fixture size ({small} -> {large})")
+        self.assertLessEqual(large, budget)
+
+    # Reads include one aggregate for the ETag (see crops.conditional).
+    def test_plot_list(self):
+        self.assertFlat("/api/plots/", 3)
+
+    def test_plot_list_mine(self):
+        self.assertFlat("/api/plots/?mine=1", 3)
+
+    def test_plot_detail(self):
+        plot = self.seed(1, images_per_plot=10)
+        self.assertLessEqual(self.count("get", f"/api/plots/{plot.id}/"), 3)
+
+    def test_plot_list_sparse(self):
+        self.assertFlat("/api/plots/?fields=id,name,images_summary", 2)
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get("/api/plots/?fields=id,name")
+        self.assertNotIn("geometry", ctx.captured_queries[1]["sql"])
+        self.assertEqual(set(r.data[0]), {"id", "name"})
+
+    def test_plot_list_sparse_compact_geometry(self):
+        self.assertFlat("/api/plots/?fields=id,geometry&geom=compact", 2)
+
+    def test_media_list(self):
+        plot = self.seed(1, images_per_plot=2)
+        small = self.count("get", f"/api/plots/{plot.id}/media/")
+        CropMedia.objects.bulk_create(CropMedia(plot=plot, image=f"x/{j}.jpg") for j in range(40))
+        self.assertEqual(self.count("get", f"/api/plots/{plot.id}/media/"), small)
+        self.assertLessEqual(small, 2)
+
+    def test_media_upload(self):
+        plot = self.seed(1, images_per_plot=10)
+        image = SimpleUploadedFile("leaf.gif", b"GIF89a\x01\x00\x01\x00\x00\x00\x00;", content_type="image/gif")
+        n = self.count("post", f"/api/plots/{plot.id}/media/", data={"image": image, "caption": "leaf"},
+                       format="multipart")
+        # plot, media insert, the mediastore blob insert and refcount update,
+        # and touching the plot's updated_at (its ETag)
+        self.assertLessEqual(n, 5)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="sparse@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.plot = Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE, name="Bed", notes="n")
+        CropMedia.objects.bulk_create([
+            CropMedia(plot=self.plot, image="plot_images/a.jpg"),
+            CropMedia(plot=self.plot, image="plot_images/b.jpg", thumbnail="plot_images/thumbs/b.jpg"),
+        ])
+        Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE, name="Empty")
+
+    def test_default_is_unchanged(self):
+        r = self.client.get(f"/api/plots/{self.plot.id}/")
+        self.assertEqual(len(r.data["images"]), 2)
+        self.assertNotIn("images_summary", r.data)
+        self.assertIn("geometry", r.data)
+
+    def test_omit_and_summary(self):
+        r = self.client.get("/api/plots/?omit=geometry,notes,images&fields=id,name,geometry,images_summary")
+        self.assertEqual(r.status_code, 200)
+        by_name = {p["name"]: p for p in r.data}
+        self.assertEqual(set(by_name["Bed"]), {"id", "name", "images_summary"})
+        self.assertEqual(by_name["Bed"]["images_summary"],
+                         {"count": 2, "cover": "http://testserver/media/plot_images/thumbs/b.jpg"})
+        self.assertEqual(by_name["Empty"]["images_summary"], {"count": 0, "cover": None})
+
+    def test_unknown_field(self):
+        r = self.client.get("/api/plots/?fields=id,owner")
+        self.assertEqual(r.status_code, 400)
+
+    def test_writes_ignore_fields(self):
+        r = self.client.patch(f"/api/plots/{self.plot.id}/?fields=id", {"name": "Renamed"}, format="json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["name"], "Renamed")
+        self.assertIn("images", r.data)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)  # measures the uncached path
+class PlotConditionalTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="etag@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.plot = Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE, name="Bed")
+
+    def test_list_revalidates_until_plots_or_photos_change(self):
+        etag = self.client.get("/api/plots/?mine=1")["ETag"]
+        with self.assertNumQueries(1):
+            r = self.client.get("/api/plots/?mine=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        media = CropMedia.objects.create(plot=self.plot, image="plot_images/x.jpg")
+        r = self.client.get("/api/plots/?mine=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        etag = r["ETag"]
+        media.delete()
+        self.assertEqual(self.client.get("/api/plots/?mine=1", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_match(self):
+        url = f"/api/plots/{self.plot.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        r = self.client.patch(url, {"name": "North bed"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=r["ETag"]).status_code, 304)
+        r = self.client.patch(url, {"name": "South bed"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(r.status_code, 412)
+        self.assertEqual(Plot.objects.get(pk=self.plot.pk).name, "North bed")
+
+    def test_malformed_pk_is_not_found(self):
+        self.assertEqual(self.client.get("/api/plots/abc/").status_code, 404)
+        self.assertEqual(self.client.patch("/api/plots/abc/", {"name": "x"}, format="json").status_code, 404)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)  # off by default without a shared cache
+class PlotResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email="cache@example.com", password="x")
+        self.other = CustomUser.objects.create_user(email="other@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.plot = Plot.objects.create(owner=self.user, type="polygon", geometry=SQUARE, name="Bed")
+
+    def test_list_and_detail_hit_until_a_write(self):
+        for url in ("/api/plots/?mine=1", f"/api/plots/{self.plot.id}/"):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+        CropMedia.objects.create(plot=self.plot, image="plot_images/x.jpg")
+        self.assertEqual(len(self.client.get("/api/plots/?mine=1").data[0]["images"]), 1)
+        self.assertEqual(len(self.client.get(f"/api/plots/{self.plot.id}/").data["images"]), 1)
+
+    def test_precise_invalidation(self):
+        self.client.get("/api/plots/?mine=1")
+        # another user's plot leaves this user's ?mine=1 list alone...
+        Plot.objects.create(owner=self.other, type="polygon", geometry=SQUARE, name="Theirs")
+        with self.assertNumQueries(0):
+            self.client.get("/api/plots/?mine=1")
+        # ...but not the unscoped list, and entries are per user
+        self.assertEqual(len(self.client.get("/api/plots/").data), 2)
+        self.client.force_authenticate(self.other)
+        self.assertEqual([p["name"] for p in self.client.get("/api/plots/?mine=1").data], ["Theirs"])
+
+
+class SeedScaleTests(TestCase):
+    def test_seed_scale_creates_requested_rows(self):
+        from accounts.models import DashboardPreference
+
+        Crop.objects.create(name="Tomato", spacing="45 cm", harvest_time="60-85 days")
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            call_command("seed_scale", users=3, plots_per_user=4, events_per_user=5, media=True,
+                         images_per_plot=2, batch_size=4, stdout=StringIO())
+            self.assertEqual(CropMedia.objects.count(), 24)
+        self.assertEqual(CustomUser.objects.count(), 3)
+        self.assertEqual(DashboardPreference.objects.count(), 3)
+        self.assertEqual(Plot.objects.count(), 12)
+        self.assertEqual(Event.objects.count(), 15)
+        plots = list(Plot.objects.values_list("type", "geometry"))
+        self.assertTrue(all(a > 0 for a in areas_m2(plots)))
+
+
+
+class ProtectedMediaTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.owner = CustomUser.objects.create_user(email="owner@example.com", password="x")
+        self.other = CustomUser.objects.create_user(email="other@example.com", password="x")
+        plot = Plot.objects.create(owner=self.owner, type="polygon", geometry=SQUARE, name="Bed")
+        self.media = CropMedia.objects.create(
+            plot=plot, image=SimpleUploadedFile("leaf.jpg", b"\xff\xd8jpeg-bytes", content_type="image/jpeg")
+        )
+        self.url = "/media/" + self.media.image.name
+        self.client = APIClient()
+
+    def test_owner_only(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.owner)
+        r = self.client.get(self.url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(b"".join(r.streaming_content), b"\xff\xd8jpeg-bytes")
+        self.assertEqual(r["Cache-Control"], "private, max-age=31536000, immutable")
+
+    def test_jwt_bearer(self):
+        r = self.client.post("/api/auth/jwt/create/", {"email": "owner@example.com", "password": "x"}, format="json")
+        r = self.client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {r.data['access']}", HTTP_RANGE="bytes=0-1")
+        self.assertEqual(r.status_code, 206)
+        self.assertEqual(b"".join(r.streaming_content), b"\xff\xd8")
+
+
+class ResumableUploadTests(TestCase):
+    DATA = bytes(range(256)) * 1000  # 256000 bytes
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(MEDIA_ROOT=f"{self.root.name}/media",
+                                     RESUMABLE_UPLOAD_DIR=f"{self.root.name}/tmp")
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.owner = CustomUser.objects.create_user(email="owner@example.com", password="x")
+        self.plot = Plot.objects.create(owner=self.owner, type="polygon", geometry=SQUARE, name="Bed")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def start(self, size=None):
+        r = self.client.post(f"/api/plots/{self.plot.id}/uploads/",
+                             {"filename": "field.jpg", "size": size or len(self.DATA), "caption": "walk"},
+                             format="json")
+        self.assertEqual(r.status_code, 201, r.data)
+        return f"/api/plots/{self.plot.id}/uploads/{r.data['id']}/"
+
+    def put(self, url, start, data, total=None):
+        return self.client.generic(
+            "PUT", url, data, content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {start}-{start + len(data) - 1}/{total or len(self.DATA)}",
+        )
+
+    def test_chunked_upload_resumes_and_finalizes(self):
+        url = self.start()
+        r = self.put(url, 0, self.DATA[:100_000])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["offset"], 100_000)
+
+        # a replayed or skipped chunk is refused with the offset to resume from
+        r = self.put(url, 50_000, self.DATA[50_000:150_000])
+        self.assertEqual((r.status_code, r.data["offset"]), (409, 100_000))
+        self.assertEqual(self.client.get(url)["Upload-Offset"], "100000")
+
+        r = self.put(url, 100_000, self.DATA[100_000:])
+        self.assertEqual(r.status_code, 201)
+        media = CropMedia.objects.get(plot=self.plot)
+        self.assertEqual(media.caption, "walk")
+        with media.image.open("rb") as f:
+            self.assertEqual(f.read(), self.DATA)
+
+        # retrying the final chunk after a lost response is harmless
+        r = self.put(url, 100_000, self.DATA[100_000:])
+        self.assertEqual((r.status_code, r.data["id"]), (201, media.id))
+        self.assertEqual(CropMedia.objects.count(), 1)
+
+    def test_limits_and_ownership(self):
+        with override_settings(RESUMABLE_UPLOAD_MAX_BYTES=1000):
+            r = self.client.post(f"/api/plots/{self.plot.id}/uploads/",
+                                 {"filename": "big.jpg", "size": 1001}, format="json")
+            self.assertEqual(r.status_code, 413)
+        url = self.start()
+        self.assertEqual(self.put(url, 0, b"x" * 10, total=11).status_code, 400)
+
+        other = CustomUser.objects.create_user(email="other@example.com", password="x")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.put(url, 0, self.DATA[:10]).status_code, 403)
+
+        self.client.force_authenticate(self.owner)
+        self.put(url, 0, self.DATA[:10])
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        # a finalized session can be deleted too; its media stays
+        url = self.start()
+        self.put(url, 0, self.DATA)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(CropMedia.objects.count(), 1)
+
+    def test_failed_finalize_is_retried(self):
+        url = self.start()
+        with mock.patch("plots.uploads.CropMedia.objects.create", side_effect=OSError("disk full")), \
+                self.assertRaises(OSError):
+            self.put(url, 0, self.DATA)
+        self.assertFalse(CropMedia.objects.exists())
+        # the file is complete: the next GET (or PUT) finishes the job
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(self.client.get(url).data["id"], r.data["id"])
+        self.assertEqual(CropMedia.objects.count(), 1)
+
+    def test_bad_content_length(self):
+        url = self.start()
+        r = self.client.generic("PUT", url, self.DATA[:10], content_type="application/octet-stream",
+                                HTTP_CONTENT_RANGE=f"bytes 0-9/{len(self.DATA)}", CONTENT_LENGTH="ten")
+        self.assertEqual(r.status_code, 400)
+
+    def test_prune_keeps_uploads_that_are_still_receiving_chunks(self):
+        active, idle = self.start(), self.start()
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=3))
+        self.put(active, 0, self.DATA[:10])
+
+        call_command("prune_uploads", stdout=StringIO())
+
+        self.assertEqual(self.client.get(active).data["offset"], 10)
+        self.assertEqual(self.client.get(idle).status_code, 404)
+
+
+class PlotMediaListTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.owner = CustomUser.objects.create_user(email="owner@example.com", password="x")
+        self.plot = Plot.objects.create(owner=self.owner, type="polygon", geometry=SQUARE, name="Bed")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def jpeg(self, colour, size=(1200, 900)):
+        buf = io.BytesIO()
+        Image.new("RGB", size, colour).save(buf, "JPEG")
+        return SimpleUploadedFile("photo.jpg", buf.getvalue(), content_type="image/jpeg")
+
+    def test_upload_makes_thumbnail(self):
+        r = self.client.post(f"/api/plots/{self.plot.id}/media/", {"image": self.jpeg((200, 10, 10))},
+                             format="multipart")
+        self.assertEqual(r.status_code, 201)
+        media = CropMedia.objects.get(pk=r.data["id"])
+        with media.thumbnail.open("rb") as f, Image.open(f) as thumb:
+            self.assertEqual(thumb.size, (320, 240))
+        self.assertTrue(r.data["thumbnail"].endswith(media.thumbnail.url))
+        self.client.force_login(self.owner)  # /media/ is a plain Django view
+        self.assertEqual(self.client.get(r.data["thumbnail"]).status_code, 200)
+
+    def test_cursor_pages(self):
+        CropMedia.objects.bulk_create(
+            CropMedia(plot=self.plot, image=f"plot_images/{self.owner.id}/{self.plot.id}/{i}.jpg") for i in range(7)
+        )
+        seen = []
+        url = f"/api/plots/{self.plot.id}/media/?page_size=3"
+        while url:
+            r = self.client.get(url)
+            self.assertEqual(r.status_code, 200)
+            self.assertIsInstance(r.data, list)
+            seen += [m["id"] for m in r.data]
+            # no thumbnail yet: fall back to the original
+            self.assertEqual(r.data[0]["thumbnail"], r.data[0]["url"])
+            link = r.get("Link", "")
+            url = link.split(">", 1)[0][1:] if 'rel="next"' in link else None
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_listing_is_for_those_who_can_fetch_the_files(self):
+        CropMedia.objects.create(plot=self.plot, image=f"plot_images/{self.owner.id}/{self.plot.id}/a.jpg")
+        url = f"/api/plots/{self.plot.id}/media/"
+        self.client.force_authenticate(CustomUser.objects.create_user(email="other@example.com", password="x"))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_authenticate(CustomUser.objects.create_user(email="staff@example.com", password="x",
+                                                                      is_staff=True))
+        self.assertEqual(len(self.client.get(url).data), 1)
+
+    def test_delete(self):
+        r = self.client.post(f"/api/plots/{self.plot.id}/media/", {"image": self.jpeg((10, 200, 10))},
+                             format="multipart")
+        media = CropMedia.objects.get(pk=r.data["id"])
+        other = CustomUser.objects.create_user(email="other@example.com", password="x")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.delete(f"/api/plots/{self.plot.id}/media/{media.id}/").status_code, 403)
+
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.delete(f"/api/plots/{self.plot.id}/media/{media.id}/").status_code, 204)
+        self.assertFalse(CropMedia.objects.exists())
+        # shared blobs are released to gc_media rather than unlinked in the request
+        self.assertEqual(set(Blob.objects.values_list("name", "refcount")),
+                         {(media.image.name, 0), (media.thumbnail.name, 0)})
+        # and are not served in the meantime
+        self.assertEqual(self.client.get(f"/media/{media.image.name}").status_code, 404)
@@ -0,0 +1,35 @@
+"""
+Gallery thumbnails for plot photos.
+
+A JPEG no larger than THUMBNAIL_SIZE is made when a CropMedia row is first
+saved, so gallery pages can list a plot's photos without sending
+full-resolution images. Files Pillow cannot read get no thumbnail; clients
+then fall back to the original.
+"""
+import os
+from io import BytesIO
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+THUMBNAIL_SIZE = (320, 320)
+QUALITY = 80
+
+
+def make_thumbnail(image_file) -> Optional[ContentFile]:
+    name = os.path.splitext(os.path.basename(image_file.name or "image"))[0]
+    try:
+        image_file.seek(0)
+        with Image.open(image_file) as im:
+            # JPEGs can be decoded at 1/2..1/8 scale, which is much cheaper.
+            im.draft("RGB", THUMBNAIL_SIZE)
+            im = ImageOps.exif_transpose(im)
+            im.thumbnail(THUMBNAIL_SIZE)
+            buf = BytesIO()
+            im.convert("RGB").save(buf, "JPEG", quality=QUALITY, optimize=True)
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError):
+        return None
+    finally:
+        image_file.seek(0)
+    return ContentFile(buf.getvalue(), name=f"{name}.jpg")
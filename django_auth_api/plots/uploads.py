@@ -0,0 +1,129 @@
+"""
+Resumable plot-media uploads.
+
+    POST   /api/plots/{id}/uploads/        {"filename", "size", "caption"} -> session id
+    PUT    /api/plots/{id}/uploads/{uid}/  Content-Range: bytes <start>-<end>/<size>, raw body
+    GET    /api/plots/{id}/uploads/{uid}/  -> {"offset": bytes stored so far}
+    DELETE /api/plots/{id}/uploads/{uid}/  -> abandon
+
+Each PUT is streamed from the socket straight onto the end of a temporary
+file in fixed-size reads, so worker memory does not depend on chunk or file
+size. The file on disk is the source of truth for the offset. If a connection
+drops mid-chunk, whatever arrived is kept and the client resumes from GET's
+offset. The PUT that completes the file turns it into a CropMedia row; if
+that fails, the next GET or PUT on the complete file tries again.
+Every chunk that stores bytes touches the session's updated_at, which
+prune_uploads uses to find abandoned uploads.
+"""
+import fcntl
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CropMedia, UploadSession
+
+READ_SIZE = 64 * 1024
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def upload_dir() -> str:
+    path = getattr(settings, "RESUMABLE_UPLOAD_DIR", None) or os.path.join(settings.BASE_DIR, "upload_tmp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def temp_path(session) -> str:
+    return os.path.join(upload_dir(), f"{session.id}.part")
+
+
+def max_size() -> int:
+    return getattr(settings, "RESUMABLE_UPLOAD_MAX_BYTES", 50 * 1024 * 1024)
+
+
+def offset(session) -> int:
+    try:
+        return os.path.getsize(temp_path(session))
+    except FileNotFoundError:
+        return 0
+
+
+def parse_content_range(header: str, size: int):
+    m = _CONTENT_RANGE.match((header or "").strip())
+    if not m:
+        raise UploadError("Content-Range: bytes <start>-<end>/<size> is required.")
+    start, end, total = (int(g) for g in m.groups())
+    if total != size or end < start or end >= size:
+        raise UploadError(f"Content-Range must lie within the declared size ({size} bytes).")
+    return start, end
+
+
+def append_chunk(session, stream, content_range: str, content_length) -> int:
+    """Append one chunk from `stream`; returns the new offset."""
+    start, end = parse_content_range(content_range, session.size)
+    length = end - start + 1
+    if content_length is not None:
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            raise UploadError("Content-Length must be an integer.")
+        if content_length != length:
+            raise UploadError("Content-Length does not match Content-Range.")
+
+    with open(temp_path(session), "ab") as f:
+        try:
+            # One writer per upload; a second concurrent PUT is told to retry.
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError("Another chunk for this upload is in progress.", status=409, offset=offset(session))
+        current = f.seek(0, os.SEEK_END)
+        if start != current:
+            raise UploadError("Chunk does not start at the current offset.", status=409, offset=current)
+
+        remaining = length
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break  # client went away: keep what arrived, it can resume
+            f.write(data)
+            remaining -= len(data)
+        f.flush()
+        if remaining < length:
+            UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+        return f.tell()
+
+
+def finalize(session) -> CropMedia:
+    """Turn the completed temporary file into a CropMedia row, once."""
+    path = temp_path(session)
+    with transaction.atomic():
+        # a GET and a PUT may both find the file complete
+        locked = UploadSession.objects.select_for_update().select_related("media").get(pk=session.pk)
+        if locked.media_id:
+            return locked.media
+        with open(path, "rb") as f:
+            media = CropMedia.objects.create(
+                plot=session.plot, image=File(f, name=session.filename), caption=session.caption
+            )
+        locked.media = media
+        locked.save(update_fields=["media", "updated_at"])
+    os.remove(path)
+    return media
+
+
+def discard(session) -> None:
+    try:
+        os.remove(temp_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
@@ -1,34 +1,157 @@
+import math
+
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.authentication import CachedJWTAuthentication
+from crops.conditional import collection_validators, object_validators, precondition, set_validators
+from crops.media import serve_file
+from crops.response_cache import cached_response, tag
+from mediastore.models import Blob
+from mediastore.storage import IMMUTABLE_CACHE_CONTROL, is_content_addressed
 
-from .models import Plot, CropMedia
-from .serializers import PlotSerializer, CropMediaSerializer
+from . import layout, uploads
+from .rotation import recommend
+from .models import Plot, CropMedia, UploadSession
+from .pagination import MediaCursorPagination
+from .serializers import (
+    DEFAULT_FIELDS,
+    CropMediaSerializer,
+    PlotSerializer,
+    geometry_options,
+    select_fields,
+    with_images_summary,
+)
 from .permissions import IsOwnerOrReadOnly
+from .planning import (
+    CELL_FACTOR,
+    DEFAULT_FERTILISER_KG_PER_HA,
+    DEFAULT_GERMINATION_RATE,
+    DEFAULT_SEEDS_PER_PLANT,
+    planting_plan,
+)
+
+
+PLOT_COLUMNS = {f.name for f in Plot._meta.concrete_fields}
 
 
 class PlotViewSet(viewsets.ModelViewSet):
     serializer_class = PlotSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
 
+    def get_fields(self):
+        """Serializer fields for this request; ?fields=/?omit= apply to reads only."""
+        if self.action in ("list", "retrieve"):
+            return select_fields(self.request.query_params)
+        return DEFAULT_FIELDS
+
+    def get_serializer_context(self):
+        context = {**super().get_serializer_context(), "fields": self.get_fields()}
+        if self.action in ("list", "retrieve"):
+            # ?geom=compact: encoded polylines, optionally simplified for ?zoom=
+            context["geom"] = geometry_options(self.request.query_params)
+        return context
+
+    def mine(self):
+        return self.request.query_params.get("mine") in ("1", "true", "True", "yes")
+
+    def scoped(self, qs):
+        return qs.filter(owner=self.request.user) if self.mine() else qs
+
+    def list_cache_tags(self):
+        # ?mine=1 only changes with the user's own plots
+        return [tag("plots.plot", owner=self.request.user.pk) if self.mine() else tag("plots.plot")]
+
     def get_queryset(self):
-        qs = Plot.objects.all().select_related("owner").prefetch_related("images")
-        mine = self.request.query_params.get("mine")
-        if mine in ("1", "true", "True", "yes"):
-            qs = qs.filter(owner=self.request.user)
-        return qs
+        if self.action in ("list", "retrieve"):
+            # load only the columns and relations the response uses
+            fields = self.get_fields()
+            columns = [f for f in fields if f in PLOT_COLUMNS]
+            if "geometry" in fields:
+                columns.append("type")  # ?geom=compact encodes by plot type
+            qs = Plot.objects.only("owner", *columns)
+            if "images" in fields:
+                qs = qs.prefetch_related("images")
+            if "images_summary" in fields:
+                qs = with_images_summary(qs)
+        else:
+            qs = Plot.objects.all().select_related("owner")
+            if self.action in ("update", "partial_update"):
+                qs = qs.prefetch_related("images")
+        return self.scoped(qs)
+
+    def object_validators(self, pk, lock=False):
+        try:
+            qs = self.scoped(Plot.objects.filter(pk=pk))
+            if lock:
+                qs = qs.select_for_update()  # until the caller's transaction ends
+            # photo changes touch the plot's updated_at (see plots.signals)
+            updated_at = qs.values_list("updated_at", flat=True).first()
+        except (TypeError, ValueError):
+            return None  # malformed pk: the caller's get_object() answers 404
+        return object_validators(pk, updated_at) if updated_at else None
+
+    # Conditional requests (crops.conditional): validators are checked before
+    # the plots are fetched or serialized.
+    # Cached per user and URL (crops.response_cache); plots.signals invalidates.
+    @cached_response(lambda view, request, *args, **kwargs: view.list_cache_tags())
+    def list(self, request, *args, **kwargs):
+        validators = collection_validators(self.scoped(Plot.objects.all()), request.user.pk)
+        return precondition(request, validators) or set_validators(
+            super().list(request, *args, **kwargs), validators
+        )
+
+    @cached_response(lambda view, request, *args, **kwargs: [tag("plots.plot", kwargs["pk"])])
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.object_validators(kwargs["pk"])
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)  # 404
+        return precondition(request, validators) or set_validators(
+            super().retrieve(request, *args, **kwargs), validators
+        )
+
+    def update(self, request, *args, **kwargs):
+        # If-Match / If-Unmodified-Since: 412 rather than a lost update. The
+        # row stays locked from the check to the save, so two writers holding
+        # the same ETag can't both pass.
+        with transaction.atomic():
+            validators = self.object_validators(kwargs["pk"], lock=True)
+            if validators is not None:
+                failed = precondition(request, validators)
+                if failed is not None:
+                    return failed
+            response = super().update(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, self.object_validators(kwargs["pk"]))
+        return response
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    # GET /api/plots/{id}/media/?page_size=&cursor=   (next page in the Link header)
     # POST /api/plots/{id}/media/
-    @action(detail=True, methods=["post"], url_path="media")
+    @action(detail=True, methods=["get", "post"], url_path="media")
     def upload_media(self, request, pk=None):
         plot = self.get_object()
-        if plot.owner_id != request.user.id:
+        # the files themselves are only served to the owner (protected_media)
+        if plot.owner_id != request.user.id and not (request.method == "GET" and request.user.is_staff):
             return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        if request.method == "GET":
+            paginator = MediaCursorPagination()
+            page = paginator.paginate_queryset(
+                CropMedia.objects.filter(plot=plot).only("id", "image", "thumbnail", "caption", "created_at"),
+                request, view=self,
+            )
+            serializer = CropMediaSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
 
         file = request.FILES.get("image")
         caption = request.data.get("caption", "")
@@ -39,3 +162,218 @@ class PlotViewSet(viewsets.ModelViewSet):
         media = CropMedia.objects.create(plot=plot, image=file, caption=caption)
         serializer = CropMediaSerializer(media, context={"request": request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    # DELETE /api/plots/{id}/media/{media_id}/
+    @action(detail=True, methods=["delete"], url_path=r"media/(?P<media_id>\d+)")
+    def delete_media(self, request, pk=None, media_id=None):
+        plot = self.get_object()
+        if plot.owner_id != request.user.id:
+            return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        media = get_object_or_404(plot.images, pk=media_id)  # media.plot is `plot`, no extra query
+        media.delete()
+        # Content-addressed files may be shared: storage.delete() leaves them to
+        # gc_media once unreferenced; other storages remove the file here.
+        media.image.delete(save=False)
+        media.thumbnail.delete(save=False)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    # POST /api/plots/{id}/uploads/  {"filename", "size", "caption"}  (resumable; see plots.uploads)
+    @action(detail=True, methods=["post"], url_path="uploads")
+    def start_upload(self, request, pk=None):
+        plot = self.get_object()
+        filename = str(request.data.get("filename", "")).strip()
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            size = 0
+        if not filename or size <= 0:
+            return Response({"detail": "filename and a positive size are required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if size > uploads.max_size():
+            return Response({"detail": f"Uploads are limited to {uploads.max_size()} bytes."},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        session = UploadSession.objects.create(
+            plot=plot, filename=filename[:200], size=size, caption=str(request.data.get("caption", ""))[:200]
+        )
+        url = request.build_absolute_uri(f"{request.path.rstrip('/')}/{session.id}/")
+        return Response({"id": str(session.id), "offset": 0, "size": size, "url": url},
+                        status=status.HTTP_201_CREATED, headers={"Location": url})
+
+    # GET/PUT/DELETE /api/plots/{id}/uploads/{upload_id}/
+    @action(detail=True, methods=["get", "put", "delete"], url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})")
+    def upload_chunk(self, request, pk=None, upload_id=None):
+        plot = self.get_object()
+        if plot.owner_id != request.user.id:
+            return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        session = get_object_or_404(UploadSession.objects.select_related("media"), pk=upload_id, plot=plot)
+
+        if request.method == "DELETE":
+            # a finalized session's media stays; only the session goes
+            uploads.discard(session)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if session.media_id:
+            # already finalized (e.g. the client retried a lost response)
+            return Response(CropMediaSerializer(session.media, context={"request": request}).data,
+                            status=status.HTTP_201_CREATED)
+        offset = uploads.offset(session)
+        if offset == session.size:
+            # every byte arrived but finalizing failed: retry rather than strand the upload
+            media = uploads.finalize(session)
+            return Response(CropMediaSerializer(media, context={"request": request}).data,
+                            status=status.HTTP_201_CREATED)
+        if request.method == "GET":
+            return Response({"id": str(session.id), "offset": offset, "size": session.size},
+                            headers={"Upload-Offset": str(offset)})
+
+        try:
+            # request.stream is the raw socket body: never parsed or buffered
+            offset = uploads.append_chunk(
+                session, request.stream, request.headers.get("Content-Range"), request.headers.get("Content-Length")
+            )
+        except uploads.UploadError as e:
+            body = {"detail": str(e)}
+            if e.offset is not None:
+                body["offset"] = e.offset
+            return Response(body, status=e.status)
+
+        if offset < session.size:
+            return Response({"id": str(session.id), "offset": offset, "size": session.size},
+                            headers={"Upload-Offset": str(offset)})
+        media = uploads.finalize(session)
+        return Response(CropMediaSerializer(media, context={"request": request}).data, status=status.HTTP_201_CREATED)
+
+    # GET /api/plots/planting-plan/?pattern=grid|hex&seeds_per_plant=&germination_rate=&fertiliser_kg_per_ha=
+    @action(detail=False, methods=["get"], url_path="planting-plan")
+    def planting_plan(self, request):
+        params = request.query_params
+        pattern = params.get("pattern", "grid")
+        if pattern not in CELL_FACTOR:
+            return Response({"detail": "pattern must be grid or hex."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            seeds_per_plant = float(params.get("seeds_per_plant", DEFAULT_SEEDS_PER_PLANT))
+            germination_rate = float(params.get("germination_rate", DEFAULT_GERMINATION_RATE))
+            fertiliser_rate = float(params.get("fertiliser_kg_per_ha", DEFAULT_FERTILISER_KG_PER_HA))
+        except ValueError:
+            return Response({"detail": "Numeric parameters must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < germination_rate <= 1:
+            return Response({"detail": "germination_rate must be in (0, 1]."}, status=status.HTTP_400_BAD_REQUEST)
+        # float() accepts "nan" and "inf"
+        if not (math.isfinite(seeds_per_plant) and seeds_per_plant > 0):
+            return Response({"detail": "seeds_per_plant must be a positive number."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not (math.isfinite(fertiliser_rate) and fertiliser_rate >= 0):
+            return Response({"detail": "fertiliser_kg_per_ha must be a non-negative number."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        plots = (
+            Plot.objects.filter(owner=request.user)
+            .select_related("crop")
+            .only("id", "name", "type", "geometry", "crop__id", "crop__spacing")
+            .order_by("id")
+        )
+        return Response(planting_plan(
+            plots,
+            pattern=pattern,
+            seeds_per_plant=seeds_per_plant,
+            germination_rate=germination_rate,
+            fertiliser_kg_per_ha=fertiliser_rate,
+        ))
+
+    # GET /api/plots/{id}/layout/?spacing=&pattern=grid|hex&buffer=&output=geojson|compact|binary
+    @action(detail=True, methods=["get"], url_path="layout")
+    def plot_layout(self, request, pk=None):
+        plot = self.get_object()
+        params = request.query_params
+
+        pattern = params.get("pattern", "grid")
+        if pattern not in layout.PATTERNS:
+            return Response({"detail": "pattern must be grid or hex."}, status=status.HTTP_400_BAD_REQUEST)
+        # not "format": DRF reserves that for renderer selection
+        fmt = params.get("output", "geojson")
+        if fmt not in ("geojson", "compact", "binary"):
+            return Response({"detail": "output must be geojson, compact or binary."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            spacing = float(params["spacing"]) if "spacing" in params else (
+                plot.crop.spacing_m if plot.crop_id else None
+            )
+            buffer = float(params["buffer"]) if "buffer" in params else None
+        except ValueError:
+            return Response({"detail": "spacing and buffer must be numbers (metres)."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if any(v is not None and not math.isfinite(v) for v in (spacing, buffer)):
+            return Response({"detail": "spacing and buffer must be finite numbers (metres)."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not spacing or spacing <= 0:
+            return Response({"detail": "spacing (metres) is required when the plot has no crop spacing."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if buffer is not None and buffer < 0:
+            return Response({"detail": "buffer must not be negative."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            points = layout.get_layout(plot, spacing, pattern, buffer)
+        except layout.LayoutError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if fmt == "binary":
+            # little-endian int32 pairs [lng, lat] * scale
+            resp = HttpResponse(points.astype("<i4").tobytes(), content_type="application/octet-stream")
+            resp["X-Layout-Scale"] = str(layout.SCALE)
+            resp["X-Layout-Count"] = str(len(points))
+            return resp
+
+        props = {"plot": plot.id, "spacing": spacing, "pattern": pattern, "count": len(points)}
+        stream = layout.stream_geojson if fmt == "geojson" else layout.stream_compact
+        content_type = "application/geo+json" if fmt == "geojson" else "application/json"
+        return StreamingHttpResponse(stream(points, props), content_type=content_type)
+
+    # GET /api/plots/{id}/recommendations/?limit=5
+    @action(detail=True, methods=["get"], url_path="recommendations")
+    def recommendations(self, request, pk=None):
+        plot = self.get_object()
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 5)), 50))
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"plot": plot.id, "results": recommend(plot, limit=limit)})
+
+
+# GET /media/<path>
+@require_safe
+def protected_media(request, path):
+    """
+    Files attached to plots are only served to the plots' owners,
+    authenticated by JWT or admin session; other media is public.
+    Content-addressed blobs may be shared by several uploads, so access is
+    granted if any plot referencing the file belongs to the user; blobs
+    nothing references any more are not served.
+    """
+    owner_ids = set(
+        CropMedia.objects.filter(Q(image=path) | Q(thumbnail=path)).values_list("plot__owner_id", flat=True)
+    )
+    immutable = is_content_addressed(path)
+    if not owner_ids and immutable and not Blob.objects.filter(name=path, refcount__gt=0).exists():
+        raise Http404  # unreferenced (e.g. a deleted photo) until gc_media collects it
+    if not owner_ids and not path.startswith("plot_images/"):
+        return serve_file(request, path, cache_control=(
+            "public, " + IMMUTABLE_CACHE_CONTROL if immutable else "public, max-age=86400"
+        ))
+
+    user = request.user if request.user.is_authenticated else None
+    if user is None:
+        try:
+            auth = CachedJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            auth = None
+        if auth is None:
+            return HttpResponse("Authentication required.", status=401,
+                                headers={"WWW-Authenticate": 'Bearer realm="api"'})
+        user = auth[0]
+
+    # 404 rather than 403, so other users' file names can't be probed
+    if user.id not in owner_ids and not user.is_staff:
+        raise Http404
+    return serve_file(request, path, cache_control=(
+        "private, " + IMMUTABLE_CACHE_CONTROL if immutable else "private, max-age=3600"
+    ))
+
@@ -0,0 +1,67 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import CapturedProfile
+
+
+@admin.register(CapturedProfile)
+class CapturedProfileAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "method", "path", "status_code", "duration_ms", "query_count")
+    list_filter = ("method", "route", "status_code")
+    search_fields = ("path", "route")
+    date_hierarchy = "created_at"
+    fields = (
+        "created_at", "method", "path", "route", "status_code", "duration_ms", "user",
+        "sample_count", "download", "top_frames", "query_count", "sql",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/folded/",
+                self.admin_site.admin_view(self.folded_view),
+                name="profiling_capturedprofile_folded",
+            ),
+        ] + super().get_urls()
+
+    def folded_view(self, request, pk):
+        profile = get_object_or_404(CapturedProfile, pk=pk)
+        response = HttpResponse(profile.stacks, content_type="text/plain; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="profile-{pk}.folded"'
+        return response
+
+    @admin.display(description="flamegraph")
+    def download(self, obj):
+        url = reverse("admin:profiling_capturedprofile_folded", args=[obj.pk])
+        return format_html('<a href="{}">Download folded stacks</a> (flamegraph.pl, speedscope)', url)
+
+    @admin.display(description="hottest leaf frames")
+    def top_frames(self, obj):
+        totals = {}
+        for line in obj.stacks.splitlines():
+            stack, _, n = line.rpartition(" ")
+            leaf = stack.rsplit(";", 1)[-1]
+            totals[leaf] = totals.get(leaf, 0) + int(n)
+        rows = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:15]
+        return format_html(
+            "<table>{}</table>",
+            format_html_join("", "<tr><td>{}</td><td>{}</td></tr>", ((n, leaf) for leaf, n in rows)),
+        )
+
+    @admin.display(description="SQL (slowest first)")
+    def sql(self, obj):
+        return format_html_join(
+            "",
+            "<p><b>{} ms</b></p><pre>{}</pre><pre>{}</pre>",
+            ((f'{q["duration_ms"]:.1f}', q["sql"], q.get("explain", "")) for q in obj.queries),
+        )
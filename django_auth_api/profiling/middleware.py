@@ -0,0 +1,110 @@
+"""
+Opt-in slow-request capture. A PROFILING_SAMPLE_RATE fraction of requests run
+under the stack sampler with their SQL recorded; those slower than
+PROFILING_THRESHOLD_MS are stored as CapturedProfile rows (with EXPLAIN
+plans for the slowest SELECTs) for browsing in the admin.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .models import CapturedProfile
+from .sampler import StackSampler
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                "alias": context["connection"].alias,
+                "sql": sql,
+                "params": None if many else params,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+            })
+
+
+def _explain(query):
+    if not query["sql"].lstrip().upper().startswith("SELECT"):
+        return ""
+    conn = connections[query["alias"]]
+    prefix = "EXPLAIN QUERY PLAN " if conn.vendor == "sqlite" else "EXPLAIN "
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(prefix + query["sql"], query["params"])
+            return "\n".join(" ".join(str(c) for c in row) for row in cursor.fetchall())
+    except Exception as e:  # the plan is a nice-to-have; never fail the request
+        return f"EXPLAIN failed: {e}"
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "PROFILING_ENABLED", False) or random.random() >= getattr(
+            settings, "PROFILING_SAMPLE_RATE", 0.05
+        ):
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        sampler = StackSampler(
+            threading.get_ident(), getattr(settings, "PROFILING_INTERVAL_MS", 5) / 1000
+        ).start()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            sampler.stop()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if duration_ms >= getattr(settings, "PROFILING_THRESHOLD_MS", 500):
+            try:
+                self._store(request, response, duration_ms, sampler, recorder.queries)
+            except Exception:
+                logger.exception("failed to store profile for %s", request.path)
+        return response
+
+    def _store(self, request, response, duration_ms, sampler, queries):
+        queries = sorted(queries, key=lambda q: q["duration_ms"], reverse=True)
+        explain_limit = getattr(settings, "PROFILING_EXPLAIN_LIMIT", 5)
+        for i, query in enumerate(queries):
+            query["explain"] = _explain(query) if i < explain_limit else ""
+            query["params"] = [str(p) for p in query["params"] or ()]
+            query.pop("alias")
+
+        match = getattr(request, "resolver_match", None)
+        user = getattr(request, "user", None)
+        profile = CapturedProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:500],
+            route=(match.route if match else "")[:200],
+            status_code=response.status_code,
+            duration_ms=duration_ms,
+            user=user if user is not None and user.is_authenticated else None,
+            stacks=sampler.folded(),
+            sample_count=sum(sampler.counts.values()),
+            query_count=len(queries),
+            queries=queries,
+        )
+
+        keep = getattr(settings, "PROFILING_MAX_PROFILES", 500)
+        if profile.pk % 50 == 0:
+            cutoff = CapturedProfile.objects.values_list("created_at", flat=True)[keep:keep + 1].first()
+            if cutoff is not None:
+                CapturedProfile.objects.filter(created_at__lte=cutoff).delete()
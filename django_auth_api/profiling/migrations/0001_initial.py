@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CapturedProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('method', models.CharField(max_length=8)),
+                ('path', models.CharField(max_length=500)),
+                ('route', models.CharField(blank=True, default='', max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('stacks', models.TextField(blank=True, default='')),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('queries', models.JSONField(default=list)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import models
+
+
+class CapturedProfile(models.Model):
+    """A sampled request that exceeded PROFILING_THRESHOLD_MS."""
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=500)
+    route = models.CharField(max_length=200, blank=True, default="")
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    # Folded stacks ("outer;inner;leaf <samples>" per line) for flamegraph.pl / speedscope.
+    stacks = models.TextField(blank=True, default="")
+    sample_count = models.PositiveIntegerField(default=0)
+    query_count = models.PositiveIntegerField(default=0)
+    # [{"sql", "params", "duration_ms", "explain"}], slowest first
+    queries = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
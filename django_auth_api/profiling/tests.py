@@ -0,0 +1,58 @@
+import threading
+import time
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from .models import CapturedProfile
+from .sampler import StackSampler
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class StackSamplerTests(TestCase):
+    def test_folded_stacks_include_running_function(self):
+        sampler = StackSampler(threading.get_ident(), 0.002).start()
+        busy_loop(0.1)
+        sampler.stop()
+        folded = sampler.folded()
+        self.assertIn("busy_loop (tests.py:", folded)
+        stack, _, count = folded.splitlines()[0].rpartition(" ")
+        self.assertTrue(count.isdigit())
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)  # profiles the uncached path
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(email="p@example.com", password="x"))
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_THRESHOLD_MS=0)
+    def test_slow_request_is_captured_with_sql_plans(self):
+        self.client.get("/api/events/")
+        profile = CapturedProfile.objects.get()
+        self.assertEqual(profile.route, "api/events/")
+        self.assertGreater(profile.query_count, 0)
+        selects = [q for q in profile.queries if q["sql"].startswith("SELECT")]
+        self.assertTrue(selects[0]["explain"])
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_THRESHOLD_MS=60_000)
+    def test_fast_request_is_not_stored(self):
+        self.client.get("/api/events/")
+        self.assertFalse(CapturedProfile.objects.exists())
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_THRESHOLD_MS=0)
+    def test_admin_pages_render(self):
+        self.client.get("/api/events/")
+        profile = CapturedProfile.objects.get()
+        admin = CustomUser.objects.create_superuser(email="admin@example.com", password="x")
+        self.client.force_login(admin)
+        r = self.client.get(f"/admin/profiling/capturedprofile/{profile.pk}/change/")
+        self.assertContains(r, " ms</b>")
+        r = self.client.get(f"/admin/profiling/capturedprofile/{profile.pk}/folded/")
+        self.assertEqual(r.content.decode(), profile.stacks)